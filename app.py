@@ -42,7 +42,7 @@ except ImportError:
     XLSX_SUPPORT = False
 
 load_dotenv()
-from database import get_db, RACMDatabase
+from database import get_db, html_to_text, RACMDatabase
 from auth import (
     get_current_user, require_login, require_admin, require_audit_access,
     login_user, logout_user, check_password, hash_password,
@@ -246,6 +246,18 @@ def allowed_file(filename):
 db = get_db()
 
 
+@app.before_request
+def begin_db_request():
+    """Enable per-request memoization of audit membership checks."""
+    db.begin_request()
+
+
+@app.teardown_request
+def end_db_request(exc=None):
+    """Drop membership checks memoized during the request."""
+    db.end_request()
+
+
 # ==================== Error Response Helpers ====================
 
 def error_response(message: str, status_code: int = 400):
@@ -394,6 +406,21 @@ def generate_embedding(text: str) -> list:
         logger.error(f"[Library] Error generating embedding: {e}")
         return None
 
+def generate_embeddings(texts: list):
+    """Generate embeddings for several texts in one model call.
+
+    Returns a float32 NumPy array with one row per text, or None if the
+    model is unavailable. Rows can be stored without converting to lists.
+    """
+    model = get_embedding_model()
+    if model is None or not texts:
+        return None
+    try:
+        return model.encode(texts, convert_to_numpy=True)
+    except Exception as e:
+        logger.error(f"[Library] Error generating embeddings: {e}")
+        return None
+
 def chunk_document(text: str, chunk_size: int = 500, overlap: int = 50) -> list:
     """Split document text into overlapping chunks.
 
@@ -484,17 +511,12 @@ def process_library_document(filepath: str, doc_id: int, mime_type: str = None)
     # Initialize vector table
     db._init_vector_table()
 
-    # Store chunks with embeddings
+    # Embed all chunks in one model call, then store them in one transaction
+    embeddings = generate_embeddings([chunk['content'] for chunk in chunks])
     for i, chunk in enumerate(chunks):
-        embedding = generate_embedding(chunk['content'])
-        db.add_library_chunk(
-            document_id=doc_id,
-            chunk_index=i,
-            content=chunk['content'],
-            section=chunk['section'],
-            token_count=chunk['token_count'],
-            embedding=embedding
-        )
+        chunk['chunk_index'] = i
+        chunk['embedding'] = embeddings[i] if embeddings is not None else None
+    db.add_library_chunks(doc_id, chunks)
 
     # Update document with chunk count
     db.update_library_document(doc_id, total_chunks=len(chunks))
@@ -635,7 +657,7 @@ def get_data():
 
     if audit_id:
         # Get audit-filtered data
-        risks = db.get_risks_by_audit(audit_id)
+        risks = db.get_risks_by_audit_with_links(audit_id)
         issues = db.get_issues_by_audit(audit_id)
         audit = db.get_audit(audit_id)
 
@@ -651,10 +673,7 @@ def get_data():
         #          OE Testing, OE Conclusion, Status, Flowchart, Task, Evidence
         racm_rows = []
         racm_metadata = []  # Additional data for workflow
-        conn = db._get_conn()
         for r in risks:
-            fc = conn.execute("SELECT name FROM flowcharts WHERE risk_id = ?", (r['id'],)).fetchone()
-            task = conn.execute("SELECT title FROM tasks WHERE risk_id = ?", (r['id'],)).fetchone()
             racm_rows.append([
                 r['risk_id'],                                          # 0: Risk ID
                 r['risk'] or '',                                       # 1: Risk
@@ -665,8 +684,8 @@ def get_data():
                 r.get('operational_effectiveness_test') or '',         # 6: OE Testing
                 r.get('operational_effectiveness_conclusion') or '',   # 7: OE Conclusion
                 r['status'] or '',                                     # 8: Status
-                fc['name'] if fc else '',                              # 9: Flowchart
-                task['title'] if task else '',                         # 10: Task
+                r['flowchart_name'] or '',                             # 9: Flowchart
+                r['task_title'] or '',                                 # 10: Task
                 ''                                                     # 11: Evidence (read-only)
             ])
             # Add workflow metadata for each row
@@ -681,7 +700,6 @@ def get_data():
                 'admin_lock_reason': r.get('admin_lock_reason'),
                 'permissions': permissions
             })
-        conn.close()
 
         issues_rows = []
         issues_metadata = []
@@ -709,9 +727,7 @@ def get_data():
             })
 
         # Get audit team for reviewer selection
-        audit_team = db.get_audit_team(audit_id) if audit_id else []
-        audit_auditors = [m for m in audit_team if m['team_role'] == 'auditor']
-        audit_reviewers = [m for m in audit_team if m['team_role'] == 'reviewer']
+        audit_team = db.get_audit_team_split(audit_id) if audit_id else {'auditors': [], 'reviewers': []}
 
         return jsonify({
             'racm': racm_rows,
@@ -724,10 +740,7 @@ def get_data():
                 'reviewer_id': audit.get('reviewer_id') if audit else None,
                 'title': audit.get('title') if audit else None
             },
-            'audit_team': {
-                'auditors': audit_auditors,
-                'reviewers': audit_reviewers
-            },
+            'audit_team': audit_team,
             'user_role': get_user_role(user)
         })
     else:
@@ -1329,9 +1342,8 @@ def get_flowchart(flowchart_id):
     permissions = {'canEdit': False}
     if fc.get('risk_id'):
         # Get the risk record and audit context
-        conn = db._get_conn()
-        risk_row = conn.execute("SELECT * FROM risks WHERE id = ?", (fc['risk_id'],)).fetchone()
-        conn.close()
+        with db._connection() as conn:
+            risk_row = conn.execute("SELECT * FROM risks WHERE id = ?", (fc['risk_id'],)).fetchone()
 
         if risk_row:
             risk = dict(risk_row)
@@ -1357,9 +1369,8 @@ def save_flowchart(flowchart_id):
     # Check permissions for the linked risk
     fc = db.get_flowchart(flowchart_id)
     if fc and fc.get('risk_id'):
-        conn = db._get_conn()
-        risk_row = conn.execute("SELECT * FROM risks WHERE id = ?", (fc['risk_id'],)).fetchone()
-        conn.close()
+        with db._connection() as conn:
+            risk_row = conn.execute("SELECT * FROM risks WHERE id = ?", (fc['risk_id'],)).fetchone()
 
         if risk_row:
             risk = dict(risk_row)
@@ -1910,10 +1921,8 @@ def create_task():
     # Associate with active audit
     audit_id = get_active_audit_id()
     if audit_id:
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     increment_data_version()
     return jsonify({'status': 'created', 'id': task_id})
@@ -2024,9 +2033,9 @@ def delete_issue(issue_id):
 @require_login
 def get_issue_documentation(issue_id):
     """Get documentation for an issue."""
-    doc = db.get_issue_documentation(issue_id)
-    has_doc = db.has_issue_documentation(issue_id)
-    return jsonify({'documentation': doc or '', 'has_documentation': has_doc})
+    doc = db.get_issue_documentation(issue_id) or ''
+    # The text is already here, so test it rather than query again
+    return jsonify({'documentation': doc, 'has_documentation': bool(doc.strip())})
 
 @app.route('/api/issues/<issue_id>/documentation', methods=['POST'])
 @require_login
@@ -2168,7 +2177,7 @@ def upload_issue_attachment(issue_id):
 @app.route('/api/attachments/<int:attachment_id>', methods=['GET'])
 def download_attachment(attachment_id):
     """Download an attachment file."""
-    attachment = db.get_attachment(attachment_id)
+    attachment = db.get_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2183,7 +2192,7 @@ def download_attachment(attachment_id):
 @require_login
 def delete_attachment(attachment_id):
     """Delete an issue attachment. Enforces edit permissions on the parent issue."""
-    attachment = db.get_attachment(attachment_id)
+    attachment = db.get_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2261,7 +2270,7 @@ def upload_risk_attachment(risk_id):
 @app.route('/api/risk-attachments/<int:attachment_id>', methods=['GET'])
 def download_risk_attachment(attachment_id):
     """Download a risk attachment file."""
-    attachment = db.get_risk_attachment(attachment_id)
+    attachment = db.get_risk_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2276,7 +2285,7 @@ def download_risk_attachment(attachment_id):
 @require_login
 def delete_risk_attachment(attachment_id):
     """Delete a risk attachment. Enforces edit permissions on the parent risk."""
-    attachment = db.get_risk_attachment(attachment_id)
+    attachment = db.get_risk_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2342,7 +2351,7 @@ def upload_audit_attachment(audit_id):
 @app.route('/api/audit-attachments/<int:attachment_id>', methods=['GET'])
 def download_audit_attachment(attachment_id):
     """Download an audit attachment file."""
-    attachment = db.get_audit_attachment(attachment_id)
+    attachment = db.get_audit_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2358,7 +2367,7 @@ def download_audit_attachment(attachment_id):
 @require_non_viewer
 def delete_audit_attachment(attachment_id):
     """Delete an audit attachment."""
-    attachment = db.get_audit_attachment(attachment_id)
+    attachment = db.get_audit_attachment(attachment_id, with_text=False)
     if not attachment:
         return not_found_response('Attachment')
 
@@ -2410,7 +2419,7 @@ def create_issue_from_risk(risk_id):
 @require_login
 def export_data():
     """Export all data as JSON."""
-    return jsonify(db.export_all())
+    return app.response_class(db.export_all_json(), mimetype='application/json')
 
 @app.route('/api/import', methods=['POST'])
 @require_login
@@ -3064,9 +3073,7 @@ def execute_tool(tool_name, tool_input):
         if not content.strip():
             return f"The {doc_type} document for {risk_code} exists but is empty."
 
-        # Strip HTML tags for cleaner AI reading
-        text_content = re.sub(r'<[^>]+>', '', content)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        text_content = html_to_text(content)
 
         doc_type_label = "Design Effectiveness Testing" if doc_type == "de_testing" else "Operational Effectiveness Testing"
         return f"## {doc_type_label} Document for {risk_code}\n\n{text_content}"
@@ -3131,9 +3138,7 @@ def execute_tool(tool_name, tool_input):
         if not doc or not doc.strip():
             return f"Issue {issue_id} exists but has no documentation yet."
 
-        # Strip HTML tags for cleaner AI reading
-        text_content = re.sub(r'<[^>]+>', '', doc)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        text_content = html_to_text(doc)
 
         return f"## Documentation for Issue {issue_id}\n\nTitle: {issue.get('title', 'N/A')}\nRisk: {issue.get('risk_id', 'N/A')}\nSeverity: {issue.get('severity', 'N/A')}\nStatus: {issue.get('status', 'N/A')}\n\n### Evidence/Findings:\n{text_content}"
 
@@ -3168,15 +3173,17 @@ def execute_tool(tool_name, tool_input):
         attachment_type = tool_input.get('attachment_type', 'issue')
 
         if attachment_type == 'issue':
-            attachment = db.get_attachment(attachment_id)
+            attachment = db.get_attachment(attachment_id, with_text=False)
         else:
-            attachment = db.get_risk_attachment(attachment_id)
+            attachment_type = 'risk'
+            attachment = db.get_risk_attachment(attachment_id, with_text=False)
 
         if not attachment:
             return f"Attachment with ID {attachment_id} not found."
 
         filename = attachment.get('original_filename', 'Unknown file')
-        extracted_text = attachment.get('extracted_text', '')
+        # Read one character past the limit so truncation can still be detected
+        extracted_text = db.read_extracted_text(attachment_type, attachment['id'], max_chars=30001) or ''
 
         if not extracted_text:
             return f"No text content available for '{filename}'. The file may be an image or unsupported format."
@@ -9,15 +9,44 @@ Provides persistent storage for:
 Can be imported as a module into larger projects.
 """
 
+import codecs
 import logging
 import os
 import sqlite3
 import json
+import functools
 import re
+import threading
+import struct
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple, Final
+
+# orjson parses and serialises large Drawflow documents several times faster
+# than the stdlib; fall back to json when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# sqlite-vec provides the vec0 table behind library vector search; without it
+# the library falls back to keyword search
+try:
+    import sqlite_vec
+except ImportError:
+    sqlite_vec = None
+
+# pyahocorasick matches every forbidden execute_query() keyword in one linear
+# automaton pass; without it the compiled regex alternation is used
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -25,52 +54,916 @@ logger = logging.getLogger(__name__)
 # Development mode flag - set DEV_MODE=true for development features
 DEV_MODE = os.environ.get('DEV_MODE', 'false').lower() in ('true', '1', 'yes')
 
+# Bits returned by RACMDatabase.get_user_audit_permissions_mask()
+AUDIT_MASK_AUDITOR = 1
+AUDIT_MASK_REVIEWER = 2
+AUDIT_MASK_VIEWER = 4
+AUDIT_MASK_TEAM_MEMBER = 8
+
+# Hot-path statements shared by the permission checks. Kept as module
+# constants so every call hands sqlite3 the same text and reuses its
+# prepared statement.
+_SQL_AUDIT_PERMISSIONS_MASK: Final[str] = """
+    SELECT EXISTS(SELECT 1 FROM audit_team
+                  WHERE audit_id = ?1 AND user_id = ?2 AND team_role = 'auditor')
+         | (EXISTS(SELECT 1 FROM audit_team
+                   WHERE audit_id = ?1 AND user_id = ?2 AND team_role = 'reviewer') << 1)
+         | ((EXISTS(SELECT 1 FROM audit_team
+                    WHERE audit_id = ?1 AND user_id = ?2 AND team_role = 'viewer')
+             OR EXISTS(SELECT 1 FROM audit_viewers
+                       WHERE audit_id = ?1 AND viewer_user_id = ?2)) << 2)
+         | (EXISTS(SELECT 1 FROM audit_team
+                   WHERE audit_id = ?1 AND user_id = ?2) << 3)
+"""
+
+_SQL_USER_TEAM_ROLES: Final[str] = """
+    SELECT team_role FROM audit_team
+    WHERE audit_id = ? AND user_id = ?
+"""
+
+_SQL_AUDIT_TEAM: Final[str] = """
+    SELECT at.id, at.audit_id, at.user_id, at.team_role, at.assigned_at,
+           u.name as user_name, u.email as user_email
+    FROM audit_team at
+    JOIN users u ON at.user_id = u.id
+    WHERE at.audit_id = ?
+    ORDER BY at.team_role, u.name
+"""
+
+# update_audit_assignment() variants, one per combination of assignments.
+_SQL_UPD_AUDITOR: Final[str] = "UPDATE audits SET auditor_id = ? WHERE id = ?"
+_SQL_UPD_REVIEWER: Final[str] = "UPDATE audits SET reviewer_id = ? WHERE id = ?"
+_SQL_UPD_BOTH: Final[str] = "UPDATE audits SET auditor_id = ?, reviewer_id = ? WHERE id = ?"
+
+# Statements behind the hottest single-row getters and inserts. Defining them
+# once keeps every call on the same string, so the per-connection statement
+# cache hits without rebuilding the SQL text.
+_SQL_GET_RISK: Final[str] = "SELECT * FROM risks WHERE risk_id = ?"
+_SQL_GET_RISK_BY_ID: Final[str] = "SELECT * FROM risks WHERE id = ?"
+_SQL_RISK_PK: Final[str] = "SELECT id FROM risks WHERE risk_id = ?"
+_SQL_INSERT_RISK: Final[str] = """
+    INSERT INTO risks (risk_id, risk, control_id, control_owner, design_effectiveness_testing,
+                      design_effectiveness_conclusion, operational_effectiveness_test,
+                      operational_effectiveness_conclusion, status, ready_for_review,
+                      reviewer, raise_issue, closed, audit_id, record_status, created_by)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SQL_GET_TASK: Final[str] = """
+    SELECT t.*, r.risk_id as linked_risk_id
+    FROM tasks t
+    LEFT JOIN risks r ON t.risk_id = r.id
+    WHERE t.id = ?
+"""
+_SQL_GET_AUDIT: Final[str] = "SELECT * FROM audits WHERE id = ?"
+# Annual plan order: by quarter, then planned start and title
+_SQL_AUDITS_ORDER_BY: Final[str] = """
+    ORDER BY
+        CASE quarter
+            WHEN 'Q1' THEN 1
+            WHEN 'Q2' THEN 2
+            WHEN 'Q3' THEN 3
+            WHEN 'Q4' THEN 4
+            ELSE 5
+        END,
+        planned_start,
+        title
+"""
+_SQL_GET_FLOWCHART: Final[str] = "SELECT * FROM flowcharts WHERE name = ?"
+_SQL_GET_ISSUE: Final[str] = "SELECT * FROM issues WHERE issue_id = ?"
+# Next ISS-nnn number; served by the idx_issues_number expression index (migration 010)
+_SQL_NEXT_ISSUE_NUMBER: Final[str] = (
+    "SELECT COALESCE(MAX(CAST(SUBSTR(issue_id, 5) AS INTEGER)), 0) + 1 FROM issues"
+)
+_SQL_USER_COLUMNS: Final[str] = "id, email, name, password_hash, is_active, is_admin, created_at, updated_at, role"
+_SQL_GET_USER_BY_ID: Final[str] = f"SELECT {_SQL_USER_COLUMNS} FROM users WHERE id = ?"
+_SQL_GET_USER_BY_EMAIL: Final[str] = f"SELECT {_SQL_USER_COLUMNS} FROM users WHERE email = ?"
+# Attachment columns other than extracted_text, which can run to megabytes
+# per file and is read separately through read_extracted_text()
+_SQL_ISSUE_ATTACHMENT_COLUMNS: Final[str] = (
+    "id, issue_id, filename, original_filename, file_size, mime_type, description, uploaded_at, audit_id"
+)
+_SQL_RISK_ATTACHMENT_COLUMNS: Final[str] = (
+    "id, risk_id, category, filename, original_filename, file_size, mime_type, description, uploaded_at, audit_id"
+)
+_SQL_AUDIT_ATTACHMENT_COLUMNS: Final[str] = (
+    "id, audit_id, filename, original_filename, file_size, mime_type, description, uploaded_at"
+)
+_ATTACHMENT_TABLES: Final[Dict[str, str]] = {
+    'issue': 'issue_attachments',
+    'risk': 'risk_attachments',
+    'audit': 'audit_attachments',
+}
+
+# Schema description handed to the AI by get_schema()
+_SCHEMA_DOC: Final[str] = """
+DATABASE SCHEMA:
+
+TABLE risks (RACM - Risk and Control Matrix):
+  - id: INTEGER PRIMARY KEY
+  - risk_id: TEXT (e.g., 'R001', 'R002')
+  - risk: TEXT (risk description)
+  - control_id: TEXT
+  - control_owner: TEXT
+  - design_effectiveness_testing: TEXT
+  - design_effectiveness_conclusion: TEXT
+  - operational_effectiveness_test: TEXT
+  - operational_effectiveness_conclusion: TEXT
+  - status: TEXT (Not Complete, Effective, Not Effective)
+  - ready_for_review: INTEGER (0 or 1)
+  - reviewer: TEXT
+  - raise_issue: INTEGER (0 or 1)
+  - closed: INTEGER (0 or 1)
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+TABLE tasks (Kanban board items - for individual audit execution):
+  - id: INTEGER PRIMARY KEY
+  - title: TEXT
+  - description: TEXT
+  - priority: TEXT (low, medium, high)
+  - assignee: TEXT
+  - column_id: TEXT (planning, fieldwork, testing, review, complete)
+  - risk_id: INTEGER (FK to risks.id)
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+TABLE audits (Annual Audit Plan - all audits planned for the year):
+  - id: INTEGER PRIMARY KEY
+  - title: TEXT (audit name, e.g., 'IT Security Audit', 'Financial Controls Audit')
+  - description: TEXT (scope and objectives)
+  - audit_area: TEXT (IT, Finance, Operations, HR, Compliance, Other)
+  - owner: TEXT (lead auditor)
+  - planned_start: DATE (planned start date)
+  - planned_end: DATE (planned end date)
+  - actual_start: DATE (actual start date)
+  - actual_end: DATE (actual completion date)
+  - quarter: TEXT (Q1, Q2, Q3, Q4 - fiscal quarter)
+  - status: TEXT (planning, in_progress, fieldwork, review, complete)
+  - priority: TEXT (low, medium, high)
+  - estimated_hours: REAL (estimated effort)
+  - actual_hours: REAL (actual effort)
+  - risk_rating: TEXT (low, medium, high - audit risk level)
+  - notes: TEXT
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+USEFUL QUERIES FOR ANNUAL AUDIT PLAN:
+  - Audits by quarter: SELECT * FROM audits WHERE quarter = 'Q1'
+  - Audits in progress: SELECT * FROM audits WHERE status IN ('in_progress', 'fieldwork')
+  - Overdue audits: SELECT * FROM audits WHERE planned_end < DATE('now') AND status != 'complete'
+  - Workload by owner: SELECT owner, COUNT(*) as count, SUM(estimated_hours) as hours FROM audits GROUP BY owner
+  - Progress summary: SELECT status, COUNT(*) FROM audits GROUP BY status
+
+TABLE flowcharts (Process diagrams):
+  - id: INTEGER PRIMARY KEY
+  - name: TEXT (unique identifier)
+  - data: JSON (Drawflow format with nodes)
+  - risk_id: INTEGER (FK to risks.id)
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+TABLE test_documents (Working papers - DE/OE testing documentation):
+  - id: INTEGER PRIMARY KEY
+  - risk_id: INTEGER (FK to risks.id)
+  - doc_type: TEXT ('de_testing' or 'oe_testing')
+  - content: TEXT (HTML/rich text content)
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+TABLE issues (Issue Log - linked to RACM risks):
+  - id: INTEGER PRIMARY KEY
+  - issue_id: TEXT (e.g., 'ISS-001', 'ISS-002')
+  - risk_id: TEXT (links to risks.risk_id)
+  - title: TEXT
+  - description: TEXT
+  - severity: TEXT (Low, Medium, High, Critical)
+  - status: TEXT (Open, In Progress, Resolved, Closed)
+  - assigned_to: TEXT
+  - due_date: DATE
+  - documentation: TEXT (rich text/HTML - evidence and detailed findings)
+  - created_at: TIMESTAMP
+  - updated_at: TIMESTAMP
+
+TABLE issue_attachments (Evidence files for issues):
+  - id: INTEGER PRIMARY KEY
+  - issue_id: TEXT
+  - filename: TEXT
+  - original_filename: TEXT
+  - file_size: INTEGER
+  - mime_type: TEXT
+  - description: TEXT
+  - extracted_text: TEXT
+  - uploaded_at: TIMESTAMP
+
+TABLE risk_attachments (Evidence files for risks):
+  - id: INTEGER PRIMARY KEY
+  - risk_id: TEXT
+  - category: TEXT (planning, de, oe)
+  - filename: TEXT
+  - original_filename: TEXT
+  - file_size: INTEGER
+  - mime_type: TEXT
+  - description: TEXT
+  - extracted_text: TEXT
+  - uploaded_at: TIMESTAMP
+
+RELATIONSHIPS:
+  - tasks.risk_id -> risks.id (many tasks can link to one risk)
+  - flowcharts.risk_id -> risks.id (flowchart can document a risk's control)
+  - test_documents.risk_id -> risks.id (each risk can have DE and OE testing docs)
+  - issues.risk_id -> risks.risk_id (issues are raised against RACM risks)
+  - issue_attachments.issue_id -> issues.issue_id
+  - risk_attachments.risk_id -> risks.risk_id
+"""
+
+
+def _json_loads(data):
+    """Decode a stored JSON document, using orjson when available."""
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _json_dumps(obj) -> str:
+    """Encode a JSON document as compact text for a TEXT column.
+
+    Uses orjson when available. Both paths emit no whitespace between
+    tokens, which keeps stored Drawflow documents noticeably smaller.
+    """
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+
+_HTML_TAG_RE: Final = re.compile(r'<[^>]+>')
+_WHITESPACE_RE: Final = re.compile(r'\s+')
+
+# execute_query() guards: SQL comments (which could hide keywords) and every
+# keyword that could modify data or exfiltrate it
+_SQL_BLOCK_COMMENT_RE: Final = re.compile(r'/\*.*?\*/', re.DOTALL)
+_SQL_LINE_COMMENT_RE: Final = re.compile(r'--.*$', re.MULTILINE)
+_SQL_FORBIDDEN_KEYWORDS: Final = (
+    'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 'TRUNCATE', 'EXEC',
+    'EXECUTE', 'GRANT', 'REVOKE', 'ATTACH', 'DETACH', 'PRAGMA', 'VACUUM', 'REINDEX',
+    'UNION',      # Prevent data exfiltration via UNION queries
+    'INTO',       # Prevent SELECT INTO
+    'LOAD',       # Prevent LOAD DATA
+    'OUTFILE',    # Prevent file writes
+)
+_SQL_FORBIDDEN_RE: Final = re.compile(r'\b(?:' + '|'.join(_SQL_FORBIDDEN_KEYWORDS) + r')\b')
+
+if ahocorasick:
+    _SQL_FORBIDDEN_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in _SQL_FORBIDDEN_KEYWORDS:
+        _SQL_FORBIDDEN_AUTOMATON.add_word(_keyword, _keyword)
+    _SQL_FORBIDDEN_AUTOMATON.make_automaton()
+else:
+    _SQL_FORBIDDEN_AUTOMATON = None
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+def _find_forbidden_keyword(sql_upper: str) -> Optional[str]:
+    """Return the first forbidden keyword appearing as a whole word, if any.
+
+    Mirrors ``_SQL_FORBIDDEN_RE``: a match inside an identifier such as
+    ``updated_count`` does not count.
+    """
+    if _SQL_FORBIDDEN_AUTOMATON is None:
+        match = _SQL_FORBIDDEN_RE.search(sql_upper)
+        return match.group(0) if match else None
+
+    last = len(sql_upper) - 1
+    for end, keyword in _SQL_FORBIDDEN_AUTOMATON.iter(sql_upper):
+        start = end - len(keyword) + 1
+        if ((start == 0 or not _is_word_char(sql_upper[start - 1]))
+                and (end == last or not _is_word_char(sql_upper[end + 1]))):
+            return keyword
+    return None
+
+
+# A risk's newest linked flowchart name and task title, as correlated
+# subqueries over `risks r`; each is a seek on idx_flowcharts_risk / idx_tasks_risk
+_SQL_RISK_FLOWCHART_NAME: Final[str] = \
+    "(SELECT name FROM flowcharts WHERE risk_id = r.id ORDER BY id DESC LIMIT 1)"
+_SQL_RISK_TASK_TITLE: Final[str] = \
+    "(SELECT title FROM tasks WHERE risk_id = r.id ORDER BY id DESC LIMIT 1)"
+
+# Characters SQL trim() must strip to mirror str.strip() for stored text
+_SQL_BLANK_CHARS: Final[str] = "char(32, 9, 10, 11, 12, 13)"
+
+
+def html_to_text(html: str) -> str:
+    """Strip HTML tags and collapse whitespace for cleaner AI reading."""
+    return _WHITESPACE_RE.sub(' ', _HTML_TAG_RE.sub('', html)).strip()
+
+
+def _word_count(html: Optional[str]) -> int:
+    """Approximate the word count of an HTML document, ignoring its tags.
+
+    Registered on every connection as the SQL function word_count().
+    """
+    return len(_HTML_TAG_RE.sub('', html).split()) if html else 0
+
+
+def _load_sqlite_vec(conn: sqlite3.Connection) -> bool:
+    """Load sqlite-vec into `conn`. Returns False if it is unavailable."""
+    if sqlite_vec is None:
+        return False
+    try:
+        conn.enable_load_extension(True)
+        try:
+            sqlite_vec.load(conn)
+        finally:
+            # The connection is long-lived and also serves execute_query(), so
+            # load_extension() must never stay reachable from SQL
+            conn.enable_load_extension(False)
+        return True
+    except Exception as e:
+        # AttributeError: Python built without extension loading support
+        logger.debug(f"Could not load sqlite-vec: {e}")
+        return False
+
+
+def _pack_embedding(embedding) -> bytes:
+    """Pack an embedding as the float32 blob sqlite-vec expects.
+
+    NumPy arrays, as the sentence-transformer returns them, are copied out
+    in C with tobytes(); plain lists of floats go through struct.
+    """
+    if hasattr(embedding, 'astype'):
+        return embedding.astype('float32', copy=False).tobytes()
+    return struct.pack(f'{len(embedding)}f', *embedding)
+
+
+def _masked_update_sql(table: str, columns: Tuple[str, ...], extra_set: str, where: str) -> str:
+    """Build one UPDATE that can write any subset of `columns`.
+
+    Each column takes a (flag, value) parameter pair and keeps its current
+    value when the flag is 0, so every partial update of a table shares a
+    single prepared statement. A flag rather than COALESCE lets callers set
+    a column to NULL.
+    """
+    sets = ', '.join(f"{c} = CASE WHEN ? THEN ? ELSE {c} END" for c in columns)
+    return f"UPDATE {table} SET {sets}, {extra_set} WHERE {where}"
+
+
+def _masked_update_params(columns: Tuple[str, ...], updates: Dict[str, Any]) -> List:
+    """Flatten `updates` into the (flag, value) pairs _masked_update_sql() expects."""
+    params = []
+    for column in columns:
+        if column in updates:
+            params += (1, updates[column])
+        else:
+            params += (0, None)
+    return params
+
+
+# Columns each update_*() method accepts, in statement parameter order
+_RISK_UPDATE_COLUMNS: Final[Tuple[str, ...]] = (
+    # Content fields
+    'risk', 'control_id', 'control_owner', 'design_effectiveness_testing',
+    'design_effectiveness_conclusion', 'operational_effectiveness_test',
+    'operational_effectiveness_conclusion', 'status', 'raise_issue',
+    # Legacy workflow fields (kept for import/export compatibility). The 0/1
+    # flags cost nothing to store: SQLite records 0 and 1 as header-only
+    # serial types, so packing them into one bitmask column would not
+    # narrow the row.
+    'ready_for_review', 'reviewer', 'closed',
+    # New workflow fields
+    'record_status', 'assigned_reviewer_id', 'current_owner_role',
+    'admin_lock_reason', 'admin_locked_by', 'admin_locked_at',
+    'signed_off_by', 'signed_off_at', 'updated_by', 'audit_id',
+)
+_TASK_UPDATE_COLUMNS: Final[Tuple[str, ...]] = (
+    'title', 'description', 'priority', 'assignee', 'column_id',
+)
+_AUDIT_UPDATE_COLUMNS: Final[Tuple[str, ...]] = (
+    'title', 'description', 'audit_area', 'owner', 'planned_start',
+    'planned_end', 'actual_start', 'actual_end', 'quarter', 'status',
+    'priority', 'estimated_hours', 'actual_hours', 'risk_rating', 'notes',
+)
+_ISSUE_UPDATE_COLUMNS: Final[Tuple[str, ...]] = (
+    'title', 'description', 'severity', 'status', 'assigned_to', 'due_date',
+    'risk_id', 'documentation',
+)
+_LIBRARY_DOCUMENT_UPDATE_COLUMNS: Final[Tuple[str, ...]] = (
+    'name', 'doc_type', 'source', 'description', 'total_chunks',
+)
+# Audit fields held by spreadsheet columns 1-11 (column 0 is the id), and the
+# fixed statements save_audits_from_spreadsheet() batches them through
+_AUDIT_SHEET_COLUMNS: Final[Tuple[str, ...]] = (
+    'title', 'audit_area', 'owner', 'planned_start', 'planned_end', 'quarter',
+    'status', 'priority', 'risk_rating', 'estimated_hours', 'description',
+)
+_SQL_INSERT_AUDIT_ROW: Final[str] = (
+    f"INSERT INTO audits ({', '.join(_AUDIT_SHEET_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_AUDIT_SHEET_COLUMNS))})"
+)
+_SQL_UPDATE_AUDIT_ROW: Final[str] = (
+    f"UPDATE audits SET {', '.join(f'{c} = ?' for c in _AUDIT_SHEET_COLUMNS)}, "
+    "updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+)
+
+
+def _parse_audit_row(row: List) -> Optional[Tuple[Optional[int], tuple]]:
+    """Parse one audit spreadsheet row into (audit_id, values).
+
+    `values` follows _AUDIT_SHEET_COLUMNS. audit_id is None for new rows.
+    Returns None for rows without a title, which are skipped.
+    """
+    if not row or len(row) < 2:
+        return None
+    cells = (list(row) + [None] * 12)[:12]
+    title = str(cells[1]).strip() if cells[1] else ''
+    if not title:
+        return None
+    audit_id = int(cells[0]) if cells[0] and str(cells[0]).isdigit() else None
+    return audit_id, (
+        title,
+        *(str(v).strip() if v else None for v in cells[2:7]),
+        str(cells[7]).strip() if cells[7] else 'planning',
+        str(cells[8]).strip() if cells[8] else 'medium',
+        str(cells[9]).strip() if cells[9] else None,
+        float(cells[10]) if cells[10] else None,
+        str(cells[11]).strip() if cells[11] else None,
+    )
+
+
+_SQL_UPDATE_RISK: Final[str] = _masked_update_sql(
+    'risks', _RISK_UPDATE_COLUMNS, 'updated_at = CURRENT_TIMESTAMP', 'risk_id = ?')
+_SQL_UPDATE_TASK: Final[str] = _masked_update_sql(
+    'tasks', _TASK_UPDATE_COLUMNS, 'updated_at = CURRENT_TIMESTAMP', 'id = ?')
+_SQL_UPDATE_AUDIT: Final[str] = _masked_update_sql(
+    'audits', _AUDIT_UPDATE_COLUMNS, 'updated_at = CURRENT_TIMESTAMP', 'id = ?')
+_SQL_UPDATE_ISSUE: Final[str] = _masked_update_sql(
+    'issues', _ISSUE_UPDATE_COLUMNS, 'updated_at = CURRENT_TIMESTAMP', 'issue_id = ?')
+_SQL_UPDATE_LIBRARY_DOCUMENT: Final[str] = _masked_update_sql(
+    'library_documents', _LIBRARY_DOCUMENT_UPDATE_COLUMNS, 'updated_at = CURRENT_TIMESTAMP', 'id = ?')
+
+# Long-lived connections refresh planner statistics with PRAGMA optimize at
+# most this often, as well as just before they are closed
+OPTIMIZE_INTERVAL_SECONDS = 3600
+
+# Prepared statements kept per connection; the module has well over the
+# default 128 distinct statements.
+SQLITE_CACHED_STATEMENTS = 512
+
+# Applied to every new connection. The database runs in WAL mode (set once in
+# _init_db), where synchronous=NORMAL only fsyncs at checkpoints rather than on
+# every commit: a power loss may drop the last few commits but cannot corrupt
+# the file. wal_autocheckpoint keeps SQLite's default of 1000 pages. Each
+# connection gets a ~64 MB page cache and waits up to 5 s for a busy writer
+# instead of failing with "database is locked".
+_CONNECTION_PRAGMAS: Final[str] = """
+    PRAGMA foreign_keys = ON;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA cache_size = -64000;
+    PRAGMA busy_timeout = 5000;
+"""
+
 # Default database path - can be overridden
 DEFAULT_DB_PATH = Path(__file__).parent / "racm_data.db"
 
+# Read-mostly query results are served from memory for this long
+QUERY_CACHE_TTL_SECONDS = 5
+QUERY_CACHE_MAXSIZE = 1024
+
+# risk_id -> risks.id translations remembered per database instance
+RISK_PK_CACHE_MAXSIZE = 512
+
+# Spreadsheet saves larger than this go through bulk_upsert_audits()
+AUDIT_BULK_UPSERT_MIN_ROWS = 50
+
+# Threads get_full_context() spreads its independent reads over. Each keeps
+# its own cached connection, and WAL lets those connections read side by side.
+CONTEXT_READ_WORKERS = 4
+
+_MISS = object()
+
+_context_executor: Optional[ThreadPoolExecutor] = None
+_context_executor_lock = threading.Lock()
+
+
+def _get_context_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool for get_full_context(), starting it on first use."""
+    global _context_executor
+    with _context_executor_lock:
+        if _context_executor is None:
+            _context_executor = ThreadPoolExecutor(
+                max_workers=CONTEXT_READ_WORKERS, thread_name_prefix='racm-context')
+        return _context_executor
+
+
+class _TTLCache:
+    """Small thread-safe LRU cache whose entries expire after a TTL.
+
+    Entries are tagged with the database write generation they were read
+    at; a lookup under a newer generation is a miss, so any write made
+    through this RACMDatabase invalidates everything immediately. The TTL
+    bounds staleness from writers outside this instance.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_MAXSIZE, ttl: float = QUERY_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation: int):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISS
+            expires_at, entry_generation, value = entry
+            if entry_generation != generation or expires_at < time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, generation: int, value) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, generation, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _cached_query(copy_result: Callable[[Any], Any]):
+    """Cache a read-only RACMDatabase method in the instance's query cache.
+
+    Results are keyed on the method name and arguments. Callers always get
+    copy_result(cached) so they can mutate what they receive. Inside an open
+    _connection() block the cache is bypassed: the write generation only
+    moves on commit, so a cached value could predate the block's own writes.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if getattr(self._thread_local, 'depth', 0):
+                return method(self, *args, **kwargs)
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            generation = self._write_generation
+            value = self._query_cache.get(key, generation)
+            if value is _MISS:
+                value = method(self, *args, **kwargs)
+                self._query_cache.set(key, generation, value)
+            return copy_result(value)
+        return wrapper
+    return decorator
+
+
+
+def _copy_context(context: Dict) -> Dict:
+    """Copy get_full_context() output so callers can edit rows and summaries."""
+    copied = {}
+    for key, value in context.items():
+        if isinstance(value, list):
+            value = [dict(item) for item in value]
+        elif isinstance(value, dict):
+            value = {k: dict(v) if isinstance(v, dict) else v for k, v in value.items()}
+        copied[key] = value
+    return copied
+
+class _ThreadConnectionOwner:
+    """Placeholder held in a thread's locals; collected when the thread ends."""
+    __slots__ = ('__weakref__',)
+
+
+def _release_thread_connection(conn: sqlite3.Connection, open_conns: set) -> None:
+    """Close a per-thread connection whose thread has exited."""
+    open_conns.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        logger.debug(f"Closing thread connection failed: {e}")
+
 
 class RACMDatabase:
     """SQLite database for RACM audit data with AI-queryable structure."""
 
+    # Database files already migrated by this process, keyed by real path
+    _initialised: set = set()
+    _initialised_lock = threading.Lock()
+
     def __init__(self, db_path: Optional[str] = None):
         self.db_path = db_path or DEFAULT_DB_PATH
-        self._init_db()
-
-    def _get_conn(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        self._record_union_layout_cache = None
+        self._request_local = threading.local()
+        self._write_generation = 0
+        self._query_cache = _TTLCache()
+        self._thread_local = threading.local()
+        self._open_conns: set = set()
+        self._open_conns_lock = threading.Lock()
+        self._conn_epoch = 0
+        self._risk_pk_cache: OrderedDict = OrderedDict()
+        self._risk_pk_lock = threading.Lock()
+        self._last_optimize = time.monotonic()
+        self._init_db_once()
+
+    def _get_conn(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, cached_statements=SQLITE_CACHED_STATEMENTS,
+                               check_same_thread=check_same_thread)
         conn.row_factory = sqlite3.Row  # Return dicts instead of tuples
-        conn.execute("PRAGMA foreign_keys = ON")
+        conn.executescript(_CONNECTION_PRAGMAS)
+        conn.create_function('word_count', 1, _word_count, deterministic=True)
+        return conn
+
+    @property
+    def _vec_ready(self) -> bool:
+        """Whether sqlite-vec is loaded into this thread's cached connection."""
+        return getattr(self._thread_local, 'vec_ready', False)
+
+    def _conn_for_thread(self) -> sqlite3.Connection:
+        """Return this thread's long-lived connection, opening it on first use.
+
+        Keeping one connection per thread preserves its page cache and
+        statement cache between calls and applies the PRAGMAs only once.
+        The connection is only used by its own thread and is closed once
+        that thread exits, so threads spawned per request do not leave
+        connections behind; check_same_thread is off so close_all() and the
+        exit hook can close it from another thread.
+        """
+        local = self._thread_local
+        conn = getattr(local, 'conn', None)
+        if conn is not None and local.epoch == self._conn_epoch:
+            return conn
+        conn = self._get_conn(check_same_thread=False)
+        # Loaded once per cached connection rather than per library call; the
+        # one-off connections from _get_conn() never run vector queries
+        vec_ready = _load_sqlite_vec(conn)
+        owner = _ThreadConnectionOwner()
+        with self._open_conns_lock:
+            open_conns = self._open_conns
+            open_conns.add(conn)
+            epoch = self._conn_epoch
+        # The thread's locals, and with them the owner, are dropped when the
+        # thread ends. Replacing an older owner here may run its finalizer,
+        # which must not happen under _open_conns_lock.
+        weakref.finalize(owner, _release_thread_connection, conn, open_conns)
+        local.conn, local.epoch, local.depth, local.owner = conn, epoch, 0, owner
+        local.vec_ready = vec_ready
         return conn
 
+    def close_all(self):
+        """Close every cached per-thread connection.
+
+        Meant for shutdown and tests; threads that use the database again
+        afterwards transparently open a fresh connection.
+        """
+        with self._open_conns_lock:
+            conns, self._open_conns = self._open_conns, set()
+            self._conn_epoch += 1
+        for conn in conns:
+            self._optimize(conn)
+            conn.close()
+
+    def _optimize(self, conn: sqlite3.Connection):
+        """Let SQLite refresh any planner statistics that have gone stale.
+
+        PRAGMA optimize only runs ANALYZE on tables whose queries would
+        benefit, so it is cheap when nothing changed. Failures (e.g. a
+        locked database) are logged and left for the next attempt.
+        """
+        self._last_optimize = time.monotonic()
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            logger.debug(f"PRAGMA optimize skipped: {e}")
+
     @contextmanager
     def _connection(self):
-        """Context manager for database connections."""
-        conn = self._get_conn()
+        """Context manager for database access on this thread's connection.
+
+        The outermost block owns the transaction: it commits on success and
+        rolls back on any exception, including a failed commit. Nested
+        blocks join the enclosing transaction.
+        """
+        conn = self._conn_for_thread()
+        local = self._thread_local
+        if local.depth:
+            local.depth += 1
+            try:
+                yield conn
+            finally:
+                local.depth -= 1
+            return
+        changes = conn.total_changes
+        local.depth = 1
         try:
-            yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
+            with conn:
+                yield conn
         finally:
-            conn.close()
+            local.depth = 0
+            if conn.total_changes != changes:
+                self._write_generation += 1
+        if time.monotonic() - self._last_optimize > OPTIMIZE_INTERVAL_SECONDS:
+            self._optimize(conn)
+
+    @staticmethod
+    def _fetch_dicts(conn: sqlite3.Connection, sql: str, params=()) -> List[Dict]:
+        """Run a query and return every row as a plain dict.
+
+        Reads plain tuples and zips them with the column names once, rather
+        than building a sqlite3.Row per row and then copying it into a dict.
+        """
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _fetch_tuples(conn: sqlite3.Connection, sql: str, params=()) -> List[tuple]:
+        """Run a query and return plain tuples, for positional unpacking."""
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        return cursor.execute(sql, params).fetchall()
+
+    @classmethod
+    def _grouped_counts(cls, conn: sqlite3.Connection, table: str,
+                        columns: Tuple[str, ...]) -> Tuple[int, Dict[str, List[tuple]]]:
+        """Count rows of `table` per value of each column, in one round-trip.
+
+        Runs one GROUP BY per column, joined with UNION ALL and tagged with the
+        column name. Returns (total, {column: [(value, count), ...]}); the total
+        is the sum of the first column's groups, so no separate COUNT(*) runs.
+        """
+        sql = " UNION ALL ".join(
+            f"SELECT '{c}' AS k, {c} AS g, COUNT(*) FROM {table} GROUP BY {c}" for c in columns
+        )
+        grouped = {c: [] for c in columns}
+        for column, value, count in cls._fetch_tuples(conn, sql):
+            grouped[column].append((value, count))
+        return sum(count for _, count in grouped[columns[0]]), grouped
+
+    def _record_union_layout(self, conn: sqlite3.Connection) -> tuple:
+        """Shared column layout for UNION ALL queries over risks and issues.
+
+        Returns (columns, risk_columns, risk_positions, issue_columns, issue_positions):
+        the superset column list selected by both branches and, per table, its own
+        columns and where they sit in that list. Computed once per instance - the
+        schema is fixed once migrations have run.
+        """
+        if self._record_union_layout_cache is None:
+            risk_cols = [d[0] for d in conn.execute("SELECT * FROM risks LIMIT 0").description]
+            issue_cols = [d[0] for d in conn.execute("SELECT * FROM issues LIMIT 0").description]
+            columns = risk_cols + [c for c in issue_cols if c not in risk_cols]
+            self._record_union_layout_cache = (
+                columns,
+                risk_cols, [columns.index(c) for c in risk_cols],
+                issue_cols, [columns.index(c) for c in issue_cols],
+            )
+        return self._record_union_layout_cache
+
+    def _iter_risks_and_issues(self, conn: sqlite3.Connection, extra_columns: str,
+                               joins: str, where: str, order_by: str, params: tuple,
+                               include_type: bool = False, limit: Optional[int] = None,
+                               offset: int = 0) -> Iterator[Tuple[str, Dict]]:
+        """Stream matching risks and issues from a single UNION ALL query.
+
+        `extra_columns`, `joins` and `where` refer to the record table as `t`;
+        `order_by` must use result column names. `params` are bound once per
+        branch. Yields ('risk' | 'issue', record) pairs where each record has
+        the same keys a `SELECT t.*, <extra_columns>` on its own table would
+        have produced, plus a trailing 'record_type' when `include_type` is
+        set. `limit`/`offset` paginate the combined result in SQL.
+        """
+        columns, risk_cols, risk_pos, issue_cols, issue_pos = self._record_union_layout(conn)
+
+        def branch(record_type, table, own_columns):
+            present = set(own_columns)
+            select = ', '.join(f"t.{c} AS {c}" if c in present else f"NULL AS {c}" for c in columns)
+            return (f"SELECT '{record_type}' AS record_type, {select}, {extra_columns} "
+                    f"FROM {table} t {joins} WHERE {where}")
+
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(
+            f"{branch('risk', 'risks', risk_cols)} UNION ALL "
+            f"{branch('issue', 'issues', issue_cols)} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            (*params, *params, -1 if limit is None else limit, offset)
+        )
+        extra_start = 1 + len(columns)
+        extra_names = [d[0] for d in cursor.description[extra_start:]]
+        type_key = ['record_type'] if include_type else []
+        risk_keys = risk_cols + extra_names + type_key
+        issue_keys = issue_cols + extra_names + type_key
+
+        for row in cursor:
+            record_type = row[0]
+            extras = list(row[extra_start:]) + ([record_type] if include_type else [])
+            if record_type == 'risk':
+                values = [row[1 + i] for i in risk_pos] + extras
+                yield record_type, dict(zip(risk_keys, values))
+            else:
+                values = [row[1 + i] for i in issue_pos] + extras
+                yield record_type, dict(zip(issue_keys, values))
+
+    def _query_risks_and_issues(self, conn: sqlite3.Connection, extra_columns: str,
+                                joins: str, where: str, order_by: str, params: tuple,
+                                include_type: bool = False) -> Dict[str, List[Dict]]:
+        """Fetch matching risks and issues in one round-trip, split by type.
+
+        Takes the same arguments as _iter_risks_and_issues() and returns
+        {'risks': [...], 'issues': [...]}, each in `order_by` order.
+        """
+        result = {'risks': [], 'issues': []}
+        for record_type, record in self._iter_risks_and_issues(
+                conn, extra_columns, joins, where, order_by, params, include_type):
+            result['risks' if record_type == 'risk' else 'issues'].append(record)
+        return result
+
+    # ==================== REQUEST-SCOPED CACHE ====================
+
+    def begin_request(self):
+        """Start memoizing audit membership checks for the current request.
+
+        Permission helpers ask the same (user, audit) questions many times
+        while rendering one response. Between begin_request() and
+        end_request() those answers are cached per thread; outside that
+        window every check goes to the database.
+        """
+        self._request_local.cache = {}
+
+    def end_request(self):
+        """Discard membership checks memoized since begin_request()."""
+        self._request_local.cache = None
+
+    def _request_memoize(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it on first use in this request."""
+        cache = getattr(self._request_local, 'cache', None)
+        if cache is None:
+            return compute()
+        if key not in cache:
+            cache[key] = compute()
+        return cache[key]
+
+    def _invalidate_request_cache(self):
+        """Forget memoized membership checks after team/viewer changes."""
+        cache = getattr(self._request_local, 'cache', None)
+        if cache:
+            cache.clear()
+
+    def _init_db_once(self):
+        """Run _init_db() unless this process already has for the same file.
+
+        Instances created per request then skip the migration checks. A file
+        that has since been deleted is initialised again; in-memory databases
+        are always new, so they are never skipped.
+        """
+        if str(self.db_path) == ':memory:':
+            self._init_db()
+            return
+        key = os.path.realpath(self.db_path)
+        with RACMDatabase._initialised_lock:
+            if key in RACMDatabase._initialised and os.path.exists(key):
+                return
+            self._init_db()
+            RACMDatabase._initialised.add(key)
 
     def _init_db(self):
         """Initialize database schema using migrations."""
         from migrations.runner import MigrationRunner
 
+        # journal_mode is stored in the database file, so setting it once is
+        # enough; in-memory databases have no file and cannot use WAL.
+        # page_size only takes effect on a new, empty file; 8 KB pages keep
+        # more of the wide risk and document rows on each page read.
+        if str(self.db_path) != ':memory:':
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute("PRAGMA page_size = 8192")
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+
         # Run all pending migrations
         runner = MigrationRunner(self.db_path)
         runner.run_migrations()
 
+        # Fresh planner statistics for the schema as migrated. analysis_limit
+        # samples each index instead of reading it whole, so this stays quick
+        # on large files.
+        if str(self.db_path) != ':memory:':
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.executescript("PRAGMA analysis_limit = 400; ANALYZE;")
+            finally:
+                conn.close()
+
         # Seed dev accounts if in DEV_MODE
         if DEV_MODE:
             from migrations.seeds.dev_accounts import seed_dev_accounts
-            conn = self._get_conn()
-            try:
+            with self._connection() as conn:
                 seed_dev_accounts(conn)
-            finally:
-                conn.close()
 
     def _init_db_legacy(self):
         """Legacy initialization - kept for reference only. Use migrations instead."""
@@ -763,21 +1656,50 @@ class RACMDatabase:
     def get_all_risks(self) -> List[Dict]:
         """Get all risks/controls."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT * FROM risks ORDER BY risk_id").fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM risks ORDER BY risk_id")
 
     def get_risk(self, risk_id: str) -> Optional[Dict]:
         """Get a single risk by risk_id (e.g., 'R001')."""
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM risks WHERE risk_id = ?", (risk_id,)).fetchone()
+            row = conn.execute(_SQL_GET_RISK, (risk_id,)).fetchone()
             return dict(row) if row else None
 
     def get_risk_by_id(self, id: int) -> Optional[Dict]:
         """Get a single risk by database ID."""
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM risks WHERE id = ?", (id,)).fetchone()
+            row = conn.execute(_SQL_GET_RISK_BY_ID, (id,)).fetchone()
             return dict(row) if row else None
 
+    def _risk_pk(self, conn: sqlite3.Connection, risk_id: str) -> Optional[int]:
+        """Translate a risk_id (e.g. 'R001') into its risks.id, or None.
+
+        Hits are kept in a small LRU cache. risks.id is AUTOINCREMENT and
+        never reused, so a stale entry can only name a deleted risk; inserts
+        that reference one fail their foreign key, and callers then drop the
+        entry with _forget_risk_pk() and look the risk up again.
+        """
+        with self._risk_pk_lock:
+            pk = self._risk_pk_cache.get(risk_id)
+            if pk is not None:
+                self._risk_pk_cache.move_to_end(risk_id)
+                return pk
+        row = conn.execute(_SQL_RISK_PK, (risk_id,)).fetchone()
+        if row is None:
+            return None
+        with self._risk_pk_lock:
+            self._risk_pk_cache[risk_id] = row[0]
+            if len(self._risk_pk_cache) > RISK_PK_CACHE_MAXSIZE:
+                self._risk_pk_cache.popitem(last=False)
+        return row[0]
+
+    def _forget_risk_pk(self, risk_id: Optional[str] = None):
+        """Drop one cached risk_id translation, or all of them."""
+        with self._risk_pk_lock:
+            if risk_id is None:
+                self._risk_pk_cache.clear()
+            else:
+                self._risk_pk_cache.pop(risk_id, None)
+
     def create_risk(self, risk_id: str, risk: str = "", control_id: str = "",
                     control_owner: str = "", design_effectiveness_testing: str = "",
                     design_effectiveness_conclusion: str = "", operational_effectiveness_test: str = "",
@@ -797,14 +1719,9 @@ class RACMDatabase:
         elif ready_for_review:
             record_status = 'in_review'
 
+        self._forget_risk_pk(risk_id)
         with self._connection() as conn:
-            cursor = conn.execute("""
-                INSERT INTO risks (risk_id, risk, control_id, control_owner, design_effectiveness_testing,
-                                  design_effectiveness_conclusion, operational_effectiveness_test,
-                                  operational_effectiveness_conclusion, status, ready_for_review,
-                                  reviewer, raise_issue, closed, audit_id, record_status, created_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (risk_id, risk, control_id, control_owner, design_effectiveness_testing,
+            cursor = conn.execute(_SQL_INSERT_RISK, (risk_id, risk, control_id, control_owner, design_effectiveness_testing,
                   design_effectiveness_conclusion, operational_effectiveness_test,
                   operational_effectiveness_conclusion, status, ready_for_review,
                   reviewer, raise_issue, closed, audit_id, record_status, created_by))
@@ -816,19 +1733,7 @@ class RACMDatabase:
         Supports both legacy fields (ready_for_review, reviewer, closed) and
         new workflow fields (record_status, assigned_reviewer_id, etc).
         """
-        # Content fields
-        content_fields = {'risk', 'control_id', 'control_owner', 'design_effectiveness_testing',
-                         'design_effectiveness_conclusion', 'operational_effectiveness_test',
-                         'operational_effectiveness_conclusion', 'status', 'raise_issue'}
-        # Legacy workflow fields (kept for import/export compatibility)
-        legacy_fields = {'ready_for_review', 'reviewer', 'closed'}
-        # New workflow fields
-        workflow_fields = {'record_status', 'assigned_reviewer_id', 'current_owner_role',
-                          'admin_lock_reason', 'admin_locked_by', 'admin_locked_at',
-                          'signed_off_by', 'signed_off_at', 'updated_by', 'audit_id'}
-
-        allowed = content_fields | legacy_fields | workflow_fields
-        updates = {k: v for k, v in kwargs.items() if k in allowed}
+        updates = {k: v for k, v in kwargs.items() if k in _RISK_UPDATE_COLUMNS}
         if not updates:
             return False
 
@@ -838,16 +1743,14 @@ class RACMDatabase:
         elif 'ready_for_review' in updates and updates['ready_for_review'] and 'record_status' not in updates:
             updates['record_status'] = 'in_review'
 
-        updates['updated_at'] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
-
+        params = _masked_update_params(_RISK_UPDATE_COLUMNS, updates)
         with self._connection() as conn:
-            conn.execute(f"UPDATE risks SET {set_clause} WHERE risk_id = ?",
-                        (*updates.values(), risk_id))
+            conn.execute(_SQL_UPDATE_RISK, (*params, risk_id))
             return True
 
     def delete_risk(self, risk_id: str) -> bool:
         """Delete a risk by risk_id."""
+        self._forget_risk_pk(risk_id)
         with self._connection() as conn:
             cursor = conn.execute("DELETE FROM risks WHERE risk_id = ?", (risk_id,))
             return cursor.rowcount > 0
@@ -855,19 +1758,15 @@ class RACMDatabase:
     def get_risks_by_status(self, status: str) -> List[Dict]:
         """Get all risks with a specific status."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT * FROM risks WHERE status = ?", (status,)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM risks WHERE status = ?", (status,))
 
     def get_risk_summary(self) -> Dict:
         """Get summary statistics for risks."""
         with self._connection() as conn:
-            total = conn.execute("SELECT COUNT(*) FROM risks").fetchone()[0]
-            by_status = conn.execute("""
-                SELECT status, COUNT(*) as count FROM risks GROUP BY status
-            """).fetchall()
+            total, grouped = self._grouped_counts(conn, 'risks', ('status',))
             return {
                 'total': total,
-                'by_status': {row['status']: row['count'] for row in by_status}
+                'by_status': dict(grouped['status'])
             }
 
     # ==================== TASKS (KANBAN) ====================
@@ -875,68 +1774,62 @@ class RACMDatabase:
     def get_all_tasks(self) -> List[Dict]:
         """Get all tasks."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT t.*, r.risk_id as linked_risk_id
                 FROM tasks t
                 LEFT JOIN risks r ON t.risk_id = r.id
                 ORDER BY t.created_at
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def get_tasks_by_column(self, column_id: str) -> List[Dict]:
         """Get tasks in a specific column."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT t.*, r.risk_id as linked_risk_id
                 FROM tasks t
                 LEFT JOIN risks r ON t.risk_id = r.id
                 WHERE t.column_id = ?
                 ORDER BY t.created_at
-            """, (column_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (column_id,))
 
     def get_task(self, task_id: int) -> Optional[Dict]:
         """Get a single task by ID."""
         with self._connection() as conn:
-            row = conn.execute("""
-                SELECT t.*, r.risk_id as linked_risk_id
-                FROM tasks t
-                LEFT JOIN risks r ON t.risk_id = r.id
-                WHERE t.id = ?
-            """, (task_id,)).fetchone()
+            row = conn.execute(_SQL_GET_TASK, (task_id,)).fetchone()
             return dict(row) if row else None
 
     def create_task(self, title: str, description: str = "", priority: str = "medium",
                     assignee: str = "", column_id: str = "planning",
                     risk_id: Optional[str] = None) -> int:
         """Create a new task. risk_id can be the string ID (e.g., 'R001')."""
+        sql = """
+            INSERT INTO tasks (title, description, priority, assignee, column_id, risk_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """
         with self._connection() as conn:
             # Look up risk foreign key if provided
-            fk_risk_id = None
-            if risk_id:
-                row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (risk_id,)).fetchone()
-                if row:
-                    fk_risk_id = row['id']
-
-            cursor = conn.execute("""
-                INSERT INTO tasks (title, description, priority, assignee, column_id, risk_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (title, description, priority, assignee, column_id, fk_risk_id))
+            fk_risk_id = self._risk_pk(conn, risk_id) if risk_id else None
+            try:
+                cursor = conn.execute(sql, (title, description, priority, assignee,
+                                            column_id, fk_risk_id))
+            except sqlite3.IntegrityError:
+                if fk_risk_id is None:
+                    raise
+                # The cached risk was deleted behind our back; look it up again
+                self._forget_risk_pk(risk_id)
+                cursor = conn.execute(sql, (title, description, priority, assignee,
+                                            column_id, self._risk_pk(conn, risk_id)))
             return cursor.lastrowid
 
     def update_task(self, task_id: int, **kwargs) -> bool:
         """Update a task. Pass fields to update as kwargs."""
-        allowed = {'title', 'description', 'priority', 'assignee', 'column_id'}
-        updates = {k: v for k, v in kwargs.items() if k in allowed}
+        updates = {k: v for k, v in kwargs.items() if k in _TASK_UPDATE_COLUMNS}
         if not updates:
             return False
 
-        updates['updated_at'] = datetime.now().isoformat()
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
-
+        params = _masked_update_params(_TASK_UPDATE_COLUMNS, updates)
         with self._connection() as conn:
-            conn.execute(f"UPDATE tasks SET {set_clause} WHERE id = ?",
-                        (*updates.values(), task_id))
+            conn.execute(_SQL_UPDATE_TASK, (*params, task_id))
             return True
 
     def move_task(self, task_id: int, column_id: str) -> bool:
@@ -952,17 +1845,11 @@ class RACMDatabase:
     def get_task_summary(self) -> Dict:
         """Get summary statistics for tasks."""
         with self._connection() as conn:
-            total = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
-            by_column = conn.execute("""
-                SELECT column_id, COUNT(*) as count FROM tasks GROUP BY column_id
-            """).fetchall()
-            by_priority = conn.execute("""
-                SELECT priority, COUNT(*) as count FROM tasks GROUP BY priority
-            """).fetchall()
+            total, grouped = self._grouped_counts(conn, 'tasks', ('column_id', 'priority'))
             return {
                 'total': total,
-                'by_column': {row['column_id']: row['count'] for row in by_column},
-                'by_priority': {row['priority']: row['count'] for row in by_priority}
+                'by_column': dict(grouped['column_id']),
+                'by_priority': dict(grouped['priority'])
             }
 
     # ==================== AUDITS (Annual Audit Plan) ====================
@@ -970,24 +1857,12 @@ class RACMDatabase:
     def get_all_audits(self) -> List[Dict]:
         """Get all audits from the annual audit plan."""
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT * FROM audits ORDER BY
-                    CASE quarter
-                        WHEN 'Q1' THEN 1
-                        WHEN 'Q2' THEN 2
-                        WHEN 'Q3' THEN 3
-                        WHEN 'Q4' THEN 4
-                        ELSE 5
-                    END,
-                    planned_start,
-                    title
-            """).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM audits" + _SQL_AUDITS_ORDER_BY)
 
     def get_audit(self, audit_id: int) -> Optional[Dict]:
         """Get a single audit by ID."""
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM audits WHERE id = ?", (audit_id,)).fetchone()
+            row = conn.execute(_SQL_GET_AUDIT, (audit_id,)).fetchone()
             return dict(row) if row else None
 
     def create_audit(self, title: str, **kwargs) -> int:
@@ -1010,27 +1885,53 @@ class RACMDatabase:
 
     def update_audit(self, audit_id: int, **kwargs) -> bool:
         """Update an audit. Pass fields to update as kwargs."""
-        allowed = {'title', 'description', 'audit_area', 'owner', 'planned_start',
-                   'planned_end', 'actual_start', 'actual_end', 'quarter', 'status',
-                   'priority', 'estimated_hours', 'actual_hours', 'risk_rating', 'notes'}
-        updates = {k: v for k, v in kwargs.items() if k in allowed}
+        updates = {k: v for k, v in kwargs.items() if k in _AUDIT_UPDATE_COLUMNS}
         if not updates:
             return False
-        updates['updated_at'] = 'CURRENT_TIMESTAMP'
 
+        params = _masked_update_params(_AUDIT_UPDATE_COLUMNS, updates)
         with self._connection() as conn:
-            set_clause = ', '.join(f"{k} = ?" if k != 'updated_at' else f"{k} = CURRENT_TIMESTAMP"
-                                   for k in updates.keys())
-            values = [v for k, v in updates.items() if k != 'updated_at']
-            conn.execute(f"UPDATE audits SET {set_clause} WHERE id = ?", (*values, audit_id))
+            conn.execute(_SQL_UPDATE_AUDIT, (*params, audit_id))
             return True
 
     def delete_audit(self, audit_id: int) -> bool:
         """Delete an audit from the annual plan."""
+        self._invalidate_request_cache()
         with self._connection() as conn:
             cursor = conn.execute("DELETE FROM audits WHERE id = ?", (audit_id,))
             return cursor.rowcount > 0
 
+    def bulk_upsert_audits(self, rows: List[Dict]) -> int:
+        """Insert or update many audits in a single statement.
+
+        The rows are sent as one JSON array and expanded with json_each(), so
+        the statement binds one parameter however many rows there are. Rows
+        with an existing 'id' are updated, the rest inserted. Every row
+        writes each column that any row supplies (missing keys become NULL).
+        Returns the number of rows written.
+        """
+        allowed = ('title', 'description', 'audit_area', 'owner', 'planned_start',
+                   'planned_end', 'actual_start', 'actual_end', 'quarter', 'status',
+                   'priority', 'estimated_hours', 'actual_hours', 'risk_rating', 'notes')
+        present = set().union(*rows) if rows else set()
+        columns = [c for c in allowed if c in present]
+        if not columns:
+            return 0
+
+        payload = json.dumps([{k: row.get(k) for k in ('id', *columns)} for row in rows])
+        select_list = ', '.join(f"json_extract(value, '$.{c}')" for c in ('id', *columns))
+        update_clause = ', '.join(f"{c} = excluded.{c}" for c in columns)
+
+        with self._connection() as conn:
+            # WHERE true keeps the parser from reading ON CONFLICT as a join
+            cursor = conn.execute(f"""
+                INSERT INTO audits (id, {', '.join(columns)})
+                SELECT {select_list} FROM json_each(?) WHERE true
+                ON CONFLICT(id) DO UPDATE SET {update_clause},
+                    updated_at = CURRENT_TIMESTAMP
+            """, (payload,))
+            return cursor.rowcount
+
     def audits_to_spreadsheet_format(self, audits: List[Dict]) -> List[List]:
         """Convert audit dicts to spreadsheet format (array of arrays)."""
         return [
@@ -1053,57 +1954,91 @@ class RACMDatabase:
 
     def get_audits_as_spreadsheet(self) -> List[List]:
         """Get all audits in spreadsheet format (array of arrays)."""
-        audits = self.get_all_audits()
-        return self.audits_to_spreadsheet_format(audits)
+        return list(self.iter_audits_as_spreadsheet())
 
-    def save_audits_from_spreadsheet(self, data: List[List]) -> Dict:
-        """Save audits from spreadsheet format. Returns stats."""
-        with self._connection() as conn:
-            existing_ids = {row['id'] for row in conn.execute("SELECT id FROM audits").fetchall()}
-            seen_ids = set()
-            created = 0
-            updated = 0
+    def iter_audits_as_spreadsheet(self) -> Iterator[List]:
+        """Iterate over spreadsheet rows for all audits, in plan order.
 
-            for row in data:
-                if not row or len(row) < 2:
-                    continue
+        Formats each row straight from the cursor, as
+        audits_to_spreadsheet_format() would, without materialising the
+        audits first. Reads on its own connection, open until the iterator
+        is exhausted or closed.
+        """
+        conn = self._get_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("""
+                SELECT id, title, audit_area, owner, planned_start, planned_end, quarter,
+                       status, priority, risk_rating, estimated_hours, description
+                FROM audits
+            """ + _SQL_AUDITS_ORDER_BY)
+            for (audit_id, title, area, owner, start, end, quarter, status, priority,
+                 rating, hours, description) in cursor:
+                yield [
+                    str(audit_id),
+                    title or '',
+                    area or '',
+                    owner or '',
+                    start or '',
+                    end or '',
+                    quarter or '',
+                    status or 'planning',
+                    priority or 'medium',
+                    rating or '',
+                    str(hours) if hours else '',
+                    description or ''
+                ]
+        finally:
+            conn.close()
 
-                # Parse row data
-                audit_id = int(row[0]) if row[0] and str(row[0]).isdigit() else None
-                title = str(row[1]).strip() if len(row) > 1 and row[1] else ''
-                if not title:
-                    continue
+    def save_audits_from_spreadsheet(self, data: List[List]) -> Dict:
+        """Save audits from spreadsheet format. Returns stats.
 
-                audit_data = {
-                    'title': title,
-                    'audit_area': str(row[2]).strip() if len(row) > 2 and row[2] else None,
-                    'owner': str(row[3]).strip() if len(row) > 3 and row[3] else None,
-                    'planned_start': str(row[4]).strip() if len(row) > 4 and row[4] else None,
-                    'planned_end': str(row[5]).strip() if len(row) > 5 and row[5] else None,
-                    'quarter': str(row[6]).strip() if len(row) > 6 and row[6] else None,
-                    'status': str(row[7]).strip() if len(row) > 7 and row[7] else 'planning',
-                    'priority': str(row[8]).strip() if len(row) > 8 and row[8] else 'medium',
-                    'risk_rating': str(row[9]).strip() if len(row) > 9 and row[9] else None,
-                    'estimated_hours': float(row[10]) if len(row) > 10 and row[10] else None,
-                    'description': str(row[11]).strip() if len(row) > 11 and row[11] else None
-                }
+        All inserts, updates and deletes run as batches on one connection in
+        a single transaction, so a large sheet commits once.
+        """
+        to_insert = []
+        to_update = []
+
+        with self._connection() as conn:
+            existing_ids = {row[0] for row in conn.execute("SELECT id FROM audits")}
+            seen_ids = set()
 
+            for row in data:
+                parsed = _parse_audit_row(row)
+                if parsed is None:
+                    continue
+                audit_id, values = parsed
                 if audit_id and audit_id in existing_ids:
-                    self.update_audit(audit_id, **audit_data)
+                    to_update.append((*values, audit_id))
                     seen_ids.add(audit_id)
-                    updated += 1
                 else:
-                    new_id = self.create_audit(**audit_data)
-                    seen_ids.add(new_id)
-                    created += 1
+                    to_insert.append(values)
+
+            if len(to_insert) + len(to_update) > AUDIT_BULK_UPSERT_MIN_ROWS:
+                # Updates carry their id last; inserts get a fresh one
+                keys = ('id', *_AUDIT_SHEET_COLUMNS)
+                self.bulk_upsert_audits(
+                    [dict(zip(keys, (None, *values))) for values in to_insert] +
+                    [dict(zip(keys, (values[-1], *values[:-1]))) for values in to_update]
+                )
+            else:
+                if to_insert:
+                    conn.executemany(_SQL_INSERT_AUDIT_ROW, to_insert)
+                if to_update:
+                    conn.executemany(_SQL_UPDATE_AUDIT_ROW, to_update)
 
             # Delete audits that were removed from spreadsheet
-            deleted = 0
-            for audit_id in existing_ids - seen_ids:
-                self.delete_audit(audit_id)
-                deleted += 1
+            removed = list(existing_ids - seen_ids)
+            if removed:
+                self._invalidate_request_cache()
+                conn.execute(
+                    f"DELETE FROM audits WHERE id IN ({','.join('?' * len(removed))})",
+                    removed
+                )
 
-            return {'created': created, 'updated': updated, 'deleted': deleted}
+            return {'created': len(to_insert), 'updated': len(to_update), 'deleted': len(removed)}
 
     def audits_to_kanban_format(self, audits: List[Dict]) -> Dict:
         """Convert audit dicts to kanban board format."""
@@ -1116,57 +2051,58 @@ class RACMDatabase:
             'complete': 'Complete'
         }
 
-        board = {
+        # One pass over the audits; statuses without a column are not shown
+        buckets = {col_id: [] for col_id in columns}
+        for a in audits:
+            items = buckets.get(a['status'] or 'planning')
+            if items is not None:
+                items.append({
+                    'id': str(a['id']),
+                    'title': a['title'],
+                    'description': a['description'] or '',
+                    'priority': a['priority'] or 'medium',
+                    'owner': a['owner'] or '',
+                    'quarter': a['quarter'] or '',
+                    'audit_area': a['audit_area'] or '',
+                    'planned_start': a['planned_start'] or '',
+                    'planned_end': a['planned_end'] or ''
+                })
+
+        return {
             'name': 'Annual Audit Plan',
-            'columns': []
+            'columns': [
+                {
+                    'id': col_id,
+                    'title': column_titles.get(col_id, col_id.title()),
+                    'items': buckets[col_id]
+                }
+                for col_id in columns
+            ]
         }
 
-        for col_id in columns:
-            col_audits = [a for a in audits if (a['status'] or 'planning') == col_id]
-            board['columns'].append({
-                'id': col_id,
-                'title': column_titles.get(col_id, col_id.title()),
-                'items': [
-                    {
-                        'id': str(a['id']),
-                        'title': a['title'],
-                        'description': a['description'] or '',
-                        'priority': a['priority'] or 'medium',
-                        'owner': a['owner'] or '',
-                        'quarter': a['quarter'] or '',
-                        'audit_area': a['audit_area'] or '',
-                        'planned_start': a['planned_start'] or '',
-                        'planned_end': a['planned_end'] or ''
-                    }
-                    for a in col_audits
-                ]
-            })
-
-        return board
-
     def get_audits_as_kanban(self) -> Dict:
-        """Get all audits grouped by status for kanban view."""
-        audits = self.get_all_audits()
+        """Get all audits grouped by status for kanban view.
+
+        Reads only the columns a kanban card shows.
+        """
+        with self._connection() as conn:
+            audits = self._fetch_dicts(conn, """
+                SELECT id, title, description, priority, owner, quarter, audit_area,
+                       planned_start, planned_end, status
+                FROM audits
+            """ + _SQL_AUDITS_ORDER_BY)
         return self.audits_to_kanban_format(audits)
 
     def get_audit_summary(self) -> Dict:
         """Get summary statistics for annual audit plan."""
         with self._connection() as conn:
-            total = conn.execute("SELECT COUNT(*) FROM audits").fetchone()[0]
-            by_status = conn.execute("""
-                SELECT status, COUNT(*) as count FROM audits GROUP BY status
-            """).fetchall()
-            by_quarter = conn.execute("""
-                SELECT quarter, COUNT(*) as count FROM audits GROUP BY quarter
-            """).fetchall()
-            by_area = conn.execute("""
-                SELECT audit_area, COUNT(*) as count FROM audits GROUP BY audit_area
-            """).fetchall()
+            total, grouped = self._grouped_counts(
+                conn, 'audits', ('status', 'quarter', 'audit_area'))
             return {
                 'total': total,
-                'by_status': {row['status'] or 'planning': row['count'] for row in by_status},
-                'by_quarter': {row['quarter']: row['count'] for row in by_quarter if row['quarter']},
-                'by_area': {row['audit_area']: row['count'] for row in by_area if row['audit_area']}
+                'by_status': {status or 'planning': count for status, count in grouped['status']},
+                'by_quarter': {quarter: count for quarter, count in grouped['quarter'] if quarter},
+                'by_area': {area: count for area, count in grouped['audit_area'] if area}
             }
 
     # ==================== FLOWCHARTS ====================
@@ -1174,19 +2110,18 @@ class RACMDatabase:
     def get_all_flowcharts(self) -> List[Dict]:
         """Get all flowcharts (metadata only, not full data)."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT id, name, risk_id, created_at, updated_at
                 FROM flowcharts ORDER BY name
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def get_flowchart(self, name: str) -> Optional[Dict]:
         """Get a flowchart by name (includes full Drawflow data)."""
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM flowcharts WHERE name = ?", (name,)).fetchone()
+            row = conn.execute(_SQL_GET_FLOWCHART, (name,)).fetchone()
             if row:
                 result = dict(row)
-                result['data'] = json.loads(result['data'])
+                result['data'] = _json_loads(result['data'])
                 return result
             return None
 
@@ -1195,31 +2130,30 @@ class RACMDatabase:
 
         Flowcharts are unique per (audit_id, name) combination.
         """
+        # Upsert - uniqueness is now (audit_id, name). RETURNING gives the id
+        # for both the insert and the update path, so no follow-up SELECT.
+        sql = """
+            INSERT INTO flowcharts (name, data, risk_id, audit_id, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(audit_id, name) DO UPDATE SET
+                data = excluded.data,
+                risk_id = excluded.risk_id,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id
+        """
+        payload = _json_dumps(data)
         with self._connection() as conn:
             # Look up risk foreign key if provided
-            fk_risk_id = None
-            if risk_id:
-                row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (risk_id,)).fetchone()
-                if row:
-                    fk_risk_id = row['id']
-
-            # Upsert - uniqueness is now (audit_id, name)
-            cursor = conn.execute("""
-                INSERT INTO flowcharts (name, data, risk_id, audit_id, updated_at)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(audit_id, name) DO UPDATE SET
-                    data = excluded.data,
-                    risk_id = excluded.risk_id,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (name, json.dumps(data), fk_risk_id, audit_id))
-
-            # Get the ID
-            row = conn.execute(
-                "SELECT id FROM flowcharts WHERE name = ? AND (audit_id = ? OR (audit_id IS NULL AND ? IS NULL))",
-                (name, audit_id, audit_id)
-            ).fetchone()
-            flowchart_id = row['id'] if row else cursor.lastrowid
-            return flowchart_id
+            fk_risk_id = self._risk_pk(conn, risk_id) if risk_id else None
+            try:
+                row = conn.execute(sql, (name, payload, fk_risk_id, audit_id)).fetchone()
+            except sqlite3.IntegrityError:
+                if fk_risk_id is None:
+                    raise
+                # The cached risk was deleted behind our back; look it up again
+                self._forget_risk_pk(risk_id)
+                row = conn.execute(sql, (name, payload, self._risk_pk(conn, risk_id), audit_id)).fetchone()
+            return row[0]
 
     def delete_flowchart(self, name: str) -> bool:
         """Delete a flowchart by name."""
@@ -1241,45 +2175,42 @@ class RACMDatabase:
     def get_test_document_by_risk_code(self, risk_code: str, doc_type: str) -> Optional[Dict]:
         """Get a test document by risk code (e.g., 'R001') and type."""
         with self._connection() as conn:
-            # First get the risk ID
-            risk_row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (risk_code,)).fetchone()
-            if not risk_row:
-                return None
-            risk_id = risk_row['id']
-            row = conn.execute(
-                "SELECT * FROM test_documents WHERE risk_id = ? AND doc_type = ?",
-                (risk_id, doc_type)
-            ).fetchone()
+            row = conn.execute("""
+                SELECT td.* FROM test_documents td
+                JOIN risks r ON td.risk_id = r.id
+                WHERE r.risk_id = ? AND td.doc_type = ?
+            """, (risk_code, doc_type)).fetchone()
             return dict(row) if row else None
 
     def save_test_document(self, risk_id: int, doc_type: str, content: str) -> int:
         """Save/update a test document. Returns the ID."""
         with self._connection() as conn:
-            # Get audit_id from the associated risk
-            risk_row = conn.execute("SELECT audit_id FROM risks WHERE id = ?", (risk_id,)).fetchone()
-            audit_id = risk_row['audit_id'] if risk_row else None
-            cursor = conn.execute("""
+            # audit_id comes from the associated risk
+            row = conn.execute("""
                 INSERT INTO test_documents (risk_id, doc_type, content, audit_id, updated_at)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                VALUES (?, ?, ?, (SELECT audit_id FROM risks WHERE id = ?), CURRENT_TIMESTAMP)
                 ON CONFLICT(risk_id, doc_type) DO UPDATE SET
                     content = excluded.content,
                     audit_id = excluded.audit_id,
                     updated_at = CURRENT_TIMESTAMP
-            """, (risk_id, doc_type, content, audit_id))
-            row = conn.execute(
-                "SELECT id FROM test_documents WHERE risk_id = ? AND doc_type = ?",
-                (risk_id, doc_type)
-            ).fetchone()
-            doc_id = row['id'] if row else cursor.lastrowid
-            return doc_id
+                RETURNING id
+            """, (risk_id, doc_type, content, risk_id)).fetchone()
+            return row[0]
 
     def save_test_document_by_risk_code(self, risk_code: str, doc_type: str, content: str) -> Optional[int]:
         """Save/update a test document by risk code. Returns the ID or None if risk not found."""
         with self._connection() as conn:
-            risk_row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (risk_code,)).fetchone()
-            if not risk_row:
-                return None
-        return self.save_test_document(risk_row['id'], doc_type, content)
+            # Inserts nothing, and so returns no row, when the risk code is unknown
+            row = conn.execute("""
+                INSERT INTO test_documents (risk_id, doc_type, content, audit_id, updated_at)
+                SELECT id, ?, ?, audit_id, CURRENT_TIMESTAMP FROM risks WHERE risk_id = ?
+                ON CONFLICT(risk_id, doc_type) DO UPDATE SET
+                    content = excluded.content,
+                    audit_id = excluded.audit_id,
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING id
+            """, (doc_type, content, risk_code)).fetchone()
+            return row[0] if row else None
 
     def delete_test_document(self, risk_id: int, doc_type: str) -> bool:
         """Delete a test document."""
@@ -1293,69 +2224,75 @@ class RACMDatabase:
     def get_test_documents_for_risk(self, risk_id: int) -> Dict[str, str]:
         """Get all test documents for a risk. Returns dict with doc_type as key."""
         with self._connection() as conn:
-            rows = conn.execute(
-                "SELECT doc_type, content FROM test_documents WHERE risk_id = ?",
-                (risk_id,)
-            ).fetchall()
-            return {row['doc_type']: row['content'] for row in rows}
+            # (doc_type, content) tuples feed dict() directly
+            return dict(self._fetch_tuples(
+                conn, "SELECT doc_type, content FROM test_documents WHERE risk_id = ?", (risk_id,)
+            ))
 
     def has_test_document(self, risk_code: str, doc_type: str) -> bool:
         """Check if a test document exists for a risk."""
-        doc = self.get_test_document_by_risk_code(risk_code, doc_type)
-        return doc is not None and bool(doc.get('content', '').strip())
+        with self._connection() as conn:
+            return conn.execute("""
+                SELECT 1 FROM test_documents td
+                JOIN risks r ON td.risk_id = r.id
+                WHERE r.risk_id = ? AND td.doc_type = ?
+                  AND trim(td.content, """ + _SQL_BLANK_CHARS + """) != ''
+            """, (risk_code, doc_type)).fetchone() is not None
 
     def get_all_test_documents_metadata(self) -> List[Dict]:
         """Get metadata about all test documents (without full content).
         Returns list of {risk_code, doc_type, has_content, word_count, updated_at}."""
         with self._connection() as conn:
+            # Contents stay in SQLite; only the flag and word count come back
             rows = conn.execute("""
-                SELECT r.risk_id as risk_code, td.doc_type, td.content, td.updated_at
+                SELECT r.risk_id as risk_code, td.doc_type,
+                       trim(coalesce(td.content, ''), """ + _SQL_BLANK_CHARS + """) != '' as has_content,
+                       word_count(td.content) as word_count, td.updated_at
                 FROM test_documents td
                 JOIN risks r ON td.risk_id = r.id
                 ORDER BY r.risk_id, td.doc_type
             """).fetchall()
 
-            result = []
-            for row in rows:
-                content = row['content'] or ''
-                # Strip HTML tags for word count approximation
-                text_only = re.sub(r'<[^>]+>', '', content)
-                word_count = len(text_only.split()) if text_only.strip() else 0
-                result.append({
+            return [
+                {
                     'risk_code': row['risk_code'],
                     'doc_type': row['doc_type'],
-                    'has_content': bool(content.strip()),
-                    'word_count': word_count,
+                    'has_content': bool(row['has_content']),
+                    'word_count': row['word_count'],
                     'updated_at': row['updated_at']
-                })
-            return result
+                }
+                for row in rows
+            ]
 
     def get_flowchart_with_details(self, name: str) -> Optional[Dict]:
         """Get flowchart with parsed node details for AI consumption."""
-        fc = self.get_flowchart(name)
-        if not fc:
+        # json_each walks the stored Drawflow nodes in SQL, so only the four
+        # fields used here cross into Python rather than the whole document.
+        # The LEFT JOIN keeps one row for a flowchart with no nodes.
+        with self._connection() as conn:
+            rows = self._fetch_tuples(conn, """
+                SELECT f.name, f.risk_id, f.updated_at, je.key,
+                       COALESCE(json_extract(je.value, '$.name'), 'unknown'),
+                       COALESCE(json_extract(je.value, '$.data.name'), ''),
+                       COALESCE(json_extract(je.value, '$.data.description'), '')
+                FROM flowcharts f
+                LEFT JOIN json_each(f.data, '$.drawflow.Home.data') je
+                WHERE f.id = (SELECT id FROM flowcharts WHERE name = ? LIMIT 1)
+                ORDER BY je.id
+            """, (name,))
+        if not rows:
             return None
 
-        # Extract node details from Drawflow data
-        data = fc.get('data', {})
-        nodes = []
-        try:
-            drawflow_data = data.get('drawflow', {}).get('Home', {}).get('data', {})
-            for node_id, node in drawflow_data.items():
-                nodes.append({
-                    'id': node_id,
-                    'type': node.get('name', 'unknown'),
-                    'label': node.get('data', {}).get('name', ''),
-                    'description': node.get('data', {}).get('description', '')
-                })
-        except (AttributeError, KeyError):
-            pass
-
+        fc_name, risk_id, updated_at = rows[0][:3]
         return {
-            'name': fc['name'],
-            'risk_id': fc.get('risk_id'),
-            'nodes': nodes,
-            'updated_at': fc.get('updated_at')
+            'name': fc_name,
+            'risk_id': risk_id,
+            'nodes': [
+                {'id': node_id, 'type': node_type, 'label': label, 'description': description}
+                for _, _, _, node_id, node_type, label, description in rows
+                if node_id is not None
+            ],
+            'updated_at': updated_at
         }
 
     # ==================== ISSUES (Issue Log) ====================
@@ -1363,9 +2300,7 @@ class RACMDatabase:
     def _generate_issue_id(self) -> str:
         """Generate next issue ID (ISS-001, ISS-002, etc.)."""
         with self._connection() as conn:
-            row = conn.execute("SELECT MAX(CAST(SUBSTR(issue_id, 5) AS INTEGER)) as max_num FROM issues").fetchone()
-            next_num = (row['max_num'] or 0) + 1
-            return f"ISS-{next_num:03d}"
+            return f"ISS-{conn.execute(_SQL_NEXT_ISSUE_NUMBER).fetchone()[0]:03d}"
 
     def create_issue(self, risk_id: str, title: str, description: str = '',
                      severity: str = 'Medium', status: str = 'Open',
@@ -1373,45 +2308,64 @@ class RACMDatabase:
                      documentation: str = '', audit_id: int = None,
                      created_by: int = None) -> str:
         """Create a new issue. Returns the issue_id."""
-        issue_id = self._generate_issue_id()
         with self._connection() as conn:
-            conn.execute("""
+            # The id is numbered inside the INSERT, so allocating and writing it
+            # is one statement that no other writer can interleave with
+            return conn.execute("""
                 INSERT INTO issues (issue_id, risk_id, title, description, severity, status,
                                   assigned_to, due_date, documentation, audit_id, created_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (issue_id, risk_id.upper(), title, description, severity, status,
-                  assigned_to, due_date, documentation, audit_id, created_by))
-            return issue_id
+                VALUES (printf('ISS-%03d', (""" + _SQL_NEXT_ISSUE_NUMBER + """)),
+                        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING issue_id
+            """, (risk_id.upper(), title, description, severity, status,
+                  assigned_to, due_date, documentation, audit_id, created_by)).fetchone()[0]
 
     def get_all_issues(self) -> List[Dict]:
         """Get all issues."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT * FROM issues ORDER BY issue_id").fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM issues ORDER BY issue_id")
+
+    def get_all_issues_summary(self) -> List[Dict]:
+        """Get all issues without their documentation text.
+
+        has_documentation says whether an issue has non-blank documentation;
+        the text itself stays in SQLite (read it with get_issue_documentation()).
+        """
+        with self._connection() as conn:
+            issues = self._fetch_dicts(conn, """
+                SELECT id, issue_id, risk_id, title, description, severity, status,
+                       assigned_to, due_date, created_at, updated_at, audit_id, risk_row_id,
+                       record_status, current_owner_role, admin_lock_reason, admin_locked_by,
+                       admin_locked_at, signed_off_by, signed_off_at, created_by, updated_by,
+                       assigned_reviewer_id,
+                       trim(coalesce(documentation, ''), """ + _SQL_BLANK_CHARS + """) != ''
+                           as has_documentation
+                FROM issues ORDER BY issue_id
+            """)
+        for issue in issues:
+            issue['has_documentation'] = bool(issue['has_documentation'])
+        return issues
 
     def get_issue(self, issue_id: str) -> Optional[Dict]:
         """Get a single issue by issue_id."""
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM issues WHERE issue_id = ?", (issue_id.upper(),)).fetchone()
+            row = conn.execute(_SQL_GET_ISSUE, (issue_id.upper(),)).fetchone()
             return dict(row) if row else None
 
     def get_issues_for_risk(self, risk_id: str) -> List[Dict]:
         """Get all issues for a specific risk."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT * FROM issues WHERE risk_id = ? ORDER BY issue_id", (risk_id.upper(),)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM issues WHERE risk_id = ? ORDER BY issue_id", (risk_id.upper(),))
 
     def update_issue(self, issue_id: str, **kwargs) -> bool:
         """Update an issue. Returns True if found and updated."""
-        allowed_fields = ['title', 'description', 'severity', 'status', 'assigned_to', 'due_date', 'risk_id', 'documentation']
-        updates = {k: v for k, v in kwargs.items() if k in allowed_fields and v is not None}
+        updates = {k: v for k, v in kwargs.items() if k in _ISSUE_UPDATE_COLUMNS and v is not None}
         if not updates:
             return False
 
+        params = _masked_update_params(_ISSUE_UPDATE_COLUMNS, updates)
         with self._connection() as conn:
-            set_clause = ', '.join(f"{k} = ?" for k in updates.keys())
-            values = list(updates.values()) + [issue_id.upper()]
-            cursor = conn.execute(f"UPDATE issues SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE issue_id = ?", values)
+            cursor = conn.execute(_SQL_UPDATE_ISSUE, (*params, issue_id.upper()))
             return cursor.rowcount > 0
 
     def delete_issue(self, issue_id: str) -> bool:
@@ -1438,10 +2392,17 @@ class RACMDatabase:
         ]
 
     def save_issues_from_spreadsheet(self, data: List[List]) -> None:
-        """Save issues from spreadsheet format."""
+        """Save issues from spreadsheet format.
+
+        Rows are parsed first, then inserts, updates and deletes each go to
+        SQLite as one batch inside a single transaction.
+        """
+        to_insert = []
+        to_update = []
+
         with self._connection() as conn:
             # Get existing issue IDs
-            existing = {row['issue_id'] for row in conn.execute("SELECT issue_id FROM issues").fetchall()}
+            existing = {row[0] for row in conn.execute("SELECT issue_id FROM issues")}
             seen = set()
 
             for row in data:
@@ -1461,26 +2422,39 @@ class RACMDatabase:
                 assigned_to = str(row[6]).strip() if len(row) > 6 and row[6] else ''
                 due_date = str(row[7]).strip() if len(row) > 7 and row[7] else None
 
+                values = (risk_id, title, description, severity, status, assigned_to, due_date)
                 if issue_id and issue_id in existing:
-                    # Update existing
-                    conn.execute("""
-                        UPDATE issues SET risk_id=?, title=?, description=?, severity=?, status=?,
-                        assigned_to=?, due_date=?, updated_at=CURRENT_TIMESTAMP
-                        WHERE issue_id=?
-                    """, (risk_id, title, description, severity, status, assigned_to, due_date, issue_id))
+                    to_update.append((*values, issue_id))
                     seen.add(issue_id)
                 else:
-                    # Create new
-                    new_id = self._generate_issue_id()
-                    conn.execute("""
-                        INSERT INTO issues (issue_id, risk_id, title, description, severity, status, assigned_to, due_date)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (new_id, risk_id, title, description, severity, status, assigned_to, due_date))
-                    seen.add(new_id)
+                    to_insert.append(values)
+
+            if to_update:
+                # Rows whose values all match are skipped by the WHERE clause,
+                # so re-saving the sheet leaves their updated_at and pages alone
+                conn.executemany("""
+                    UPDATE issues SET risk_id=?1, title=?2, description=?3, severity=?4, status=?5,
+                    assigned_to=?6, due_date=?7, updated_at=CURRENT_TIMESTAMP
+                    WHERE issue_id=?8 AND (risk_id IS NOT ?1 OR title IS NOT ?2
+                        OR description IS NOT ?3 OR severity IS NOT ?4 OR status IS NOT ?5
+                        OR assigned_to IS NOT ?6 OR due_date IS NOT ?7)
+                """, to_update)
+
+            if to_insert:
+                # Number new issues on from the highest existing ISS-nnn
+                next_num = conn.execute(_SQL_NEXT_ISSUE_NUMBER).fetchone()[0]
+                conn.executemany("""
+                    INSERT INTO issues (issue_id, risk_id, title, description, severity, status, assigned_to, due_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(f"ISS-{next_num + i:03d}", *values) for i, values in enumerate(to_insert)])
 
             # Delete removed issues (those in existing but not in seen)
-            for issue_id in existing - seen:
-                conn.execute("DELETE FROM issues WHERE issue_id = ?", (issue_id,))
+            removed = list(existing - seen)
+            if removed:
+                conn.execute(
+                    f"DELETE FROM issues WHERE issue_id IN ({','.join('?' * len(removed))})",
+                    removed
+                )
 
     def get_issue_documentation(self, issue_id: str) -> Optional[str]:
         """Get documentation for an issue."""
@@ -1499,17 +2473,20 @@ class RACMDatabase:
 
     def has_issue_documentation(self, issue_id: str) -> bool:
         """Check if an issue has documentation."""
-        doc = self.get_issue_documentation(issue_id)
-        return doc is not None and bool(doc.strip())
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT 1 FROM issues WHERE issue_id = ? AND trim(documentation, "
+                + _SQL_BLANK_CHARS + ") != ''",
+                (issue_id.upper(),)
+            ).fetchone() is not None
 
     def get_issue_summary(self) -> Dict:
         """Get summary of issues by status."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT status, COUNT(*) as count FROM issues GROUP BY status").fetchall()
-            total = conn.execute("SELECT COUNT(*) as total FROM issues").fetchone()['total']
+            total, grouped = self._grouped_counts(conn, 'issues', ('status',))
             return {
                 'total': total,
-                'by_status': {row['status']: row['count'] for row in rows}
+                'by_status': dict(grouped['status'])
             }
 
     # ==================== ISSUE ATTACHMENTS ====================
@@ -1526,17 +2503,22 @@ class RACMDatabase:
             return cursor.lastrowid
 
     def get_attachments_for_issue(self, issue_id: str) -> List[Dict]:
-        """Get all attachments for an issue."""
+        """Get all attachments for an issue.
+
+        Leaves out extracted_text, which can run to megabytes per file; use
+        get_attachment() for a single attachment's text.
+        """
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT * FROM issue_attachments WHERE issue_id = ? ORDER BY uploaded_at DESC
-            """, (issue_id.upper(),)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, f"""
+                SELECT {_SQL_ISSUE_ATTACHMENT_COLUMNS}
+                FROM issue_attachments WHERE issue_id = ? ORDER BY uploaded_at DESC
+            """, (issue_id.upper(),))
 
-    def get_attachment(self, attachment_id: int) -> Optional[Dict]:
-        """Get a single attachment by ID."""
+    def get_attachment(self, attachment_id: int, with_text: bool = True) -> Optional[Dict]:
+        """Get a single attachment by ID, without extracted_text if with_text is False."""
+        columns = '*' if with_text else _SQL_ISSUE_ATTACHMENT_COLUMNS
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM issue_attachments WHERE id = ?", (attachment_id,)).fetchone()
+            row = conn.execute(f"SELECT {columns} FROM issue_attachments WHERE id = ?", (attachment_id,)).fetchone()
             return dict(row) if row else None
 
     def delete_attachment(self, attachment_id: int) -> bool:
@@ -1545,14 +2527,42 @@ class RACMDatabase:
             cursor = conn.execute("DELETE FROM issue_attachments WHERE id = ?", (attachment_id,))
             return cursor.rowcount > 0
 
+    def read_extracted_text(self, attachment_type: str, attachment_id: int,
+                            max_chars: Optional[int] = None, chunk_size: int = 65536) -> Optional[str]:
+        """Read an attachment's extracted text, stopping after max_chars.
+
+        attachment_type is 'issue', 'risk' or 'audit'. The value is read with
+        SQLite's incremental BLOB API a chunk at a time, so a prefix of a
+        large document is returned without loading the rest. Returns None if
+        the attachment does not exist or has no text.
+        """
+        table = _ATTACHMENT_TABLES[attachment_type]
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        parts = []
+        length = 0
+        with self._connection() as conn:
+            try:
+                blob = conn.blobopen(table, 'extracted_text', attachment_id, readonly=True)
+            except sqlite3.OperationalError:
+                return None  # No such row, or extracted_text is NULL
+            with blob:
+                while max_chars is None or length < max_chars:
+                    data = blob.read(chunk_size)
+                    text = decoder.decode(data, final=not data)
+                    parts.append(text)
+                    length += len(text)
+                    if not data:
+                        break
+        text = ''.join(parts)
+        return text if max_chars is None else text[:max_chars]
+
     def get_all_attachments_metadata(self) -> List[Dict]:
         """Get metadata for all attachments (for AI context)."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT issue_id, original_filename, file_size, mime_type, description, uploaded_at
                 FROM issue_attachments ORDER BY issue_id, uploaded_at
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def count_attachments_for_issue(self, issue_id: str) -> int:
         """Count attachments for an issue."""
@@ -1577,17 +2587,18 @@ class RACMDatabase:
             return cursor.lastrowid
 
     def get_attachments_for_risk(self, risk_id: str) -> List[Dict]:
-        """Get all attachments for a risk."""
+        """Get all attachments for a risk (without extracted_text)."""
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT * FROM risk_attachments WHERE risk_id = ? ORDER BY uploaded_at DESC
-            """, (risk_id.upper(),)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, f"""
+                SELECT {_SQL_RISK_ATTACHMENT_COLUMNS}
+                FROM risk_attachments WHERE risk_id = ? ORDER BY uploaded_at DESC
+            """, (risk_id.upper(),))
 
-    def get_risk_attachment(self, attachment_id: int) -> Optional[Dict]:
-        """Get a single risk attachment by ID."""
+    def get_risk_attachment(self, attachment_id: int, with_text: bool = True) -> Optional[Dict]:
+        """Get a single risk attachment by ID, without extracted_text if with_text is False."""
+        columns = '*' if with_text else _SQL_RISK_ATTACHMENT_COLUMNS
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM risk_attachments WHERE id = ?", (attachment_id,)).fetchone()
+            row = conn.execute(f"SELECT {columns} FROM risk_attachments WHERE id = ?", (attachment_id,)).fetchone()
             return dict(row) if row else None
 
     def delete_risk_attachment(self, attachment_id: int) -> bool:
@@ -1599,11 +2610,10 @@ class RACMDatabase:
     def get_all_risk_attachments_metadata(self) -> List[Dict]:
         """Get metadata for all risk attachments (for AI context)."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT risk_id, original_filename, file_size, mime_type, description, uploaded_at
                 FROM risk_attachments ORDER BY risk_id, uploaded_at
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def count_attachments_for_risk(self, risk_id: str) -> int:
         """Count attachments for a risk."""
@@ -1626,17 +2636,18 @@ class RACMDatabase:
             return cursor.lastrowid
 
     def get_attachments_for_audit(self, audit_id: int) -> List[Dict]:
-        """Get all attachments for an audit."""
+        """Get all attachments for an audit (without extracted_text)."""
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT * FROM audit_attachments WHERE audit_id = ? ORDER BY uploaded_at DESC
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, f"""
+                SELECT {_SQL_AUDIT_ATTACHMENT_COLUMNS}
+                FROM audit_attachments WHERE audit_id = ? ORDER BY uploaded_at DESC
+            """, (audit_id,))
 
-    def get_audit_attachment(self, attachment_id: int) -> Optional[Dict]:
-        """Get a single audit attachment by ID."""
+    def get_audit_attachment(self, attachment_id: int, with_text: bool = True) -> Optional[Dict]:
+        """Get a single audit attachment by ID, without extracted_text if with_text is False."""
+        columns = '*' if with_text else _SQL_AUDIT_ATTACHMENT_COLUMNS
         with self._connection() as conn:
-            row = conn.execute("SELECT * FROM audit_attachments WHERE id = ?", (attachment_id,)).fetchone()
+            row = conn.execute(f"SELECT {columns} FROM audit_attachments WHERE id = ?", (attachment_id,)).fetchone()
             return dict(row) if row else None
 
     def delete_audit_attachment(self, attachment_id: int) -> bool:
@@ -1648,11 +2659,10 @@ class RACMDatabase:
     def get_all_audit_attachments_metadata(self) -> List[Dict]:
         """Get metadata for all audit attachments (for AI context)."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT audit_id, original_filename, file_size, mime_type, description, uploaded_at
                 FROM audit_attachments ORDER BY audit_id, uploaded_at
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def count_attachments_for_audit(self, audit_id: int) -> int:
         """Count attachments for an audit."""
@@ -1666,11 +2676,9 @@ class RACMDatabase:
     def _init_vector_table(self):
         """Initialize sqlite-vec virtual table for vector search."""
         try:
-            import sqlite_vec
             with self._connection() as conn:
-                conn.enable_load_extension(True)
-                sqlite_vec.load(conn)
-                conn.enable_load_extension(False)
+                if not self._vec_ready:
+                    raise RuntimeError("sqlite-vec is not available")
 
                 # Create vec0 virtual table for embeddings (384 dimensions for all-MiniLM-L6-v2)
                 conn.execute("""
@@ -1681,7 +2689,7 @@ class RACMDatabase:
                 """)
                 return True
         except Exception as e:
-            print(f"Warning: Could not initialize vector table: {e}")
+            logger.warning(f"Could not initialize vector table: {e}")
             return False
 
     def add_library_document(self, name: str, filename: str, original_filename: str,
@@ -1714,53 +2722,38 @@ class RACMDatabase:
         """List all library documents, optionally filtered by type."""
         with self._connection() as conn:
             if doc_type:
-                rows = conn.execute("""
+                return self._fetch_dicts(conn, """
                     SELECT * FROM library_documents WHERE doc_type = ? ORDER BY name
-                """, (doc_type,)).fetchall()
-            else:
-                rows = conn.execute("SELECT * FROM library_documents ORDER BY name").fetchall()
-            return [dict(row) for row in rows]
+                """, (doc_type,))
+            return self._fetch_dicts(conn, "SELECT * FROM library_documents ORDER BY name")
 
     def update_library_document(self, doc_id: int, **kwargs) -> bool:
         """Update a library document's metadata."""
         if not kwargs:
             return False
 
-        allowed_fields = ['name', 'doc_type', 'source', 'description', 'total_chunks']
-        updates = {k: v for k, v in kwargs.items() if k in allowed_fields}
+        updates = {k: v for k, v in kwargs.items() if k in _LIBRARY_DOCUMENT_UPDATE_COLUMNS}
 
         if not updates:
             return False
 
-        set_clause = ', '.join(f"{k} = ?" for k in updates.keys())
-        values = list(updates.values()) + [doc_id]
-
+        params = _masked_update_params(_LIBRARY_DOCUMENT_UPDATE_COLUMNS, updates)
         with self._connection() as conn:
-            cursor = conn.execute(f"""
-                UPDATE library_documents SET {set_clause}, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, values)
+            cursor = conn.execute(_SQL_UPDATE_LIBRARY_DOCUMENT, (*params, doc_id))
             return cursor.rowcount > 0
 
     def delete_library_document(self, doc_id: int) -> bool:
         """Delete a library document and all its chunks."""
         with self._connection() as conn:
             # Delete embeddings first (sqlite-vec virtual table)
-            try:
-                import sqlite_vec
-                conn.enable_load_extension(True)
-                sqlite_vec.load(conn)
-                conn.enable_load_extension(False)
-
-                # Get chunk IDs for this document
-                chunk_ids = conn.execute(
-                    "SELECT id FROM library_chunks WHERE document_id = ?", (doc_id,)
-                ).fetchall()
-
-                for (chunk_id,) in chunk_ids:
-                    conn.execute("DELETE FROM library_embeddings WHERE chunk_id = ?", (chunk_id,))
-            except Exception as e:
-                print(f"Warning: Could not delete embeddings: {e}")
+            if self._vec_ready:
+                try:
+                    conn.execute("""
+                        DELETE FROM library_embeddings
+                        WHERE chunk_id IN (SELECT id FROM library_chunks WHERE document_id = ?)
+                    """, (doc_id,))
+                except Exception as e:
+                    logger.warning(f"Could not delete embeddings: {e}")
 
             # Delete document (cascades to chunks)
             cursor = conn.execute("DELETE FROM library_documents WHERE id = ?", (doc_id,))
@@ -1770,58 +2763,73 @@ class RACMDatabase:
                          section: str = None, token_count: int = None,
                          embedding: list = None) -> int:
         """Add a chunk to the library. Returns chunk ID."""
+        return self.add_library_chunks(document_id, [{
+            'chunk_index': chunk_index,
+            'content': content,
+            'section': section,
+            'token_count': token_count,
+            'embedding': embedding,
+        }])[0]
+
+    def add_library_chunks(self, document_id: int, chunks: Iterable[Dict]) -> List[int]:
+        """Add a document's chunks to the library in one transaction.
+
+        Each chunk dict has chunk_index and content, plus optional section,
+        token_count and embedding. Returns the chunk IDs in input order.
+        """
+        chunks = list(chunks)
         with self._connection() as conn:
-            # Insert chunk
-            cursor = conn.execute("""
-                INSERT INTO library_chunks (document_id, chunk_index, section, content, token_count)
-                VALUES (?, ?, ?, ?, ?)
-            """, (document_id, chunk_index, section, content, token_count))
-            chunk_id = cursor.lastrowid
+            # One execute per row: executemany cannot hand back RETURNING ids
+            chunk_ids = [
+                conn.execute("""
+                    INSERT INTO library_chunks (document_id, chunk_index, section, content, token_count)
+                    VALUES (?, ?, ?, ?, ?)
+                    RETURNING id
+                """, (document_id, chunk['chunk_index'], chunk.get('section'),
+                      chunk['content'], chunk.get('token_count'))).fetchone()[0]
+                for chunk in chunks
+            ]
 
-            # Add embedding if provided
-            if embedding:
+            # Add embeddings for the chunks that have one
+            # Embeddings may be NumPy rows, so test length rather than truthiness
+            embedded = [(chunk_id, chunk['embedding'])
+                        for chunk_id, chunk in zip(chunk_ids, chunks)
+                        if chunk.get('embedding') is not None and len(chunk['embedding'])]
+            if embedded and self._vec_ready:
                 try:
-                    import sqlite_vec
-                    import struct
-                    conn.enable_load_extension(True)
-                    sqlite_vec.load(conn)
-                    conn.enable_load_extension(False)
-
-                    # Pack embedding as binary
-                    embedding_blob = struct.pack(f'{len(embedding)}f', *embedding)
-                    conn.execute("""
+                    conn.executemany("""
                         INSERT INTO library_embeddings (chunk_id, embedding)
                         VALUES (?, ?)
-                    """, (chunk_id, embedding_blob))
+                    """, [(chunk_id, _pack_embedding(embedding)) for chunk_id, embedding in embedded])
                 except Exception as e:
-                    print(f"Warning: Could not add embedding: {e}")
+                    logger.warning(f"Could not add embedding: {e}")
 
-            return chunk_id
+            return chunk_ids
 
     def get_library_chunks(self, document_id: int) -> List[Dict]:
         """Get all chunks for a document."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT * FROM library_chunks WHERE document_id = ? ORDER BY chunk_index
-            """, (document_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (document_id,))
 
     def search_library(self, query_embedding: list, limit: int = 5) -> List[Dict]:
         """Search the library using vector similarity. Returns relevant chunks with metadata."""
         try:
-            import sqlite_vec
-            import struct
-
             with self._connection() as conn:
-                conn.enable_load_extension(True)
-                sqlite_vec.load(conn)
-                conn.enable_load_extension(False)
+                if not self._vec_ready:
+                    return []
 
                 # Pack query embedding
-                query_blob = struct.pack(f'{len(query_embedding)}f', *query_embedding)
-
-                # Vector search with join to get full context
-                rows = conn.execute("""
+                query_blob = _pack_embedding(query_embedding)
+
+                # k = ? lets sqlite-vec keep only the nearest chunks while it
+                # scans; the joins then run for those rows alone.
+                return self._fetch_dicts(conn, """
+                    WITH knn AS (
+                        SELECT chunk_id, distance FROM library_embeddings
+                        WHERE embedding MATCH ? AND k = ?
+                    )
                     SELECT
                         c.id as chunk_id,
                         c.content,
@@ -1832,41 +2840,107 @@ class RACMDatabase:
                         d.source,
                         d.doc_type,
                         e.distance
-                    FROM library_embeddings e
+                    FROM knn e
                     JOIN library_chunks c ON e.chunk_id = c.id
                     JOIN library_documents d ON c.document_id = d.id
-                    WHERE e.embedding MATCH ?
                     ORDER BY e.distance
-                    LIMIT ?
-                """, (query_blob, limit)).fetchall()
-
-                return [dict(row) for row in rows]
+                """, (query_blob, limit))
         except Exception as e:
-            print(f"Error in library search: {e}")
+            logger.warning(f"Error in library search: {e}")
             return []
 
-    def search_library_keyword(self, keyword: str, limit: int = 10) -> List[Dict]:
-        """Fallback keyword search when vector search isn't available.
+    def search_library_ids(self, query_embedding: list, limit: int = 5) -> List[Tuple[int, float]]:
+        """Vector search returning (chunk_id, distance) pairs, nearest first.
 
-        Searches for any of the words in the query (OR logic) and ranks by match count.
+        For callers that rerank before reading chunk text; pass the survivors
+        to hydrate_chunks().
         """
+        try:
+            with self._connection() as conn:
+                if not self._vec_ready:
+                    return []
+                return self._fetch_tuples(conn, """
+                    SELECT chunk_id, distance FROM library_embeddings
+                    WHERE embedding MATCH ? AND k = ?
+                    ORDER BY distance
+                """, (_pack_embedding(query_embedding), limit))
+        except Exception as e:
+            logger.warning(f"Error in library search: {e}")
+            return []
+
+    def hydrate_chunks(self, chunk_ids: List[int]) -> List[Dict]:
+        """Fetch chunks with document metadata, in the order of chunk_ids."""
+        if not chunk_ids:
+            return []
         with self._connection() as conn:
-            # Split query into words, filter out short/common words
-            words = [w.strip().lower() for w in keyword.split() if len(w.strip()) > 2]
-            if not words:
-                words = [keyword.lower()]
+            return self._fetch_dicts(conn, """
+                SELECT
+                    c.id as chunk_id,
+                    c.content,
+                    c.section,
+                    c.chunk_index,
+                    d.id as document_id,
+                    d.name as document_name,
+                    d.source,
+                    d.doc_type
+                FROM json_each(?) j
+                JOIN library_chunks c ON c.id = j.value
+                JOIN library_documents d ON c.document_id = d.id
+                ORDER BY j.key
+            """, (_json_dumps(list(chunk_ids)),))
 
-            # Build query with OR conditions for each word
-            conditions = []
-            params = []
-            for word in words:
-                conditions.append("(LOWER(c.content) LIKE ? OR LOWER(c.section) LIKE ?)")
-                params.extend([f'%{word}%', f'%{word}%'])
+    def search_library_keyword(self, keyword: str, limit: int = 10) -> List[Dict]:
+        """Fallback keyword search when vector search isn't available.
 
-            where_clause = " OR ".join(conditions)
-            params.append(limit)
+        Searches for any of the words in the query (OR logic) through the
+        library_chunks_fts index, best bm25 match first.
+        """
+        # Case and spacing do not change the result, so queries differing
+        # only in those share one entry in the query cache
+        return self._search_library_keyword(' '.join(keyword.lower().split()), limit)
+
+    @_cached_query(lambda rows: [dict(row) for row in rows])
+    def _search_library_keyword(self, keyword: str, limit: int) -> List[Dict]:
+        """search_library_keyword() for an already lowercased, single-spaced query."""
+        # Split query into words, filter out short/common words
+        words = [w for w in keyword.split() if len(w) > 2] or [keyword]
+        if not keyword:
+            return []
 
-            rows = conn.execute(f"""
+        with self._connection() as conn:
+            # Each word is quoted so FTS5 treats it as text, not query syntax;
+            # the trailing * also matches longer words starting with it
+            query = ' OR '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+            try:
+                return self._fetch_dicts(conn, """
+                    SELECT
+                        c.id as chunk_id,
+                        c.content,
+                        c.section,
+                        c.chunk_index,
+                        d.id as document_id,
+                        d.name as document_name,
+                        d.source,
+                        d.doc_type
+                    FROM library_chunks_fts f
+                    JOIN library_chunks c ON c.id = f.rowid
+                    JOIN library_documents d ON c.document_id = d.id
+                    WHERE library_chunks_fts MATCH ?
+                    ORDER BY f.rank
+                    LIMIT ?
+                """, (query, limit))
+            except sqlite3.OperationalError:
+                # SQLite without FTS5 (see migration 012): scan with LIKE
+                pass
+
+            # The patterns go in as one JSON array so the SQL text is the same
+            # for every query and stays in the statement cache. LIKE already
+            # ignores ASCII case, so the content is not lowercased row by row,
+            # and EXISTS stops at the first word that matches. A '%word%'
+            # pattern cannot seek any index, lowercased copy or not; the FTS
+            # table above is the indexed path.
+            patterns = _json_dumps([f'%{word}%' for word in words])
+            return self._fetch_dicts(conn, """
                 SELECT
                     c.id as chunk_id,
                     c.content,
@@ -1878,12 +2952,15 @@ class RACMDatabase:
                     d.doc_type
                 FROM library_chunks c
                 JOIN library_documents d ON c.document_id = d.id
-                WHERE {where_clause}
+                WHERE EXISTS (
+                    SELECT 1 FROM json_each(?) w
+                    WHERE c.content LIKE w.value OR c.section LIKE w.value
+                )
                 ORDER BY d.name, c.chunk_index
                 LIMIT ?
-            """, params).fetchall()
-            return [dict(row) for row in rows]
+            """, (patterns, limit))
 
+    @_cached_query(lambda stats: {**stats, 'by_type': dict(stats['by_type'])})
     def get_library_stats(self) -> Dict:
         """Get library statistics."""
         with self._connection() as conn:
@@ -1891,14 +2968,14 @@ class RACMDatabase:
             chunk_count = conn.execute("SELECT COUNT(*) FROM library_chunks").fetchone()[0]
 
             # Get counts by type
-            type_counts = conn.execute("""
+            type_counts = self._fetch_tuples(conn, """
                 SELECT doc_type, COUNT(*) as count FROM library_documents GROUP BY doc_type
-            """).fetchall()
+            """)
 
             return {
                 'total_documents': doc_count,
                 'total_chunks': chunk_count,
-                'by_type': {row['doc_type']: row['count'] for row in type_counts}
+                'by_type': dict(type_counts)
             }
 
     # ==================== USERS ====================
@@ -1906,28 +2983,21 @@ class RACMDatabase:
     def get_all_users(self) -> List[Dict]:
         """Get all users."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT id, email, name, is_active, is_admin, created_at, updated_at
                 FROM users ORDER BY name
-            """).fetchall()
-            return [dict(row) for row in rows]
+            """)
 
     def get_user_by_id(self, user_id: int) -> Optional[Dict]:
         """Get a user by ID."""
         with self._connection() as conn:
-            row = conn.execute("""
-                SELECT id, email, name, password_hash, is_active, is_admin, created_at, updated_at, role
-                FROM users WHERE id = ?
-            """, (user_id,)).fetchone()
+            row = conn.execute(_SQL_GET_USER_BY_ID, (user_id,)).fetchone()
             return dict(row) if row else None
 
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get a user by email (for login)."""
         with self._connection() as conn:
-            row = conn.execute("""
-                SELECT id, email, name, password_hash, is_active, is_admin, created_at, updated_at, role
-                FROM users WHERE email = ?
-            """, (email.lower(),)).fetchone()
+            row = conn.execute(_SQL_GET_USER_BY_EMAIL, (email.lower(),)).fetchone()
             return dict(row) if row else None
 
     def create_user(self, email: str, name: str, password_hash: str,
@@ -1966,16 +3036,17 @@ class RACMDatabase:
         if 'is_admin' in updates:
             updates['role'] = 'admin' if updates['is_admin'] else 'auditor'
 
-        updates['updated_at'] = datetime.now().isoformat()
         set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
 
         with self._connection() as conn:
-            cursor = conn.execute(f"UPDATE users SET {set_clause} WHERE id = ?",
-                                  (*updates.values(), user_id))
+            cursor = conn.execute(
+                f"UPDATE users SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (*updates.values(), user_id))
             return cursor.rowcount > 0
 
     def delete_user(self, user_id: int) -> bool:
         """Delete a user (also removes their memberships via CASCADE)."""
+        self._invalidate_request_cache()
         with self._connection() as conn:
             cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
             return cursor.rowcount > 0
@@ -1985,8 +3056,7 @@ class RACMDatabase:
     def get_all_roles(self) -> List[Dict]:
         """Get all roles."""
         with self._connection() as conn:
-            rows = conn.execute("SELECT * FROM roles ORDER BY id").fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, "SELECT * FROM roles ORDER BY id")
 
     def get_role_by_id(self, role_id: int) -> Optional[Dict]:
         """Get a role by ID."""
@@ -2005,7 +3075,7 @@ class RACMDatabase:
     def get_audit_memberships(self, audit_id: int) -> List[Dict]:
         """Get all memberships for an audit with user and role details."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT
                     am.id, am.audit_id, am.user_id, am.role_id, am.created_at,
                     u.email, u.name as user_name, u.is_active,
@@ -2015,8 +3085,7 @@ class RACMDatabase:
                 JOIN roles r ON am.role_id = r.id
                 WHERE am.audit_id = ?
                 ORDER BY r.id, u.name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def get_audit_membership(self, user_id: int, audit_id: int) -> Optional[Dict]:
         """Get a specific user's membership for an audit."""
@@ -2042,7 +3111,7 @@ class RACMDatabase:
     def get_user_memberships(self, user_id: int) -> List[Dict]:
         """Get all audit memberships for a user with audit and role details."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT
                     am.id, am.audit_id, am.user_id, am.role_id, am.created_at,
                     a.title as audit_title, a.status as audit_status,
@@ -2052,8 +3121,7 @@ class RACMDatabase:
                 JOIN roles r ON am.role_id = r.id
                 WHERE am.user_id = ?
                 ORDER BY a.title
-            """, (user_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (user_id,))
 
     def add_audit_membership(self, audit_id: int, user_id: int, role_id: int) -> int:
         """Add a user to an audit with a role. Returns membership ID."""
@@ -2125,10 +3193,23 @@ class RACMDatabase:
     def get_risks_by_audit(self, audit_id: int) -> List[Dict]:
         """Get all risks for a specific audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT * FROM risks WHERE audit_id = ? ORDER BY risk_id
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
+
+    def get_risks_by_audit_with_links(self, audit_id: int) -> List[Dict]:
+        """Get an audit's risks, each with its flowchart name and task title.
+
+        Adds 'flowchart_name' and 'task_title' to every row in the same
+        statement, picking the newest link as get_as_spreadsheet() does.
+        """
+        with self._connection() as conn:
+            return self._fetch_dicts(conn, f"""
+                SELECT r.*,
+                       {_SQL_RISK_FLOWCHART_NAME} AS flowchart_name,
+                       {_SQL_RISK_TASK_TITLE} AS task_title
+                FROM risks r WHERE r.audit_id = ? ORDER BY r.risk_id
+            """, (audit_id,))
 
     def get_risks_by_audits(self, audit_ids: List[int]) -> List[Dict]:
         """Get all risks for multiple audits."""
@@ -2136,18 +3217,16 @@ class RACMDatabase:
             return []
         with self._connection() as conn:
             placeholders = ','.join('?' * len(audit_ids))
-            rows = conn.execute(f"""
+            return self._fetch_dicts(conn, f"""
                 SELECT * FROM risks WHERE audit_id IN ({placeholders}) ORDER BY risk_id
-            """, audit_ids).fetchall()
-            return [dict(row) for row in rows]
+            """, audit_ids)
 
     def get_issues_by_audit(self, audit_id: int) -> List[Dict]:
         """Get all issues for a specific audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT * FROM issues WHERE audit_id = ? ORDER BY issue_id
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def get_issues_by_audits(self, audit_ids: List[int]) -> List[Dict]:
         """Get all issues for multiple audits."""
@@ -2155,22 +3234,20 @@ class RACMDatabase:
             return []
         with self._connection() as conn:
             placeholders = ','.join('?' * len(audit_ids))
-            rows = conn.execute(f"""
+            return self._fetch_dicts(conn, f"""
                 SELECT * FROM issues WHERE audit_id IN ({placeholders}) ORDER BY issue_id
-            """, audit_ids).fetchall()
-            return [dict(row) for row in rows]
+            """, audit_ids)
 
     def get_tasks_by_audit(self, audit_id: int) -> List[Dict]:
         """Get all tasks for a specific audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT t.*, r.risk_id as linked_risk_id
                 FROM tasks t
                 LEFT JOIN risks r ON t.risk_id = r.id
                 WHERE t.audit_id = ?
                 ORDER BY t.created_at
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def get_tasks_by_audits(self, audit_ids: List[int]) -> List[Dict]:
         """Get all tasks for multiple audits."""
@@ -2178,35 +3255,32 @@ class RACMDatabase:
             return []
         with self._connection() as conn:
             placeholders = ','.join('?' * len(audit_ids))
-            rows = conn.execute(f"""
+            return self._fetch_dicts(conn, f"""
                 SELECT t.*, r.risk_id as linked_risk_id
                 FROM tasks t
                 LEFT JOIN risks r ON t.risk_id = r.id
                 WHERE t.audit_id IN ({placeholders})
                 ORDER BY t.created_at
-            """, audit_ids).fetchall()
-            return [dict(row) for row in rows]
+            """, audit_ids)
 
     def get_flowcharts_by_audit(self, audit_id: int) -> List[Dict]:
         """Get all flowcharts for a specific audit (metadata only)."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT id, name, risk_id, created_at, updated_at
                 FROM flowcharts WHERE audit_id = ? ORDER BY name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def get_test_documents_by_audit(self, audit_id: int) -> List[Dict]:
         """Get all test document metadata for a specific audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT td.*, r.risk_id as risk_code
                 FROM test_documents td
                 JOIN risks r ON td.risk_id = r.id
                 WHERE td.audit_id = ?
                 ORDER BY r.risk_id, td.doc_type
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def get_context_for_audit(self, audit_id: int) -> Dict:
         """Get full context for a specific audit (for AI)."""
@@ -2271,41 +3345,38 @@ class RACMDatabase:
         with self._connection() as conn:
             # Get audits
             placeholders = ','.join('?' * len(audit_ids))
-            audits = [dict(row) for row in conn.execute(f"""
+            audits = self._fetch_dicts(conn, f"""
                 SELECT * FROM audits WHERE id IN ({placeholders})
-            """, audit_ids).fetchall()]
+            """, audit_ids)
 
             # Get risks
-            risks = [dict(row) for row in conn.execute(f"""
+            risks = self._fetch_dicts(conn, f"""
                 SELECT * FROM risks WHERE audit_id IN ({placeholders}) ORDER BY risk_id
-            """, audit_ids).fetchall()]
+            """, audit_ids)
 
             # Get issues
-            issues_raw = conn.execute(f"""
+            issues = self._fetch_dicts(conn, f"""
                 SELECT * FROM issues WHERE audit_id IN ({placeholders}) ORDER BY issue_id
-            """, audit_ids).fetchall()
-            issues = []
-            for row in issues_raw:
-                issue = dict(row)
+            """, audit_ids)
+            for issue in issues:
                 issue['has_documentation'] = bool(issue.get('documentation', '').strip())
                 if 'documentation' in issue:
                     del issue['documentation']
-                issues.append(issue)
 
             # Get tasks
-            tasks = [dict(row) for row in conn.execute(f"""
+            tasks = self._fetch_dicts(conn, f"""
                 SELECT t.*, r.risk_id as linked_risk_id
                 FROM tasks t
                 LEFT JOIN risks r ON t.risk_id = r.id
                 WHERE t.audit_id IN ({placeholders})
                 ORDER BY t.created_at
-            """, audit_ids).fetchall()]
+            """, audit_ids)
 
             # Get flowcharts
-            flowcharts = [dict(row) for row in conn.execute(f"""
+            flowcharts = self._fetch_dicts(conn, f"""
                 SELECT id, name, risk_id FROM flowcharts
                 WHERE audit_id IN ({placeholders}) ORDER BY name
-            """, audit_ids).fetchall()]
+            """, audit_ids)
 
         return {
             'schema': self.get_schema(),
@@ -2354,14 +3425,13 @@ class RACMDatabase:
 
         # Viewers see only assigned audits (via audit_team or audit_viewers)
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT DISTINCT a.* FROM audits a
                 LEFT JOIN audit_team at ON a.id = at.audit_id AND at.user_id = ?
                 LEFT JOIN audit_viewers av ON a.id = av.audit_id AND av.viewer_user_id = ?
                 WHERE at.user_id IS NOT NULL OR av.viewer_user_id IS NOT NULL
                 ORDER BY a.title
-            """, (user_id, user_id)).fetchall()
-            return [dict(row) for row in rows]
+            """, (user_id, user_id))
 
     # ==================== AI QUERY HELPERS ====================
 
@@ -2377,195 +3447,81 @@ class RACMDatabase:
             raise ValueError("Only SELECT queries allowed")
 
         # Strip SQL comments that could hide malicious keywords
-        sql_no_comments = re.sub(r'/\*.*?\*/', '', sql_clean, flags=re.DOTALL)
-        sql_no_comments = re.sub(r'--.*$', '', sql_no_comments, flags=re.MULTILINE)
-        sql_upper = sql_no_comments.upper()
-
-        # Block dangerous keywords that could modify data or exfiltrate info
-        dangerous_keywords = [
-            'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER',
-            'TRUNCATE', 'EXEC', 'EXECUTE', 'GRANT', 'REVOKE', 'ATTACH',
-            'DETACH', 'PRAGMA', 'VACUUM', 'REINDEX',
-            'UNION',  # Prevent data exfiltration via UNION queries
-            'INTO',   # Prevent SELECT INTO
-            'LOAD',   # Prevent LOAD DATA
-            'OUTFILE' # Prevent file writes
-        ]
-        for keyword in dangerous_keywords:
-            # Check for keyword as whole word (not part of column name)
-            if re.search(rf'\b{keyword}\b', sql_upper):
-                raise ValueError(f"Query contains forbidden keyword: {keyword}")
+        sql_no_comments = _SQL_BLOCK_COMMENT_RE.sub('', sql_clean)
+        sql_no_comments = _SQL_LINE_COMMENT_RE.sub('', sql_no_comments)
+
+        # Block dangerous keywords (as whole words, not parts of column
+        # names) in a single pass over the query
+        keyword = _find_forbidden_keyword(sql_no_comments.upper())
+        if keyword:
+            raise ValueError(f"Query contains forbidden keyword: {keyword}")
 
         # Block statement terminators that could chain queries
         if ';' in sql_clean[:-1]:  # Allow trailing semicolon
             raise ValueError("Multiple statements not allowed")
 
         with self._connection() as conn:
-            rows = conn.execute(sql, params).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, sql, params)
 
     def get_schema(self) -> str:
         """Return database schema for AI context."""
-        return """
-DATABASE SCHEMA:
-
-TABLE risks (RACM - Risk and Control Matrix):
-  - id: INTEGER PRIMARY KEY
-  - risk_id: TEXT (e.g., 'R001', 'R002')
-  - risk: TEXT (risk description)
-  - control_id: TEXT
-  - control_owner: TEXT
-  - design_effectiveness_testing: TEXT
-  - design_effectiveness_conclusion: TEXT
-  - operational_effectiveness_test: TEXT
-  - operational_effectiveness_conclusion: TEXT
-  - status: TEXT (Not Complete, Effective, Not Effective)
-  - ready_for_review: INTEGER (0 or 1)
-  - reviewer: TEXT
-  - raise_issue: INTEGER (0 or 1)
-  - closed: INTEGER (0 or 1)
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-TABLE tasks (Kanban board items - for individual audit execution):
-  - id: INTEGER PRIMARY KEY
-  - title: TEXT
-  - description: TEXT
-  - priority: TEXT (low, medium, high)
-  - assignee: TEXT
-  - column_id: TEXT (planning, fieldwork, testing, review, complete)
-  - risk_id: INTEGER (FK to risks.id)
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-TABLE audits (Annual Audit Plan - all audits planned for the year):
-  - id: INTEGER PRIMARY KEY
-  - title: TEXT (audit name, e.g., 'IT Security Audit', 'Financial Controls Audit')
-  - description: TEXT (scope and objectives)
-  - audit_area: TEXT (IT, Finance, Operations, HR, Compliance, Other)
-  - owner: TEXT (lead auditor)
-  - planned_start: DATE (planned start date)
-  - planned_end: DATE (planned end date)
-  - actual_start: DATE (actual start date)
-  - actual_end: DATE (actual completion date)
-  - quarter: TEXT (Q1, Q2, Q3, Q4 - fiscal quarter)
-  - status: TEXT (planning, in_progress, fieldwork, review, complete)
-  - priority: TEXT (low, medium, high)
-  - estimated_hours: REAL (estimated effort)
-  - actual_hours: REAL (actual effort)
-  - risk_rating: TEXT (low, medium, high - audit risk level)
-  - notes: TEXT
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-USEFUL QUERIES FOR ANNUAL AUDIT PLAN:
-  - Audits by quarter: SELECT * FROM audits WHERE quarter = 'Q1'
-  - Audits in progress: SELECT * FROM audits WHERE status IN ('in_progress', 'fieldwork')
-  - Overdue audits: SELECT * FROM audits WHERE planned_end < DATE('now') AND status != 'complete'
-  - Workload by owner: SELECT owner, COUNT(*) as count, SUM(estimated_hours) as hours FROM audits GROUP BY owner
-  - Progress summary: SELECT status, COUNT(*) FROM audits GROUP BY status
-
-TABLE flowcharts (Process diagrams):
-  - id: INTEGER PRIMARY KEY
-  - name: TEXT (unique identifier)
-  - data: JSON (Drawflow format with nodes)
-  - risk_id: INTEGER (FK to risks.id)
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-TABLE test_documents (Working papers - DE/OE testing documentation):
-  - id: INTEGER PRIMARY KEY
-  - risk_id: INTEGER (FK to risks.id)
-  - doc_type: TEXT ('de_testing' or 'oe_testing')
-  - content: TEXT (HTML/rich text content)
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-TABLE issues (Issue Log - linked to RACM risks):
-  - id: INTEGER PRIMARY KEY
-  - issue_id: TEXT (e.g., 'ISS-001', 'ISS-002')
-  - risk_id: TEXT (links to risks.risk_id)
-  - title: TEXT
-  - description: TEXT
-  - severity: TEXT (Low, Medium, High, Critical)
-  - status: TEXT (Open, In Progress, Resolved, Closed)
-  - assigned_to: TEXT
-  - due_date: DATE
-  - documentation: TEXT (rich text/HTML - evidence and detailed findings)
-  - created_at: TIMESTAMP
-  - updated_at: TIMESTAMP
-
-TABLE issue_attachments (Evidence files for issues):
-  - id: INTEGER PRIMARY KEY
-  - issue_id: TEXT
-  - filename: TEXT
-  - original_filename: TEXT
-  - file_size: INTEGER
-  - mime_type: TEXT
-  - description: TEXT
-  - extracted_text: TEXT
-  - uploaded_at: TIMESTAMP
-
-TABLE risk_attachments (Evidence files for risks):
-  - id: INTEGER PRIMARY KEY
-  - risk_id: TEXT
-  - category: TEXT (planning, de, oe)
-  - filename: TEXT
-  - original_filename: TEXT
-  - file_size: INTEGER
-  - mime_type: TEXT
-  - description: TEXT
-  - extracted_text: TEXT
-  - uploaded_at: TIMESTAMP
-
-RELATIONSHIPS:
-  - tasks.risk_id -> risks.id (many tasks can link to one risk)
-  - flowcharts.risk_id -> risks.id (flowchart can document a risk's control)
-  - test_documents.risk_id -> risks.id (each risk can have DE and OE testing docs)
-  - issues.risk_id -> risks.risk_id (issues are raised against RACM risks)
-  - issue_attachments.issue_id -> issues.issue_id
-  - risk_attachments.risk_id -> risks.risk_id
-"""
+        return _SCHEMA_DOC
 
+    @_cached_query(_copy_context)
     def get_full_context(self) -> Dict:
-        """Get full database context for AI."""
-        flowcharts = self.get_all_flowcharts()
-        test_docs = self.get_all_test_documents_metadata()
-        issues = self.get_all_issues()
-
-        # Add documentation status to issues
-        issues_with_doc_status = []
-        for issue in issues:
-            issue_copy = dict(issue)
-            issue_copy['has_documentation'] = bool(issue.get('documentation', '').strip())
-            # Don't include full documentation in context - AI should use tool to read it
-            if 'documentation' in issue_copy:
-                del issue_copy['documentation']
-            issues_with_doc_status.append(issue_copy)
-
-        # Get attachment metadata
-        issue_attachments = self.get_all_attachments_metadata()
-        risk_attachments = self.get_all_risk_attachments_metadata()
+        """Get full database context for AI.
+
+        Cached like the other read-mostly queries: an AI turn that asks for
+        the context several times runs its dozen queries once, and any write
+        through this instance invalidates it. On a miss the queries are
+        independent, so they run on the context worker threads at once,
+        except inside an open transaction, whose uncommitted writes only
+        this thread's connection can see.
+        """
+        readers = {
+            'flowcharts': self.get_all_flowcharts,
+            'test_docs': self.get_all_test_documents_metadata,
+            # Issues carry a has_documentation flag instead of the text
+            # itself; the AI reads documentation through its tool
+            'issues': self.get_all_issues_summary,
+            'issue_attachments': self.get_all_attachments_metadata,
+            'risk_attachments': self.get_all_risk_attachments_metadata,
+            'risk_summary': self.get_risk_summary,
+            'task_summary': self.get_task_summary,
+            'issue_summary': self.get_issue_summary,
+            'audit_summary': self.get_audit_summary,
+            'risks': self.get_all_risks,
+            'tasks': self.get_all_tasks,
+            'audits': self.get_all_audits,
+        }
+        if str(self.db_path) == ':memory:' or getattr(self._thread_local, 'depth', 0):
+            # Every connection to :memory: is a separate, empty database, and
+            # other connections cannot see this thread's open transaction
+            results = {name: read() for name, read in readers.items()}
+        else:
+            executor = _get_context_executor()
+            futures = {name: executor.submit(read) for name, read in readers.items()}
+            results = {name: future.result() for name, future in futures.items()}
 
         return {
             'schema': self.get_schema(),
-            'risk_summary': self.get_risk_summary(),
-            'task_summary': self.get_task_summary(),
-            'issue_summary': self.get_issue_summary(),
-            'audit_summary': self.get_audit_summary(),
-            'flowchart_count': len(flowcharts),
-            'test_doc_count': len(test_docs),
-            'issue_attachment_count': len(issue_attachments),
-            'risk_attachment_count': len(risk_attachments),
-            'risks': self.get_all_risks(),
-            'tasks': self.get_all_tasks(),
-            'audits': self.get_all_audits(),  # Annual audit plan
-            'issues': issues_with_doc_status,  # With has_documentation flag
+            'risk_summary': results['risk_summary'],
+            'task_summary': results['task_summary'],
+            'issue_summary': results['issue_summary'],
+            'audit_summary': results['audit_summary'],
+            'flowchart_count': len(results['flowcharts']),
+            'test_doc_count': len(results['test_docs']),
+            'issue_attachment_count': len(results['issue_attachments']),
+            'risk_attachment_count': len(results['risk_attachments']),
+            'risks': results['risks'],
+            'tasks': results['tasks'],
+            'audits': results['audits'],  # Annual audit plan
+            'issues': results['issues'],  # With has_documentation flag
             'flowcharts': [{'name': f['name'], 'risk_id': f['risk_id']}
-                          for f in flowcharts],
-            'test_documents': test_docs,  # Metadata only - use tools to read full content
-            'issue_attachments': issue_attachments,  # File evidence attached to issues
-            'risk_attachments': risk_attachments  # File evidence attached to risks
+                          for f in results['flowcharts']],
+            'test_documents': results['test_docs'],  # Metadata only - use tools to read full content
+            'issue_attachments': results['issue_attachments'],  # File evidence attached to issues
+            'risk_attachments': results['risk_attachments']  # File evidence attached to risks
         }
 
     # ==================== IMPORT/EXPORT ====================
@@ -2573,13 +3529,11 @@ RELATIONSHIPS:
     def export_all(self) -> Dict:
         """Export entire database as JSON (for backup)."""
         with self._connection() as conn:
-            risks = [dict(r) for r in conn.execute("SELECT * FROM risks").fetchall()]
-            tasks = [dict(t) for t in conn.execute("SELECT * FROM tasks").fetchall()]
-            flowcharts = []
-            for row in conn.execute("SELECT * FROM flowcharts").fetchall():
-                f = dict(row)
-                f['data'] = json.loads(f['data'])
-                flowcharts.append(f)
+            risks = self._fetch_dicts(conn, "SELECT * FROM risks")
+            tasks = self._fetch_dicts(conn, "SELECT * FROM tasks")
+            flowcharts = self._fetch_dicts(conn, "SELECT * FROM flowcharts")
+            for f in flowcharts:
+                f['data'] = _json_loads(f['data'])
 
             return {
                 'exported_at': datetime.now().isoformat(),
@@ -2588,40 +3542,80 @@ RELATIONSHIPS:
                 'flowcharts': flowcharts
             }
 
+    def export_all_json(self) -> str:
+        """Export the database as the JSON text of export_all().
+
+        Flowchart data is already stored as JSON, so each document is spliced
+        into the output verbatim instead of being parsed into Python objects
+        and encoded again.
+        """
+        with self._connection() as conn:
+            risks = self._fetch_dicts(conn, "SELECT * FROM risks")
+            tasks = self._fetch_dicts(conn, "SELECT * FROM tasks")
+            flowcharts = self._fetch_dicts(conn, "SELECT * FROM flowcharts")
+
+        flowchart_parts = []
+        for f in flowcharts:
+            data = f.pop('data')
+            flowchart_parts.append(f'{_json_dumps(f)[:-1]},"data":{data or "null"}}}')
+
+        return (
+            f'{{"exported_at":{_json_dumps(datetime.now().isoformat())},'
+            f'"risks":{_json_dumps(risks)},"tasks":{_json_dumps(tasks)},'
+            f'"flowcharts":[{",".join(flowchart_parts)}]}}'
+        )
+
     def import_all(self, data: Dict, clear_existing: bool = False) -> None:
         """Import data from JSON export."""
+        # Replaced risks may come back under different ids
+        self._forget_risk_pk()
         with self._connection() as conn:
             if clear_existing:
                 conn.execute("DELETE FROM flowcharts")
                 conn.execute("DELETE FROM tasks")
                 conn.execute("DELETE FROM risks")
 
-            # Import risks
-            for risk in data.get('risks', []):
-                conn.execute("""
+            # Each table goes in as one executemany batch; the statement is
+            # prepared once and the whole import is a single transaction.
+            # Empty sections are skipped without preparing their statement.
+            risk_rows = [(risk.get('id'), risk['risk_id'], risk.get('risk_description', ''),
+                          risk.get('control_description', ''), risk.get('control_owner', ''),
+                          risk.get('frequency', ''), risk.get('status', 'Not Tested'))
+                         for risk in data.get('risks', [])]
+            if risk_rows:
+                conn.executemany("""
                     INSERT OR REPLACE INTO risks
                     (id, risk_id, risk_description, control_description, control_owner, frequency, status)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (risk.get('id'), risk['risk_id'], risk.get('risk_description', ''),
-                      risk.get('control_description', ''), risk.get('control_owner', ''),
-                      risk.get('frequency', ''), risk.get('status', 'Not Tested')))
-
-            # Import tasks
-            for task in data.get('tasks', []):
-                conn.execute("""
+                """, risk_rows)
+
+            task_rows = [(task.get('id'), task['title'], task.get('description', ''),
+                          task.get('priority', 'medium'), task.get('assignee', ''),
+                          task.get('column_id', 'planning'), task.get('risk_id'))
+                         for task in data.get('tasks', [])]
+            if task_rows:
+                conn.executemany("""
                     INSERT OR REPLACE INTO tasks
                     (id, title, description, priority, assignee, column_id, risk_id)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (task.get('id'), task['title'], task.get('description', ''),
-                      task.get('priority', 'medium'), task.get('assignee', ''),
-                      task.get('column_id', 'planning'), task.get('risk_id')))
-
-            # Import flowcharts
-            for fc in data.get('flowcharts', []):
-                conn.execute("""
+                """, task_rows)
+
+            flowchart_rows = [(fc.get('id'), fc['name'], _json_dumps(fc['data']), fc.get('risk_id'))
+                              for fc in data.get('flowcharts', [])]
+            ids = [row[0] for row in flowchart_rows if row[0] is not None]
+            if ids and not clear_existing:
+                # Re-importing a backup leaves flowcharts already stored exactly
+                # as exported alone, rather than rewriting their JSON documents
+                unchanged = set(self._fetch_tuples(conn, """
+                    SELECT id, name, data, risk_id FROM flowcharts
+                    WHERE audit_id IS NULL AND id IN (SELECT value FROM json_each(?))
+                """, (_json_dumps(ids),)))
+                flowchart_rows = [row for row in flowchart_rows if row not in unchanged]
+            if flowchart_rows:
+                conn.executemany("""
                     INSERT OR REPLACE INTO flowcharts (id, name, data, risk_id)
                     VALUES (?, ?, ?, ?)
-                """, (fc.get('id'), fc['name'], json.dumps(fc['data']), fc.get('risk_id')))
+                """, flowchart_rows)
 
     # ==================== SPREADSHEET COMPATIBILITY ====================
 
@@ -2631,37 +3625,26 @@ RELATIONSHIPS:
         Columns: Risk ID, Risk, Control ID, Control Owner, DE Testing, DE Conclusion,
                  OE Testing, OE Conclusion, Status, Flowchart, Task
         """
-        risks = self.get_all_risks()
-
-        # Batch load flowcharts and tasks to avoid N+1 queries
-        with self._connection() as conn:
-            flowcharts = conn.execute(
-                "SELECT risk_id, name FROM flowcharts WHERE risk_id IS NOT NULL"
-            ).fetchall()
-            tasks = conn.execute(
-                "SELECT risk_id, title FROM tasks WHERE risk_id IS NOT NULL"
-            ).fetchall()
-
-        # Build lookup dictionaries
-        fc_by_risk = {row['risk_id']: row['name'] for row in flowcharts}
-        task_by_risk = {row['risk_id']: row['title'] for row in tasks}
-
-        rows = []
-        for r in risks:
-            rows.append([
-                r['risk_id'],
-                r['risk'] or '',
-                r['control_id'] or '',
-                r['control_owner'] or '',
-                r['design_effectiveness_testing'] or '',
-                r['design_effectiveness_conclusion'] or '',
-                r['operational_effectiveness_test'] or '',
-                r['operational_effectiveness_conclusion'] or '',
-                r['status'] or 'Not Complete',
-                fc_by_risk.get(r['id'], ''),
-                task_by_risk.get(r['id'], '')
-            ])
-        return rows
+        # One statement reads just the sheet's columns; each correlated
+        # lookup is a seek on idx_flowcharts_risk / idx_tasks_risk. The
+        # newest flowchart or task wins when a risk has several.
+        with self._connection() as conn:
+            risks = self._fetch_tuples(conn, f"""
+                SELECT r.risk_id, r.risk, r.control_id, r.control_owner,
+                       r.design_effectiveness_testing, r.design_effectiveness_conclusion,
+                       r.operational_effectiveness_test, r.operational_effectiveness_conclusion,
+                       r.status, {_SQL_RISK_FLOWCHART_NAME}, {_SQL_RISK_TASK_TITLE}
+                FROM risks r
+                ORDER BY r.risk_id
+            """)
+
+        return [
+            [risk_id, risk or '', control_id or '', owner or '', de_testing or '',
+             de_conclusion or '', oe_testing or '', oe_conclusion or '',
+             status or 'Not Complete', flowchart or '', task or '']
+            for (risk_id, risk, control_id, owner, de_testing, de_conclusion,
+                 oe_testing, oe_conclusion, status, flowchart, task) in risks
+        ]
 
     def save_from_spreadsheet(self, data: List[List], audit_id: int = None,
                               created_by: int = None) -> None:
@@ -2678,64 +3661,71 @@ RELATIONSHIPS:
         if not data or len(data) < 1:
             return
 
-        for row in data:
-            if len(row) >= 1 and row[0]:  # Must have risk_id at minimum
-                risk_id = row[0]
-                existing = self.get_risk(risk_id)
-
-                if existing:
-                    self.update_risk(
-                        risk_id,
-                        risk=row[1] if len(row) > 1 else '',
-                        control_id=row[2] if len(row) > 2 else '',
-                        control_owner=row[3] if len(row) > 3 else '',
-                        design_effectiveness_testing=row[4] if len(row) > 4 else '',
-                        design_effectiveness_conclusion=row[5] if len(row) > 5 else '',
-                        operational_effectiveness_test=row[6] if len(row) > 6 else '',
-                        operational_effectiveness_conclusion=row[7] if len(row) > 7 else '',
-                        status=row[8] if len(row) > 8 else 'Not Complete'
-                    )
-                else:
-                    self.create_risk(
-                        risk_id=risk_id,
-                        risk=row[1] if len(row) > 1 else '',
-                        control_id=row[2] if len(row) > 2 else '',
-                        control_owner=row[3] if len(row) > 3 else '',
-                        design_effectiveness_testing=row[4] if len(row) > 4 else '',
-                        design_effectiveness_conclusion=row[5] if len(row) > 5 else '',
-                        operational_effectiveness_test=row[6] if len(row) > 6 else '',
-                        operational_effectiveness_conclusion=row[7] if len(row) > 7 else '',
-                        status=row[8] if len(row) > 8 else 'Not Complete',
-                        audit_id=audit_id,
-                        created_by=created_by
-                    )
+        # Sheet columns 1-8 in _RISK_UPDATE_COLUMNS order
+        sheet_columns = _RISK_UPDATE_COLUMNS[:8]
+        to_insert = []
+        to_update = []
+
+        with self._connection() as conn:
+            existing = {row[0] for row in conn.execute("SELECT risk_id FROM risks")}
+
+            for row in data:
+                if len(row) >= 1 and row[0]:  # Must have risk_id at minimum
+                    risk_id = row[0]
+                    values = [row[i] if len(row) > i else '' for i in range(1, 8)]
+                    values.append(row[8] if len(row) > 8 else 'Not Complete')
+
+                    if risk_id in existing:
+                        params = _masked_update_params(_RISK_UPDATE_COLUMNS,
+                                                       dict(zip(sheet_columns, values)))
+                        to_update.append((*params, risk_id))
+                    else:
+                        # A repeated new id updates the row its first line created
+                        existing.add(risk_id)
+                        self._forget_risk_pk(risk_id)
+                        to_insert.append((risk_id, *values, 0, '', 0, 0,
+                                          audit_id, 'draft', created_by))
+
+            # Inserts go first so repeated ids' updates apply on top of them
+            if to_insert:
+                conn.executemany(_SQL_INSERT_RISK, to_insert)
+            if to_update:
+                conn.executemany(_SQL_UPDATE_RISK, to_update)
 
     def get_kanban_format(self) -> Dict:
-        """Get tasks in kanban board format (for backward compatibility)."""
+        """Get tasks in kanban board format (for backward compatibility).
+
+        Reads only the fields a card shows, for all columns in one query.
+        """
         columns = ['planning', 'fieldwork', 'testing', 'review', 'complete']
-        board = {
-            'name': 'Audit Plan',
-            'columns': []
-        }
+        buckets = {col_id: [] for col_id in columns}
 
-        for col_id in columns:
-            tasks = self.get_tasks_by_column(col_id)
-            board['columns'].append({
-                'id': col_id,
-                'title': col_id.title(),
-                'items': [
-                    {
-                        'id': str(t['id']),
-                        'title': t['title'],
-                        'description': t['description'] or '',
-                        'priority': t['priority'] or 'medium',
-                        'assignee': t['assignee'] or '',
-                        'risk_id': t['linked_risk_id'] or ''
-                    }
-                    for t in tasks
-                ]
+        with self._connection() as conn:
+            tasks = self._fetch_tuples(conn, """
+                SELECT t.id, t.title, t.description, t.priority, t.assignee, t.column_id,
+                       r.risk_id as linked_risk_id
+                FROM tasks t
+                LEFT JOIN risks r ON t.risk_id = r.id
+                WHERE t.column_id IN (?, ?, ?, ?, ?)
+                ORDER BY t.created_at, t.id
+            """, columns)
+        for task_id, title, description, priority, assignee, column_id, linked_risk_id in tasks:
+            buckets[column_id].append({
+                'id': str(task_id),
+                'title': title,
+                'description': description or '',
+                'priority': priority or 'medium',
+                'assignee': assignee or '',
+                'risk_id': linked_risk_id or ''
             })
 
+        board = {
+            'name': 'Audit Plan',
+            'columns': [
+                {'id': col_id, 'title': col_id.title(), 'items': buckets[col_id]}
+                for col_id in columns
+            ]
+        }
         return {'boards': {'default': board}}
 
     # ==================== WORKFLOW STATE TRANSITIONS ====================
@@ -2812,14 +3802,13 @@ RELATIONSHIPS:
     def get_record_history(self, record_type: str, record_id: int) -> List[Dict]:
         """Get the state transition history for a record."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT h.*, u.name as performed_by_name, u.email as performed_by_email
                 FROM record_state_history h
                 LEFT JOIN users u ON h.performed_by = u.id
                 WHERE h.record_type = ? AND h.record_id = ?
                 ORDER BY h.performed_at DESC
-            """, (record_type, record_id)).fetchall()
-            return [dict(row) for row in rows]
+            """, (record_type, record_id))
 
     def get_all_state_history(self, filters: Dict = None) -> List[Dict]:
         """Get all state history entries with optional filters."""
@@ -2851,15 +3840,14 @@ RELATIONSHIPS:
         query += " ORDER BY h.performed_at DESC"
 
         with self._connection() as conn:
-            rows = conn.execute(query, params).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, query, params)
 
     # ==================== AUDIT VIEWERS ====================
 
     def get_audit_viewers(self, audit_id: int) -> List[Dict]:
         """Get all viewers for an audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT av.*, u.name as viewer_name, u.email as viewer_email,
                        g.name as granted_by_name
                 FROM audit_viewers av
@@ -2867,8 +3855,7 @@ RELATIONSHIPS:
                 LEFT JOIN users g ON av.granted_by = g.id
                 WHERE av.audit_id = ?
                 ORDER BY av.granted_at DESC
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def add_audit_viewer(self, audit_id: int, viewer_user_id: int,
                         granted_by: int) -> int:
@@ -2876,6 +3863,7 @@ RELATIONSHIPS:
 
         Adds to both audit_team (authoritative) and audit_viewers (legacy compatibility).
         """
+        self._invalidate_request_cache()
         with self._connection() as conn:
             # Add to audit_team (authoritative)
             cursor = conn.execute("""
@@ -2894,6 +3882,7 @@ RELATIONSHIPS:
 
         Removes from both audit_team (authoritative) and audit_viewers (legacy).
         """
+        self._invalidate_request_cache()
         with self._connection() as conn:
             # Remove from audit_team (authoritative)
             cursor = conn.execute("""
@@ -2912,48 +3901,55 @@ RELATIONSHIPS:
 
         Checks audit_team (authoritative) and audit_viewers (legacy fallback).
         """
-        with self._connection() as conn:
-            # Check audit_team first (authoritative after migration)
-            row = conn.execute("""
-                SELECT 1 FROM audit_team
-                WHERE audit_id = ? AND user_id = ? AND team_role = 'viewer'
-            """, (audit_id, user_id)).fetchone()
-            if row:
-                return True
-            # Fallback to audit_viewers (legacy, for unmigrated data)
-            row = conn.execute("""
-                SELECT 1 FROM audit_viewers
-                WHERE audit_id = ? AND viewer_user_id = ?
-            """, (audit_id, user_id)).fetchone()
-            return row is not None
+        return bool(self.get_user_audit_permissions_mask(user_id, audit_id) & AUDIT_MASK_VIEWER)
 
     def get_audit_viewers_list(self, audit_id: int) -> List[Dict]:
         """Get all viewers assigned to an audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, """
                 SELECT av.id, av.viewer_user_id as user_id, av.granted_at,
                        u.name as user_name, u.email as user_email
                 FROM audit_viewers av
                 JOIN users u ON av.viewer_user_id = u.id
                 WHERE av.audit_id = ?
                 ORDER BY u.name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id,))
 
     def add_viewer_to_audit(self, audit_id: int, user_id: int, granted_by: int = None) -> int:
         """Add a viewer to an audit. Returns new ID or -1 if already exists."""
+        self._invalidate_request_cache()
         try:
             with self._connection() as conn:
-                cursor = conn.execute("""
-                    INSERT INTO audit_viewers (audit_id, viewer_user_id, granted_by)
+                row = conn.execute("""
+                    INSERT OR IGNORE INTO audit_viewers (audit_id, viewer_user_id, granted_by)
                     VALUES (?, ?, ?)
-                """, (audit_id, user_id, granted_by))
-                return cursor.lastrowid
+                    RETURNING id
+                """, (audit_id, user_id, granted_by)).fetchone()
+                return row[0] if row else -1  # No row: already exists
         except sqlite3.IntegrityError:
-            return -1  # Already exists
+            return -1  # Unknown audit or user
+
+    def bulk_add_viewers_to_audit(self, audit_id: int, user_ids: Iterable[int],
+                                  granted_by: int = None) -> int:
+        """Add several viewers to an audit in one transaction.
+
+        Existing viewers are skipped. Returns the number of viewers added.
+        """
+        params = [(audit_id, user_id, granted_by) for user_id in user_ids]
+        if not params:
+            return 0
+
+        self._invalidate_request_cache()
+        with self._connection() as conn:
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO audit_viewers (audit_id, viewer_user_id, granted_by)
+                VALUES (?, ?, ?)
+            """, params)
+            return cursor.rowcount
 
     def remove_viewer_from_audit(self, audit_id: int, user_id: int) -> bool:
         """Remove a viewer from an audit."""
+        self._invalidate_request_cache()
         with self._connection() as conn:
             cursor = conn.execute("""
                 DELETE FROM audit_viewers
@@ -2966,84 +3962,112 @@ RELATIONSHIPS:
     def update_audit_assignment(self, audit_id: int, auditor_id: int = None,
                                reviewer_id: int = None) -> bool:
         """Update auditor and/or reviewer assignment for an audit (legacy single assignment)."""
-        updates = {}
-        if auditor_id is not None:
-            updates['auditor_id'] = auditor_id
-        if reviewer_id is not None:
-            updates['reviewer_id'] = reviewer_id
-
-        if not updates:
+        if auditor_id is not None and reviewer_id is not None:
+            sql, params = _SQL_UPD_BOTH, (auditor_id, reviewer_id, audit_id)
+        elif auditor_id is not None:
+            sql, params = _SQL_UPD_AUDITOR, (auditor_id, audit_id)
+        elif reviewer_id is not None:
+            sql, params = _SQL_UPD_REVIEWER, (reviewer_id, audit_id)
+        else:
             return False
 
-        set_clause = ", ".join(f"{k} = ?" for k in updates.keys())
-
         with self._connection() as conn:
-            cursor = conn.execute(
-                f"UPDATE audits SET {set_clause} WHERE id = ?",
-                (*updates.values(), audit_id)
-            )
+            cursor = conn.execute(sql, params)
             return cursor.rowcount > 0
 
-    def get_audits_by_auditor(self, auditor_id: int) -> List[Dict]:
-        """Get all audits where user is assigned as auditor (via audit_team)."""
+    def get_audits_for_user_team_member(self, user_id: int) -> Dict[str, List[Dict]]:
+        """Get the audits a user is on as auditor and as reviewer, from one query.
+
+        Returns {'auditor': [...], 'reviewer': [...]}, each ordered by title.
+        """
+        result = {'auditor': [], 'reviewer': []}
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT DISTINCT a.* FROM audits a
+            rows = self._fetch_dicts(conn, """
+                SELECT a.*, at.team_role AS team_role FROM audits a
                 JOIN audit_team at ON a.id = at.audit_id
-                WHERE at.user_id = ? AND at.team_role = 'auditor'
+                WHERE at.user_id = ? AND at.team_role IN ('auditor', 'reviewer')
                 ORDER BY a.title
-            """, (auditor_id,)).fetchall()
-            return [dict(row) for row in rows]
+            """, (user_id,))
+        for audit in rows:
+            result[audit.pop('team_role')].append(audit)
+        return result
+
+    def get_audits_by_auditor(self, auditor_id: int) -> List[Dict]:
+        """Get all audits where user is assigned as auditor (via audit_team)."""
+        return self.get_audits_for_user_team_member(auditor_id)['auditor']
 
     def get_audits_by_reviewer(self, reviewer_id: int) -> List[Dict]:
         """Get all audits where user is assigned as reviewer (via audit_team)."""
-        with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT DISTINCT a.* FROM audits a
-                JOIN audit_team at ON a.id = at.audit_id
-                WHERE at.user_id = ? AND at.team_role = 'reviewer'
-                ORDER BY a.title
-            """, (reviewer_id,)).fetchall()
-            return [dict(row) for row in rows]
+        return self.get_audits_for_user_team_member(reviewer_id)['reviewer']
 
     # ==================== AUDIT TEAM (MULTI-ASSIGNMENT) ====================
 
     def get_audit_team(self, audit_id: int) -> List[Dict]:
         """Get all team members (auditors and reviewers) for an audit."""
         with self._connection() as conn:
-            rows = conn.execute("""
+            return self._fetch_dicts(conn, _SQL_AUDIT_TEAM, (audit_id,))
+
+    def get_team_members_for_audits(self, audit_ids: Iterable[int]) -> Dict[int, List[Dict]]:
+        """Get team members for several audits in one query, keyed by audit ID.
+
+        Each list has the same rows and order as get_audit_team(); audits with
+        no team get an empty list.
+        """
+        audit_ids = list(dict.fromkeys(audit_ids))
+        members = {audit_id: [] for audit_id in audit_ids}
+        if not audit_ids:
+            return members
+
+        placeholders = ",".join("?" * len(audit_ids))
+        with self._connection() as conn:
+            rows = self._fetch_dicts(conn, f"""
                 SELECT at.id, at.audit_id, at.user_id, at.team_role, at.assigned_at,
                        u.name as user_name, u.email as user_email
                 FROM audit_team at
                 JOIN users u ON at.user_id = u.id
-                WHERE at.audit_id = ?
-                ORDER BY at.team_role, u.name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+                WHERE at.audit_id IN ({placeholders})
+                ORDER BY at.audit_id, at.team_role, u.name
+            """, audit_ids)
+        for row in rows:
+            members[row['audit_id']].append(row)
+        return members
+
+    def get_team_counts_for_audits(self, audit_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+        """Count team members per role for several audits in one query.
+
+        Returns {audit_id: {team_role: count}}; audits with no team map to {}.
+        """
+        audit_ids = list(dict.fromkeys(audit_ids))
+        counts = {audit_id: {} for audit_id in audit_ids}
+        if not audit_ids:
+            return counts
+
+        placeholders = ",".join("?" * len(audit_ids))
+        with self._connection() as conn:
+            rows = self._fetch_tuples(conn, f"""
+                SELECT audit_id, team_role, COUNT(*) FROM audit_team
+                WHERE audit_id IN ({placeholders})
+                GROUP BY audit_id, team_role
+            """, audit_ids)
+        for audit_id, team_role, count in rows:
+            counts[audit_id][team_role] = count
+        return counts
 
     def get_audit_auditors(self, audit_id: int) -> List[Dict]:
         """Get all auditors assigned to an audit."""
-        with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT at.id, at.user_id, u.name as user_name, u.email as user_email
-                FROM audit_team at
-                JOIN users u ON at.user_id = u.id
-                WHERE at.audit_id = ? AND at.team_role = 'auditor'
-                ORDER BY u.name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+        return [m for m in self.get_audit_team(audit_id) if m['team_role'] == 'auditor']
 
     def get_audit_reviewers(self, audit_id: int) -> List[Dict]:
         """Get all reviewers assigned to an audit (for reviewer selection dropdown)."""
-        with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT at.id, at.user_id, u.name as user_name, u.email as user_email
-                FROM audit_team at
-                JOIN users u ON at.user_id = u.id
-                WHERE at.audit_id = ? AND at.team_role = 'reviewer'
-                ORDER BY u.name
-            """, (audit_id,)).fetchall()
-            return [dict(row) for row in rows]
+        return [m for m in self.get_audit_team(audit_id) if m['team_role'] == 'reviewer']
+
+    def get_audit_team_split(self, audit_id: int) -> Dict[str, List[Dict]]:
+        """Get an audit's auditors and reviewers from a single team query."""
+        team = self.get_audit_team(audit_id)
+        return {
+            'auditors': [m for m in team if m['team_role'] == 'auditor'],
+            'reviewers': [m for m in team if m['team_role'] == 'reviewer']
+        }
 
     def add_to_audit_team(self, audit_id: int, user_id: int, team_role: str,
                          assigned_by: int = None) -> int:
@@ -3051,18 +4075,42 @@ RELATIONSHIPS:
         if team_role not in ('auditor', 'reviewer'):
             raise ValueError("team_role must be 'auditor' or 'reviewer'")
 
+        self._invalidate_request_cache()
         try:
             with self._connection() as conn:
-                cursor = conn.execute("""
-                    INSERT INTO audit_team (audit_id, user_id, team_role, assigned_by)
+                row = conn.execute("""
+                    INSERT OR IGNORE INTO audit_team (audit_id, user_id, team_role, assigned_by)
                     VALUES (?, ?, ?, ?)
-                """, (audit_id, user_id, team_role, assigned_by))
-                return cursor.lastrowid
+                    RETURNING id
+                """, (audit_id, user_id, team_role, assigned_by)).fetchone()
+                return row[0] if row else -1  # No row: already exists
         except sqlite3.IntegrityError:
-            return -1  # Already exists
+            return -1  # Unknown audit or user
+
+    def bulk_add_to_audit_team(self, audit_id: int,
+                               members: Iterable[Tuple[int, str, Optional[int]]]) -> int:
+        """Add several (user_id, team_role, assigned_by) memberships in one transaction.
+
+        Existing memberships are skipped. Returns the number of memberships added.
+        """
+        params = [(audit_id, user_id, team_role, assigned_by)
+                  for user_id, team_role, assigned_by in members]
+        if not params:
+            return 0
+        if any(p[2] not in ('auditor', 'reviewer') for p in params):
+            raise ValueError("team_role must be 'auditor' or 'reviewer'")
+
+        self._invalidate_request_cache()
+        with self._connection() as conn:
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO audit_team (audit_id, user_id, team_role, assigned_by)
+                VALUES (?, ?, ?, ?)
+            """, params)
+            return cursor.rowcount
 
     def remove_from_audit_team(self, audit_id: int, user_id: int, team_role: str = None) -> bool:
         """Remove a user from an audit team. If team_role is None, removes all roles."""
+        self._invalidate_request_cache()
         with self._connection() as conn:
             if team_role:
                 cursor = conn.execute("""
@@ -3076,33 +4124,56 @@ RELATIONSHIPS:
                 """, (audit_id, user_id))
             return cursor.rowcount > 0
 
+    def remove_users_from_audit_team(self, audit_id: int, user_ids: Iterable[int],
+                                     team_role: str = None) -> int:
+        """Remove several users from an audit team in one statement.
+
+        If team_role is None, removes all their roles. Returns the number of
+        memberships removed.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+
+        self._invalidate_request_cache()
+        placeholders = ",".join("?" * len(user_ids))
+        query = f"DELETE FROM audit_team WHERE audit_id = ? AND user_id IN ({placeholders})"
+        params = [audit_id, *user_ids]
+        if team_role:
+            query += " AND team_role = ?"
+            params.append(team_role)
+
+        with self._connection() as conn:
+            cursor = conn.execute(query, params)
+            return cursor.rowcount
+
+    def get_user_audit_permissions_mask(self, user_id: int, audit_id: int) -> int:
+        """Get a user's memberships on an audit as a bitmask of AUDIT_MASK_* flags.
+
+        One query answers every is_*_on_audit / is_viewer_of_audit check:
+        AUDIT_MASK_VIEWER covers both audit_team viewers and the legacy
+        audit_viewers table; AUDIT_MASK_TEAM_MEMBER is set for any audit_team row.
+        """
+        def query():
+            with self._connection() as conn:
+                row = conn.execute(_SQL_AUDIT_PERMISSIONS_MASK, (audit_id, user_id)).fetchone()
+                return row[0]
+
+        return self._request_memoize(('permissions_mask', user_id, audit_id), query)
+
     def is_auditor_on_audit(self, user_id: int, audit_id: int) -> bool:
         """Check if a user is assigned as auditor on an audit."""
-        with self._connection() as conn:
-            row = conn.execute("""
-                SELECT 1 FROM audit_team
-                WHERE audit_id = ? AND user_id = ? AND team_role = 'auditor'
-            """, (audit_id, user_id)).fetchone()
-            return row is not None
+        return bool(self.get_user_audit_permissions_mask(user_id, audit_id) & AUDIT_MASK_AUDITOR)
 
     def is_reviewer_on_audit(self, user_id: int, audit_id: int) -> bool:
         """Check if a user is assigned as reviewer on an audit."""
-        with self._connection() as conn:
-            row = conn.execute("""
-                SELECT 1 FROM audit_team
-                WHERE audit_id = ? AND user_id = ? AND team_role = 'reviewer'
-            """, (audit_id, user_id)).fetchone()
-            return row is not None
+        return bool(self.get_user_audit_permissions_mask(user_id, audit_id) & AUDIT_MASK_REVIEWER)
 
     def is_team_member_on_audit(self, user_id: int, audit_id: int) -> bool:
         """Check if a user is assigned as either auditor or reviewer on an audit."""
-        with self._connection() as conn:
-            row = conn.execute("""
-                SELECT 1 FROM audit_team
-                WHERE audit_id = ? AND user_id = ?
-            """, (audit_id, user_id)).fetchone()
-            return row is not None
+        return bool(self.get_user_audit_permissions_mask(user_id, audit_id) & AUDIT_MASK_TEAM_MEMBER)
 
+    @_cached_query(lambda audits: [dict(audit) for audit in audits])
     def get_audits_for_user_role(self, user_id: int, user_role: str, is_admin: bool = False) -> List[Dict]:
         """Get audits based on user's global role.
 
@@ -3113,32 +4184,39 @@ RELATIONSHIPS:
         Note: Global 'reviewer' role has been consolidated into 'auditor'.
         Per-audit reviewer assignments remain in audit_team table.
         """
-        if is_admin:
-            return self.get_all_audits()
-
-        # Auditors can view ALL audits
-        # (includes 'reviewer' for backwards compatibility with any legacy data)
-        if user_role in ('auditor', 'reviewer'):
-            return self.get_all_audits()
-
-        # Viewers can only see audits they're explicitly assigned to
+        # Admins and auditors (including legacy 'reviewer') see every audit in
+        # plan order; viewers see only audits they are assigned to, by title.
         with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT DISTINCT a.* FROM audits a
-                JOIN audit_viewers av ON a.id = av.audit_id
-                WHERE av.viewer_user_id = ?
-                ORDER BY a.title
-            """, (user_id,)).fetchall()
-            return [dict(row) for row in rows]
+            return self._fetch_dicts(conn, """
+                WITH policy AS (
+                    SELECT (? OR ? IN ('auditor', 'reviewer')) AS full_access
+                )
+                SELECT a.* FROM audits a, policy p
+                WHERE p.full_access
+                   OR EXISTS (SELECT 1 FROM audit_viewers av
+                              WHERE av.audit_id = a.id AND av.viewer_user_id = ?)
+                ORDER BY
+                    CASE WHEN p.full_access THEN
+                        CASE a.quarter
+                            WHEN 'Q1' THEN 1
+                            WHEN 'Q2' THEN 2
+                            WHEN 'Q3' THEN 3
+                            WHEN 'Q4' THEN 4
+                            ELSE 5
+                        END
+                    END,
+                    CASE WHEN p.full_access THEN a.planned_start END,
+                    a.title
+            """, (bool(is_admin), user_role, user_id))
 
     def get_user_team_roles_on_audit(self, user_id: int, audit_id: int) -> List[str]:
         """Get all team roles a user has on an audit (can be both auditor and reviewer)."""
-        with self._connection() as conn:
-            rows = conn.execute("""
-                SELECT team_role FROM audit_team
-                WHERE audit_id = ? AND user_id = ?
-            """, (audit_id, user_id)).fetchall()
-            return [row['team_role'] for row in rows]
+        def query():
+            with self._connection() as conn:
+                rows = self._fetch_tuples(conn, _SQL_USER_TEAM_ROLES, (audit_id, user_id))
+                return tuple(role for role, in rows)
+
+        return list(self._request_memoize(('team_roles', user_id, audit_id), query))
 
     # ==================== WORKFLOW QUERIES ====================
 
@@ -3147,119 +4225,116 @@ RELATIONSHIPS:
         """Get all records of a type with a specific status."""
         table = 'risks' if record_type == 'risk' else 'issues'
         with self._connection() as conn:
-            rows = conn.execute(f"""
+            return self._fetch_dicts(conn, f"""
                 SELECT * FROM {table}
                 WHERE audit_id = ? AND record_status = ?
                 ORDER BY id
-            """, (audit_id, status)).fetchall()
-            return [dict(row) for row in rows]
+            """, (audit_id, status))
 
     def get_records_in_review(self, reviewer_id: int) -> Dict[str, List[Dict]]:
         """Get all records in review for a specific reviewer."""
         with self._connection() as conn:
-            risks = conn.execute("""
-                SELECT r.*, a.title as audit_title
-                FROM risks r
-                JOIN audits a ON r.audit_id = a.id
-                WHERE a.reviewer_id = ? AND r.record_status = 'in_review'
-                ORDER BY r.audit_id, r.id
-            """, (reviewer_id,)).fetchall()
-
-            issues = conn.execute("""
-                SELECT i.*, a.title as audit_title
-                FROM issues i
-                JOIN audits a ON i.audit_id = a.id
-                WHERE a.reviewer_id = ? AND i.record_status = 'in_review'
-                ORDER BY i.audit_id, i.id
-            """, (reviewer_id,)).fetchall()
-
-            return {
-                'risks': [dict(row) for row in risks],
-                'issues': [dict(row) for row in issues]
-            }
+            return self._query_risks_and_issues(
+                conn,
+                extra_columns="a.title as audit_title",
+                joins="JOIN audits a ON t.audit_id = a.id",
+                where="a.reviewer_id = ? AND t.record_status = 'in_review'",
+                order_by="audit_id, id",
+                params=(reviewer_id,)
+            )
 
     def get_records_in_admin_hold(self) -> Dict[str, List[Dict]]:
         """Get all records currently in admin hold."""
         with self._connection() as conn:
-            risks = conn.execute("""
-                SELECT r.*, a.title as audit_title,
-                       u.name as locked_by_name
-                FROM risks r
-                JOIN audits a ON r.audit_id = a.id
-                LEFT JOIN users u ON r.admin_locked_by = u.id
-                WHERE r.record_status = 'admin_hold'
-                ORDER BY r.admin_locked_at DESC
-            """).fetchall()
-
-            issues = conn.execute("""
-                SELECT i.*, a.title as audit_title,
-                       u.name as locked_by_name
-                FROM issues i
-                JOIN audits a ON i.audit_id = a.id
-                LEFT JOIN users u ON i.admin_locked_by = u.id
-                WHERE i.record_status = 'admin_hold'
-                ORDER BY i.admin_locked_at DESC
-            """).fetchall()
-
-            return {
-                'risks': [dict(row) for row in risks],
-                'issues': [dict(row) for row in issues]
-            }
+            return self._query_risks_and_issues(
+                conn,
+                extra_columns="a.title as audit_title, u.name as locked_by_name",
+                joins="JOIN audits a ON t.audit_id = a.id "
+                      "LEFT JOIN users u ON t.admin_locked_by = u.id",
+                where="t.record_status = 'admin_hold'",
+                order_by="admin_locked_at DESC",
+                params=()
+            )
 
+    @_cached_query(lambda summary: {kind: dict(counts) for kind, counts in summary.items()})
     def get_workflow_summary(self, audit_id: int) -> Dict:
         """Get a summary of workflow status for an audit."""
         with self._connection() as conn:
-            risk_summary = conn.execute("""
-                SELECT record_status, COUNT(*) as count
+            # Records without a status count as drafts
+            rows = self._fetch_tuples(conn, """
+                SELECT 'risks' as kind, COALESCE(NULLIF(record_status, ''), 'draft') as status,
+                       COUNT(*) as count
                 FROM risks WHERE audit_id = ?
-                GROUP BY record_status
-            """, (audit_id,)).fetchall()
-
-            issue_summary = conn.execute("""
-                SELECT record_status, COUNT(*) as count
+                GROUP BY 2
+                UNION ALL
+                SELECT 'issues' as kind, COALESCE(NULLIF(record_status, ''), 'draft') as status,
+                       COUNT(*) as count
                 FROM issues WHERE audit_id = ?
-                GROUP BY record_status
-            """, (audit_id,)).fetchall()
+                GROUP BY 2
+            """, (audit_id, audit_id))
 
-            return {
-                'risks': {row['record_status'] or 'draft': row['count'] for row in risk_summary},
-                'issues': {row['record_status'] or 'draft': row['count'] for row in issue_summary}
-            }
+            summary = {'risks': {}, 'issues': {}}
+            for kind, status, count in rows:
+                summary[kind][status] = count
+            return summary
 
     def get_all_records_by_status(self, status: str) -> List[Dict]:
         """Get all records with a specific status across all audits."""
-        with self._connection() as conn:
-            risks = conn.execute("""
-                SELECT r.*, a.title as audit_title,
-                       u.name as signed_off_by_name,
-                       'risk' as record_type
-                FROM risks r
-                JOIN audits a ON r.audit_id = a.id
-                LEFT JOIN users u ON r.signed_off_by = u.id
-                WHERE r.record_status = ?
-                ORDER BY r.signed_off_at DESC
-            """, (status,)).fetchall()
-
-            issues = conn.execute("""
-                SELECT i.*, a.title as audit_title,
-                       u.name as signed_off_by_name,
-                       'issue' as record_type
-                FROM issues i
-                JOIN audits a ON i.audit_id = a.id
-                LEFT JOIN users u ON i.signed_off_by = u.id
-                WHERE i.record_status = ?
-                ORDER BY i.signed_off_at DESC
-            """, (status,)).fetchall()
-
-            return [dict(row) for row in risks] + [dict(row) for row in issues]
-
-
-# Singleton instance for easy import
+        return list(self.stream_all_records_by_status(status))
+
+    def stream_all_records_by_status(self, status: str, limit: Optional[int] = None,
+                                     offset: int = 0) -> Iterator[Dict]:
+        """Iterate over records with a specific status across all audits.
+
+        Yields risks then issues, each newest sign-off first, as
+        get_all_records_by_status() orders them. `limit`/`offset` paginate in
+        SQL, so a page never materialises the rows around it. It reads on its
+        own connection, open until the iterator is exhausted or closed, so a
+        half-consumed iterator never holds the thread's shared connection.
+        """
+        conn = self._get_conn()
+        try:
+            for _, record in self._iter_risks_and_issues(
+                    conn,
+                    extra_columns="a.title as audit_title, u.name as signed_off_by_name",
+                    joins="JOIN audits a ON t.audit_id = a.id "
+                          "LEFT JOIN users u ON t.signed_off_by = u.id",
+                    where="t.record_status = ?",
+                    # 'risk' sorts after 'issue', so DESC puts risks first;
+                    # id keeps pages stable when sign-off times tie
+                    order_by="record_type DESC, signed_off_at DESC, id",
+                    params=(status,),
+                    include_type=True,
+                    limit=limit,
+                    offset=offset):
+                yield record
+        finally:
+            conn.close()
+
+
+# Shared instances for easy import: the default database, plus one per path
+# explicitly passed to get_db()
 _db_instance = None
+_db_instances: Dict[str, RACMDatabase] = {}
+_db_lock = threading.Lock()
 
 def get_db(db_path: Optional[str] = None) -> RACMDatabase:
-    """Get or create the database instance."""
+    """Get the shared database instance, creating it on first use.
+
+    Passing db_path returns the instance for that path, opening it once.
+    Lookups take no lock; creation is serialised so threads racing on the
+    first call share a single instance.
+    """
     global _db_instance
-    if _db_instance is None or db_path:
-        _db_instance = RACMDatabase(db_path)
-    return _db_instance
+    instance = _db_instances.get(db_path) if db_path else _db_instance
+    if instance is not None:
+        return instance
+    with _db_lock:
+        instance = _db_instances.get(db_path) if db_path else _db_instance
+        if instance is None:
+            instance = RACMDatabase(db_path)
+            if db_path:
+                _db_instances[db_path] = instance
+            else:
+                _db_instance = instance
+    return instance
@@ -6,12 +6,49 @@ Not Alembic - just a straightforward version-based migration system.
 
 import importlib
 import logging
+import re
 import sqlite3
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Leading version number of a migration file stem ('001_initial_schema' -> '001')
+_VERSION_RE = re.compile(r'^(\d+)(?:_|$)')
+
+# Discovered migrations per versions directory, as (directory mtime, list).
+# Adding, removing or renaming a file changes the mtime and forces a rescan.
+_migrations_cache: dict = {}
+
+# Applied once to the migration connection. Each migration runs in a single
+# transaction, and with WAL plus synchronous=NORMAL its commit does not wait
+# on an fsync, so a run of DDL costs one journal write rather than dozens.
+_MIGRATION_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -65536;
+"""
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """Return the names of the columns `table` currently has."""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def execute_statements(conn: sqlite3.Connection, script: str) -> None:
+    """Run each statement of an SQL script with conn.execute().
+
+    Unlike executescript(), this does not commit the transaction the runner
+    holds open around each migration.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ''
+
 
 class MigrationRunner:
     """Runs database migrations in order."""
@@ -46,21 +83,37 @@ class MigrationRunner:
         return result[0] or 0
 
     def _get_migration_modules(self) -> list:
-        """Get all migration modules in order."""
+        """Get all migration modules in order.
+
+        The scan is cached for the process and redone only when the
+        directory's mtime changes.
+        """
+        mtime = self.migrations_dir.stat().st_mtime
+        cached = _migrations_cache.get(self.migrations_dir)
+        if cached is not None and cached[0] == mtime:
+            return list(cached[1])
+
         migrations = []
         for file in sorted(self.migrations_dir.glob('*.py')):
             if file.name.startswith('_'):
                 continue
             # Parse version from filename (e.g., '001_initial_schema.py' -> 1)
-            try:
-                version = int(file.stem.split('_')[0])
-                migrations.append((version, file.stem, file))
-            except ValueError:
+            match = _VERSION_RE.match(file.stem)
+            if match:
+                migrations.append((int(match.group(1)), file.stem, file))
+            else:
                 logger.warning(f"Skipping invalid migration filename: {file.name}")
-        return sorted(migrations, key=lambda x: x[0])
+        migrations.sort(key=lambda x: x[0])
+        _migrations_cache[self.migrations_dir] = (mtime, migrations)
+        return list(migrations)
 
     def run_migrations(self) -> None:
-        """Run all pending migrations."""
+        """Run all pending migrations.
+
+        Each migration's upgrade() runs inside one transaction together with
+        its schema_migrations row, so a failed migration leaves no partial
+        DDL behind. upgrade() functions should not commit themselves.
+        """
         conn = self._get_conn()
         try:
             self._ensure_migrations_table(conn)
@@ -73,12 +126,15 @@ class MigrationRunner:
                 logger.debug("No pending migrations")
                 return
 
+            conn.executescript(_MIGRATION_PRAGMAS)
+
             for version, name, filepath in pending:
                 logger.info(f"Running migration {version}: {name}")
                 try:
                     # Import and run the migration module
                     module = importlib.import_module(f'migrations.versions.{name}')
                     if hasattr(module, 'upgrade'):
+                        conn.execute("BEGIN IMMEDIATE")
                         module.upgrade(conn)
                     else:
                         logger.warning(f"Migration {name} has no upgrade() function")
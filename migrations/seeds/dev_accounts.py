@@ -8,8 +8,6 @@ import logging
 import os
 import sqlite3
 
-from werkzeug.security import generate_password_hash
-
 logger = logging.getLogger(__name__)
 
 DEV_MODE = os.environ.get('DEV_MODE', 'false').lower() in ('true', '1', 'yes')
@@ -20,6 +18,9 @@ def seed_dev_accounts(conn: sqlite3.Connection) -> None:
     if not DEV_MODE:
         return
 
+    # Only needed in DEV_MODE, so production startup skips the import
+    from werkzeug.security import generate_password_hash
+
     user_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
     if user_count < 3:
         test_password = generate_password_hash('Test123!', method='pbkdf2:sha256')
@@ -33,15 +34,13 @@ def seed_dev_accounts(conn: sqlite3.Connection) -> None:
             ('viewer1@test.com', 'Victor Viewer', 'viewer'),
         ]
 
-        for email, name, role in test_accounts:
-            # Check if user already exists
-            existing = conn.execute("SELECT id FROM users WHERE email = ?", (email,)).fetchone()
-            if not existing:
-                is_admin = 1 if role == 'admin' else 0
-                conn.execute("""
-                    INSERT INTO users (email, name, password_hash, is_active, is_admin, role)
-                    VALUES (?, ?, ?, 1, ?, ?)
-                """, (email, name, test_password, is_admin, role))
+        # Accounts whose email already exists are left as they are
+        conn.executemany("""
+            INSERT INTO users (email, name, password_hash, is_active, is_admin, role)
+            VALUES (?, ?, ?, 1, ?, ?)
+            ON CONFLICT(email) DO NOTHING
+        """, [(email, name, test_password, 1 if role == 'admin' else 0, role)
+              for email, name, role in test_accounts])
 
         conn.commit()
         logger.info("DEV_MODE: Seeded test accounts")
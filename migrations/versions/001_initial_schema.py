@@ -6,10 +6,12 @@ Creates all core tables for RACM audit toolkit.
 
 import sqlite3
 
+from migrations.runner import execute_statements
+
 
 def upgrade(conn: sqlite3.Connection) -> None:
     """Create initial database schema."""
-    conn.executescript("""
+    execute_statements(conn, """
         -- Risks and Controls (RACM rows)
         CREATE TABLE IF NOT EXISTS risks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -141,7 +143,6 @@ def upgrade(conn: sqlite3.Connection) -> None:
             uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
         CREATE INDEX IF NOT EXISTS idx_attachments_risk ON risk_attachments(risk_id);
-        CREATE INDEX IF NOT EXISTS idx_attachments_category ON risk_attachments(category);
 
         -- Audit Attachments (file evidence for annual audit plan)
         CREATE TABLE IF NOT EXISTS audit_attachments (
@@ -258,4 +259,3 @@ def upgrade(conn: sqlite3.Connection) -> None:
         );
         CREATE INDEX IF NOT EXISTS idx_felix_attachments_conv ON felix_attachments(conversation_id);
     """)
-    conn.commit()
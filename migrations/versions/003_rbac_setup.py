@@ -6,6 +6,7 @@ Seeds default roles and creates default admin user if needed.
 
 import logging
 import os
+import re
 import secrets
 import sqlite3
 
@@ -16,6 +17,18 @@ logger = logging.getLogger(__name__)
 # Import DEV_MODE from database module
 DEV_MODE = os.environ.get('DEV_MODE', 'false').lower() in ('true', '1', 'yes')
 
+# Shape of a werkzeug password hash: method$salt$hexdigest, where method is
+# pbkdf2:<digest>[:iterations] or scrypt[:n:r:p]
+_WERKZEUG_HASH_RE = re.compile(r'^(?:pbkdf2:[a-z0-9]+(?::\d+)?|scrypt(?::\d+){0,3})\$[^$]+\$[0-9a-f]+$')
+
+# (id, name, description, permissions JSON) seeded into an empty roles table
+DEFAULT_ROLES = [
+    (1, 'admin', 'Full system access', '["*"]'),
+    (2, 'auditor', 'Can edit assigned audits', '["audit.read", "audit.edit", "risk.read", "risk.edit", "issue.read", "issue.edit", "task.read", "task.edit"]'),
+    (3, 'reviewer', 'Can read and add comments', '["audit.read", "risk.read", "issue.read", "task.read", "comment.create"]'),
+    (4, 'viewer', 'Read-only access', '["audit.read", "risk.read", "issue.read", "task.read"]'),
+]
+
 
 def upgrade(conn: sqlite3.Connection) -> None:
     """Setup RBAC roles and default admin."""
@@ -23,35 +36,41 @@ def upgrade(conn: sqlite3.Connection) -> None:
     # Seed roles if empty
     role_count = conn.execute("SELECT COUNT(*) FROM roles").fetchone()[0]
     if role_count == 0:
-        conn.executescript("""
-            INSERT INTO roles (id, name, description, permissions) VALUES
-                (1, 'admin', 'Full system access', '["*"]'),
-                (2, 'auditor', 'Can edit assigned audits', '["audit.read", "audit.edit", "risk.read", "risk.edit", "issue.read", "issue.edit", "task.read", "task.edit"]'),
-                (3, 'reviewer', 'Can read and add comments', '["audit.read", "risk.read", "issue.read", "task.read", "comment.create"]'),
-                (4, 'viewer', 'Read-only access', '["audit.read", "risk.read", "issue.read", "task.read"]');
-        """)
-        conn.commit()
+        conn.executemany(
+            "INSERT INTO roles (id, name, description, permissions) VALUES (?, ?, ?, ?)",
+            DEFAULT_ROLES
+        )
 
     # Bootstrap default admin if no users exist
     user_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
     if user_count == 0:
         admin_email = os.environ.get('ADMIN_EMAIL', 'admin@localhost')
         admin_password = os.environ.get('ADMIN_PASSWORD')
+        # A precomputed hash (e.g. shared across deployments) skips the
+        # deliberately slow pbkdf2 round on first boot
+        password_hash = os.environ.get('ADMIN_PASSWORD_HASH')
+        if password_hash and not _WERKZEUG_HASH_RE.match(password_hash):
+            # Storing it would create an admin nobody can log in as
+            logger.error("ADMIN_PASSWORD_HASH is not a werkzeug password hash; ignoring it")
+            password_hash = None
 
         # Security: Never use hardcoded default password
         # Generate random password if not provided via environment
         generated_password = False
-        if not admin_password:
-            admin_password = secrets.token_urlsafe(16)
-            generated_password = True
-
-        password_hash = generate_password_hash(admin_password, method='pbkdf2:sha256')
+        if password_hash:
+            logger.info("Default admin password taken from ADMIN_PASSWORD_HASH")
+        else:
+            if not admin_password:
+                admin_password = secrets.token_urlsafe(16)
+                generated_password = True
+            else:
+                logger.info("Default admin password taken from ADMIN_PASSWORD")
+            password_hash = generate_password_hash(admin_password, method='pbkdf2:sha256')
 
         conn.execute("""
             INSERT INTO users (email, name, password_hash, is_active, is_admin)
             VALUES (?, 'Default Admin', ?, 1, 1)
         """, (admin_email, password_hash))
-        conn.commit()
 
         # Log credentials - only show password in DEV_MODE
         if generated_password:
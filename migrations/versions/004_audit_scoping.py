@@ -6,6 +6,8 @@ Adds audit_id columns to tables for multi-tenant audit support.
 
 import sqlite3
 
+from migrations.runner import table_columns
+
 
 def upgrade(conn: sqlite3.Connection) -> None:
     """Add audit_id columns for scoping."""
@@ -15,19 +17,14 @@ def upgrade(conn: sqlite3.Connection) -> None:
         'risks', 'issues', 'tasks', 'flowcharts', 'test_documents',
         'risk_attachments', 'issue_attachments'
     ]
+    existing_columns = {table: table_columns(conn, table) for table in tables_needing_audit_id}
     for table in tables_needing_audit_id:
-        try:
-            conn.execute(f"SELECT audit_id FROM {table} LIMIT 1")
-        except sqlite3.OperationalError:
+        if 'audit_id' not in existing_columns[table]:
             conn.execute(f"ALTER TABLE {table} ADD COLUMN audit_id INTEGER")
-            conn.commit()
 
     # Add risk_row_id to issues for proper FK
-    try:
-        conn.execute("SELECT risk_row_id FROM issues LIMIT 1")
-    except sqlite3.OperationalError:
+    if 'risk_row_id' not in existing_columns['issues']:
         conn.execute("ALTER TABLE issues ADD COLUMN risk_row_id INTEGER")
-        conn.commit()
 
     # Get or create default audit for backfilling existing data
     existing_data = conn.execute("SELECT COUNT(*) FROM risks WHERE audit_id IS NULL").fetchone()[0]
@@ -52,13 +49,11 @@ def upgrade(conn: sqlite3.Connection) -> None:
                             'Auto-created during migration to hold existing data',
                             'in_progress')
                 """)
-                conn.commit()
                 default_audit_id = cursor.lastrowid
 
         # Backfill audit_id for all tables with NULL values
         for table in tables_needing_audit_id:
             conn.execute(f"UPDATE {table} SET audit_id = ? WHERE audit_id IS NULL", (default_audit_id,))
-        conn.commit()
 
         # Backfill issues.risk_row_id from TEXT risk_id
         conn.execute("""
@@ -70,13 +65,11 @@ def upgrade(conn: sqlite3.Connection) -> None:
             )
             WHERE risk_row_id IS NULL AND risk_id IS NOT NULL
         """)
-        conn.commit()
 
     # Create indexes for audit_id columns
     for table in tables_needing_audit_id:
         conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_audit ON {table}(audit_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_risk_row ON issues(risk_row_id)")
-    conn.commit()
 
     # Fix flowcharts uniqueness - change from global name to (audit_id, name)
     flowchart_schema = conn.execute(
@@ -104,4 +97,3 @@ def upgrade(conn: sqlite3.Connection) -> None:
         conn.execute("ALTER TABLE flowcharts_new RENAME TO flowcharts")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_flowcharts_risk ON flowcharts(risk_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_flowcharts_audit ON flowcharts(audit_id)")
-        conn.commit()
@@ -6,36 +6,31 @@ Adds workflow state management columns to risks and issues.
 
 import sqlite3
 
+from migrations.runner import table_columns
+
 
 def upgrade(conn: sqlite3.Connection) -> None:
     """Add workflow management columns."""
 
     # Add role column to users table
-    try:
-        conn.execute("SELECT role FROM users LIMIT 1")
-    except sqlite3.OperationalError:
+    if 'role' not in table_columns(conn, 'users'):
         conn.execute("ALTER TABLE users ADD COLUMN role TEXT DEFAULT 'viewer'")
         # Migrate existing data: is_admin=1 becomes role='admin', others become 'auditor'
         conn.execute("UPDATE users SET role = 'admin' WHERE is_admin = 1")
         conn.execute("UPDATE users SET role = 'auditor' WHERE is_admin = 0 AND role IS NULL")
-        conn.commit()
 
     # Consolidate global 'reviewer' role into 'auditor'
     conn.execute("UPDATE users SET role = 'auditor' WHERE role = 'reviewer'")
-    conn.commit()
 
     # Add auditor_id, reviewer_id, and created_by to audits table
+    audit_columns = table_columns(conn, 'audits')
     for col in ['auditor_id', 'reviewer_id', 'created_by']:
-        try:
-            conn.execute(f"SELECT {col} FROM audits LIMIT 1")
-        except sqlite3.OperationalError:
+        if col not in audit_columns:
             conn.execute(f"ALTER TABLE audits ADD COLUMN {col} INTEGER")
-            conn.commit()
 
     # Create indexes for audit assignments
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audits_auditor ON audits(auditor_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audits_reviewer ON audits(reviewer_id)")
-    conn.commit()
 
     # Add workflow columns to risks table
     risk_workflow_columns = [
@@ -49,12 +44,10 @@ def upgrade(conn: sqlite3.Connection) -> None:
         ("created_by", "INTEGER"),
         ("updated_by", "INTEGER"),
     ]
+    risk_columns = table_columns(conn, 'risks')
     for col_name, col_type in risk_workflow_columns:
-        try:
-            conn.execute(f"SELECT {col_name} FROM risks LIMIT 1")
-        except sqlite3.OperationalError:
+        if col_name not in risk_columns:
             conn.execute(f"ALTER TABLE risks ADD COLUMN {col_name} {col_type}")
-            conn.commit()
 
     # Add workflow columns to issues table
     issue_workflow_columns = [
@@ -68,19 +61,16 @@ def upgrade(conn: sqlite3.Connection) -> None:
         ("created_by", "INTEGER"),
         ("updated_by", "INTEGER"),
     ]
+    issue_columns = table_columns(conn, 'issues')
     for col_name, col_type in issue_workflow_columns:
-        try:
-            conn.execute(f"SELECT {col_name} FROM issues LIMIT 1")
-        except sqlite3.OperationalError:
+        if col_name not in issue_columns:
             conn.execute(f"ALTER TABLE issues ADD COLUMN {col_name} {col_type}")
-            conn.commit()
 
     # Create indexes for record status
     conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_record_status ON risks(record_status)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_owner_role ON risks(current_owner_role)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_record_status ON issues(record_status)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_owner_role ON issues(current_owner_role)")
-    conn.commit()
 
     # Create record_state_history table
     conn.execute("""
@@ -101,7 +91,6 @@ def upgrade(conn: sqlite3.Connection) -> None:
     conn.execute("CREATE INDEX IF NOT EXISTS idx_state_history_action ON record_state_history(action)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_state_history_user ON record_state_history(performed_by)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_state_history_date ON record_state_history(performed_at)")
-    conn.commit()
 
     # Create audit_viewers table
     conn.execute("""
@@ -116,4 +105,3 @@ def upgrade(conn: sqlite3.Connection) -> None:
     """)
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_viewers_audit ON audit_viewers(audit_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_viewers_user ON audit_viewers(viewer_user_id)")
-    conn.commit()
@@ -6,6 +6,8 @@ Creates the audit_team junction table and migrates existing assignments.
 
 import sqlite3
 
+from migrations.runner import table_columns
+
 
 def upgrade(conn: sqlite3.Connection) -> None:
     """Create and populate audit_team table."""
@@ -25,7 +27,6 @@ def upgrade(conn: sqlite3.Connection) -> None:
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_audit ON audit_team(audit_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_user ON audit_team(user_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_role ON audit_team(team_role)")
-    conn.commit()
 
     # Migrate existing auditor_id/reviewer_id to audit_team
     existing_team = conn.execute("SELECT COUNT(*) FROM audit_team").fetchone()[0]
@@ -42,25 +43,17 @@ def upgrade(conn: sqlite3.Connection) -> None:
             SELECT id, reviewer_id, 'reviewer' FROM audits
             WHERE reviewer_id IS NOT NULL
         """)
-        conn.commit()
 
     # Add assigned_reviewer_id to risks table
-    try:
-        conn.execute("SELECT assigned_reviewer_id FROM risks LIMIT 1")
-    except sqlite3.OperationalError:
+    if 'assigned_reviewer_id' not in table_columns(conn, 'risks'):
         conn.execute("ALTER TABLE risks ADD COLUMN assigned_reviewer_id INTEGER")
-        conn.commit()
 
     # Add assigned_reviewer_id to issues table
-    try:
-        conn.execute("SELECT assigned_reviewer_id FROM issues LIMIT 1")
-    except sqlite3.OperationalError:
+    if 'assigned_reviewer_id' not in table_columns(conn, 'issues'):
         conn.execute("ALTER TABLE issues ADD COLUMN assigned_reviewer_id INTEGER")
-        conn.commit()
 
     conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_assigned_reviewer ON risks(assigned_reviewer_id)")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_issues_assigned_reviewer ON issues(assigned_reviewer_id)")
-    conn.commit()
 
     # Expand audit_team to allow 'viewer' role and migrate audit_viewers
     audit_team_schema = conn.execute(
@@ -91,7 +84,6 @@ def upgrade(conn: sqlite3.Connection) -> None:
         conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_audit ON audit_team(audit_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_user ON audit_team(user_id)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_team_role ON audit_team(team_role)")
-        conn.commit()
 
     # Migrate audit_viewers data to audit_team (as 'viewer' role)
     viewers_exist = conn.execute(
@@ -103,4 +95,3 @@ def upgrade(conn: sqlite3.Connection) -> None:
             SELECT audit_id, viewer_user_id, 'viewer', granted_by, granted_at
             FROM audit_viewers
         """)
-        conn.commit()
@@ -0,0 +1,24 @@
+"""
+007: Workflow query indexes.
+
+Composite indexes for per-audit workflow lookups and partial indexes for
+the admin hold queue. audit_team and audit_viewers need nothing extra:
+their UNIQUE constraints already index (audit_id, user_id, team_role) and
+(audit_id, viewer_user_id).
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Create workflow query indexes."""
+    for table in ('risks', 'issues'):
+        # get_records_by_status / get_workflow_summary filter on both columns
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_audit_status ON {table}(audit_id, record_status)"
+        )
+        # get_records_in_admin_hold: only held records, newest lock first
+        conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{table}_admin_hold ON {table}(record_status, admin_locked_at DESC)
+            WHERE record_status = 'admin_hold'
+        """)
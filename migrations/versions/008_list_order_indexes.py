@@ -0,0 +1,38 @@
+"""
+008: List ordering indexes.
+
+Indexes shaped like the ORDER BY of the list endpoints, so SQLite can walk
+them in order instead of sorting into a temporary B-tree:
+
+- get_tasks_by_column filters on column_id and orders by created_at. The
+  composite index also serves plain column_id lookups, so it replaces
+  idx_tasks_column.
+- get_all_audits / get_audits_as_kanban order by the quarter CASE, then
+  planned_start and title. A plain (quarter, planned_start) index cannot
+  serve that CASE, so this is an index on the same expression; it has to
+  stay in step with _SQL_AUDITS_ORDER_BY in database.py.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Create list ordering indexes."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_col_created ON tasks(column_id, created_at)")
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_column")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audits_plan_order ON audits(
+            CASE quarter
+                WHEN 'Q1' THEN 1
+                WHEN 'Q2' THEN 2
+                WHEN 'Q3' THEN 3
+                WHEN 'Q4' THEN 4
+                ELSE 5
+            END,
+            planned_start,
+            title
+        )
+    """)
+    # Give the planner statistics for the new indexes
+    conn.execute("ANALYZE tasks")
+    conn.execute("ANALYZE audits")
@@ -0,0 +1,14 @@
+"""
+009: Compact stored flowchart JSON.
+
+Flowcharts are now written without whitespace between JSON tokens; this
+rewrites rows saved before that. json() returns its argument minified, and
+rows that are not valid JSON are left alone.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Minify existing flowchart data."""
+    conn.execute("UPDATE flowcharts SET data = json(data) WHERE json_valid(data) AND data != json(data)")
@@ -0,0 +1,19 @@
+"""
+010: Issue number index.
+
+_generate_issue_id takes MAX(CAST(SUBSTR(issue_id, 5) AS INTEGER)) over
+issues to number the next ISS-nnn. Indexing that exact expression lets
+SQLite answer the MAX from the last index entry instead of scanning and
+casting every issue id; the expression has to stay in step with
+_generate_issue_id in database.py.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Create the issue number index."""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_issues_number
+        ON issues(CAST(SUBSTR(issue_id, 5) AS INTEGER))
+    """)
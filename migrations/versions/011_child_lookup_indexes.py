@@ -0,0 +1,48 @@
+"""
+011: Child lookup indexes.
+
+Attachment lists and library chunk lists filter on their parent id and
+order by a second column. Indexing both lets SQLite seek to the parent and
+read rows already in order (walking backwards for uploaded_at DESC)
+instead of sorting, and the per-parent attachment counts become
+index-only. Each composite index also serves plain parent lookups, so it
+replaces the single-column index it extends.
+
+idx_test_docs_risk is dropped as well: the UNIQUE(risk_id, doc_type)
+constraint already gives test_documents an index with risk_id first.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Replace single-column parent indexes with ordered composites."""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_issue_attachments_issue_uploaded
+            ON issue_attachments(issue_id, uploaded_at)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_attachments_issue")
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_risk_attachments_risk_uploaded
+            ON risk_attachments(risk_id, uploaded_at)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_attachments_risk")
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_attachments_audit_uploaded
+            ON audit_attachments(audit_id, uploaded_at)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_attachments_audit")
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_library_chunks_doc_index
+            ON library_chunks(document_id, chunk_index)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_library_chunks_doc")
+
+    conn.execute("DROP INDEX IF EXISTS idx_test_docs_risk")
+
+    # Give the planner statistics for the new indexes
+    for table in ('issue_attachments', 'risk_attachments', 'audit_attachments', 'library_chunks'):
+        conn.execute(f"ANALYZE {table}")
@@ -0,0 +1,50 @@
+"""
+012: Full-text index for library chunks.
+
+Keyword search over the audit library used to scan every chunk with
+LIKE '%word%'. library_chunks_fts is an external-content FTS5 index over
+the chunk content and section: it stores only the inverted index, reads
+the text itself from library_chunks, and is kept in step by triggers.
+The porter tokenizer lets "controls" match "control".
+
+SQLite builds without FTS5 skip this migration; search_library_keyword
+falls back to LIKE when the table is missing.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 index, its sync triggers, and fill it."""
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS library_chunks_fts USING fts5(
+                content, section,
+                content='library_chunks', content_rowid='id',
+                tokenize='porter unicode61'
+            )
+        """)
+    except sqlite3.OperationalError:
+        return  # No FTS5 in this SQLite build
+
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS library_chunks_fts_ai AFTER INSERT ON library_chunks BEGIN
+            INSERT INTO library_chunks_fts(rowid, content, section)
+            VALUES (new.id, new.content, new.section);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS library_chunks_fts_ad AFTER DELETE ON library_chunks BEGIN
+            INSERT INTO library_chunks_fts(library_chunks_fts, rowid, content, section)
+            VALUES ('delete', old.id, old.content, old.section);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS library_chunks_fts_au AFTER UPDATE OF content, section ON library_chunks BEGIN
+            INSERT INTO library_chunks_fts(library_chunks_fts, rowid, content, section)
+            VALUES ('delete', old.id, old.content, old.section);
+            INSERT INTO library_chunks_fts(rowid, content, section)
+            VALUES (new.id, new.content, new.section);
+        END
+    """)
+    conn.execute("INSERT INTO library_chunks_fts(library_chunks_fts) VALUES ('rebuild')")
@@ -0,0 +1,24 @@
+"""
+013: Library document name indexes.
+
+The library lists documents by name, optionally filtered by type, and the
+keyword search fallback orders chunks by document name then chunk_index.
+idx_library_docs_name lets those read documents in name order instead of
+sorting them; joined with idx_library_chunks_doc_index (migration 011)
+the fallback's chunks come out already ordered. The (doc_type, name)
+composite serves the filtered list and replaces the doc_type index.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Index library documents for name-ordered reads."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_library_docs_name ON library_documents(name)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_library_docs_type_name
+            ON library_documents(doc_type, name)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_library_docs_type")
+    # Give the planner statistics for the new indexes
+    conn.execute("ANALYZE library_documents")
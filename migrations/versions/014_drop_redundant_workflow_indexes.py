@@ -0,0 +1,19 @@
+"""
+014: Drop redundant workflow indexes.
+
+Migration 007's (audit_id, record_status) composites lead with audit_id,
+so they already serve every audit_id-only lookup on risks and issues and
+cover get_workflow_summary's per-status counts outright. The single-column
+audit_id indexes from 004 only add write cost on those two tables. No
+query filters on current_owner_role, so 005's owner-role indexes go too;
+the record_status indexes stay for the cross-audit status lists.
+"""
+
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection) -> None:
+    """Drop indexes made redundant by the audit/status composites."""
+    for table in ('risks', 'issues'):
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_audit")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_owner_role")
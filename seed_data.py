@@ -211,23 +211,21 @@ def seed_sox_audit(db, audit_id):
             status=risk['status']
         )
         # Update audit_id and DE/OE fields
-        conn = db._get_conn()
-        conn.execute("""UPDATE risks SET
-            audit_id = ?,
-            design_effectiveness_testing = ?,
-            design_effectiveness_conclusion = ?,
-            operational_effectiveness_test = ?,
-            operational_effectiveness_conclusion = ?
-            WHERE id = ?""", (
-            audit_id,
-            risk.get('design_effectiveness_testing', ''),
-            risk.get('design_effectiveness_conclusion', ''),
-            risk.get('operational_effectiveness_test', ''),
-            risk.get('operational_effectiveness_conclusion', ''),
-            row_id
-        ))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("""UPDATE risks SET
+                audit_id = ?,
+                design_effectiveness_testing = ?,
+                design_effectiveness_conclusion = ?,
+                operational_effectiveness_test = ?,
+                operational_effectiveness_conclusion = ?
+                WHERE id = ?""", (
+                audit_id,
+                risk.get('design_effectiveness_testing', ''),
+                risk.get('design_effectiveness_conclusion', ''),
+                risk.get('operational_effectiveness_test', ''),
+                risk.get('operational_effectiveness_conclusion', ''),
+                row_id
+            ))
         risk_ids.append(row_id)
 
     # Create test documents (DE/OE rich text working papers) for completed controls
@@ -344,18 +342,16 @@ def seed_sox_audit(db, audit_id):
     # Insert test documents
     for doc in test_documents:
         # Find the risk ID
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
-        if row:
-            risk_db_id = row['id']
-            # Insert DE testing document
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
-            # Insert OE testing document
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
+            if row:
+                risk_db_id = row['id']
+                # Insert DE testing document
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
+                # Insert OE testing document
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
 
     # Create issues for this audit
     issues = [
@@ -387,12 +383,10 @@ def seed_sox_audit(db, audit_id):
             assigned_to=issue['assigned_to']
         )
         # Get the row id from the issue_id
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
-        if row:
-            conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
+            if row:
+                conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
 
     # Create tasks
     tasks = [
@@ -408,10 +402,8 @@ def seed_sox_audit(db, audit_id):
             column_id=task['column_id'],
             priority=task['priority']
         )
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     print(f"  Added {len(risks)} risks, {len(issues)} issues, {len(tasks)} tasks, {len(test_documents)} test documents to SOX audit")
 
@@ -495,23 +487,21 @@ def seed_itgc_audit(db, audit_id):
             control_owner=risk['control_owner'],
             status=risk['status']
         )
-        conn = db._get_conn()
-        conn.execute("""UPDATE risks SET
-            audit_id = ?,
-            design_effectiveness_testing = ?,
-            design_effectiveness_conclusion = ?,
-            operational_effectiveness_test = ?,
-            operational_effectiveness_conclusion = ?
-            WHERE id = ?""", (
-            audit_id,
-            risk.get('design_effectiveness_testing', ''),
-            risk.get('design_effectiveness_conclusion', ''),
-            risk.get('operational_effectiveness_test', ''),
-            risk.get('operational_effectiveness_conclusion', ''),
-            row_id
-        ))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("""UPDATE risks SET
+                audit_id = ?,
+                design_effectiveness_testing = ?,
+                design_effectiveness_conclusion = ?,
+                operational_effectiveness_test = ?,
+                operational_effectiveness_conclusion = ?
+                WHERE id = ?""", (
+                audit_id,
+                risk.get('design_effectiveness_testing', ''),
+                risk.get('design_effectiveness_conclusion', ''),
+                risk.get('operational_effectiveness_test', ''),
+                risk.get('operational_effectiveness_conclusion', ''),
+                row_id
+            ))
 
     # Create issues
     issues = [
@@ -535,12 +525,10 @@ def seed_itgc_audit(db, audit_id):
             assigned_to=issue['assigned_to']
         )
         # Get the row id from the issue_id
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
-        if row:
-            conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
+            if row:
+                conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
 
     # Create test documents
     test_documents = [
@@ -621,16 +609,14 @@ def seed_itgc_audit(db, audit_id):
     ]
 
     for doc in test_documents:
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
-        if row:
-            risk_db_id = row['id']
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
+            if row:
+                risk_db_id = row['id']
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
 
     # Create tasks
     tasks = [
@@ -651,10 +637,8 @@ def seed_itgc_audit(db, audit_id):
             column_id=task['column_id'],
             priority=task['priority']
         )
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     print(f"  Added {len(risks)} risks, {len(issues)} issues, {len(tasks)} tasks, {len(test_documents)} test documents to ITGC audit")
 
@@ -727,23 +711,21 @@ def seed_revenue_audit(db, audit_id):
             control_owner=risk['control_owner'],
             status=risk['status']
         )
-        conn = db._get_conn()
-        conn.execute("""UPDATE risks SET
-            audit_id = ?,
-            design_effectiveness_testing = ?,
-            design_effectiveness_conclusion = ?,
-            operational_effectiveness_test = ?,
-            operational_effectiveness_conclusion = ?
-            WHERE id = ?""", (
-            audit_id,
-            risk.get('design_effectiveness_testing', ''),
-            risk.get('design_effectiveness_conclusion', ''),
-            risk.get('operational_effectiveness_test', ''),
-            risk.get('operational_effectiveness_conclusion', ''),
-            row_id
-        ))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("""UPDATE risks SET
+                audit_id = ?,
+                design_effectiveness_testing = ?,
+                design_effectiveness_conclusion = ?,
+                operational_effectiveness_test = ?,
+                operational_effectiveness_conclusion = ?
+                WHERE id = ?""", (
+                audit_id,
+                risk.get('design_effectiveness_testing', ''),
+                risk.get('design_effectiveness_conclusion', ''),
+                risk.get('operational_effectiveness_test', ''),
+                risk.get('operational_effectiveness_conclusion', ''),
+                row_id
+            ))
 
     # Create test documents
     test_documents = [
@@ -830,16 +812,14 @@ def seed_revenue_audit(db, audit_id):
     ]
 
     for doc in test_documents:
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
-        if row:
-            risk_db_id = row['id']
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
+            if row:
+                risk_db_id = row['id']
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
 
     # Create issues
     issues = [
@@ -862,12 +842,10 @@ def seed_revenue_audit(db, audit_id):
             status=issue['status'],
             assigned_to=issue['assigned_to']
         )
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
-        if row:
-            conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
+            if row:
+                conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
 
     # Create tasks
     tasks = [
@@ -888,10 +866,8 @@ def seed_revenue_audit(db, audit_id):
             column_id=task['column_id'],
             priority=task['priority']
         )
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     print(f"  Added {len(risks)} risks, {len(issues)} issues, {len(tasks)} tasks, {len(test_documents)} test documents to Revenue audit")
 
@@ -942,23 +918,21 @@ def seed_vendor_audit(db, audit_id):
             control_owner=risk['control_owner'],
             status=risk['status']
         )
-        conn = db._get_conn()
-        conn.execute("""UPDATE risks SET
-            audit_id = ?,
-            design_effectiveness_testing = ?,
-            design_effectiveness_conclusion = ?,
-            operational_effectiveness_test = ?,
-            operational_effectiveness_conclusion = ?
-            WHERE id = ?""", (
-            audit_id,
-            risk.get('design_effectiveness_testing', ''),
-            risk.get('design_effectiveness_conclusion', ''),
-            risk.get('operational_effectiveness_test', ''),
-            risk.get('operational_effectiveness_conclusion', ''),
-            row_id
-        ))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("""UPDATE risks SET
+                audit_id = ?,
+                design_effectiveness_testing = ?,
+                design_effectiveness_conclusion = ?,
+                operational_effectiveness_test = ?,
+                operational_effectiveness_conclusion = ?
+                WHERE id = ?""", (
+                audit_id,
+                risk.get('design_effectiveness_testing', ''),
+                risk.get('design_effectiveness_conclusion', ''),
+                risk.get('operational_effectiveness_test', ''),
+                risk.get('operational_effectiveness_conclusion', ''),
+                row_id
+            ))
 
     # Create test documents
     test_documents = [
@@ -1054,16 +1028,14 @@ def seed_vendor_audit(db, audit_id):
     ]
 
     for doc in test_documents:
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
-        if row:
-            risk_db_id = row['id']
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
+            if row:
+                risk_db_id = row['id']
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
 
     # Create issues
     issues = [
@@ -1094,12 +1066,10 @@ def seed_vendor_audit(db, audit_id):
             status=issue['status'],
             assigned_to=issue['assigned_to']
         )
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
-        if row:
-            conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
+            if row:
+                conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
 
     # Create tasks
     tasks = [
@@ -1121,10 +1091,8 @@ def seed_vendor_audit(db, audit_id):
             column_id=task['column_id'],
             priority=task['priority']
         )
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     print(f"  Added {len(risks)} risks, {len(issues)} issues, {len(tasks)} tasks, {len(test_documents)} test documents to Vendor audit")
 
@@ -1208,23 +1176,21 @@ def seed_cyber_audit(db, audit_id):
             control_owner=risk['control_owner'],
             status=risk['status']
         )
-        conn = db._get_conn()
-        conn.execute("""UPDATE risks SET
-            audit_id = ?,
-            design_effectiveness_testing = ?,
-            design_effectiveness_conclusion = ?,
-            operational_effectiveness_test = ?,
-            operational_effectiveness_conclusion = ?
-            WHERE id = ?""", (
-            audit_id,
-            risk.get('design_effectiveness_testing', ''),
-            risk.get('design_effectiveness_conclusion', ''),
-            risk.get('operational_effectiveness_test', ''),
-            risk.get('operational_effectiveness_conclusion', ''),
-            row_id
-        ))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("""UPDATE risks SET
+                audit_id = ?,
+                design_effectiveness_testing = ?,
+                design_effectiveness_conclusion = ?,
+                operational_effectiveness_test = ?,
+                operational_effectiveness_conclusion = ?
+                WHERE id = ?""", (
+                audit_id,
+                risk.get('design_effectiveness_testing', ''),
+                risk.get('design_effectiveness_conclusion', ''),
+                risk.get('operational_effectiveness_test', ''),
+                risk.get('operational_effectiveness_conclusion', ''),
+                row_id
+            ))
 
     # Add test documents for completed controls
     test_documents = [
@@ -1350,16 +1316,14 @@ def seed_cyber_audit(db, audit_id):
 
     # Insert test documents
     for doc in test_documents:
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
-        if row:
-            risk_db_id = row['id']
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
-            conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
-                VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM risks WHERE risk_id = ?", (doc['risk_id'],)).fetchone()
+            if row:
+                risk_db_id = row['id']
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'de_testing', ?, ?)""", (risk_db_id, doc['de_content'], audit_id))
+                conn.execute("""INSERT OR REPLACE INTO test_documents (risk_id, doc_type, content, audit_id)
+                    VALUES (?, 'oe_testing', ?, ?)""", (risk_db_id, doc['oe_content'], audit_id))
 
     # Create issues
     issues = [
@@ -1398,12 +1362,10 @@ def seed_cyber_audit(db, audit_id):
             status=issue['status'],
             assigned_to=issue['assigned_to']
         )
-        conn = db._get_conn()
-        row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
-        if row:
-            conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
-            conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            row = conn.execute("SELECT id FROM issues WHERE issue_id = ?", (issue_id,)).fetchone()
+            if row:
+                conn.execute("UPDATE issues SET audit_id = ? WHERE id = ?", (audit_id, row['id']))
 
     # Create tasks
     tasks = [
@@ -1426,10 +1388,8 @@ def seed_cyber_audit(db, audit_id):
             column_id=task['column_id'],
             priority=task['priority']
         )
-        conn = db._get_conn()
-        conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
-        conn.commit()
-        conn.close()
+        with db._connection() as conn:
+            conn.execute("UPDATE tasks SET audit_id = ? WHERE id = ?", (audit_id, task_id))
 
     print(f"  Added {len(risks)} risks, {len(issues)} issues, {len(tasks)} tasks, {len(test_documents)} test documents to Cybersecurity audit")
 
@@ -2080,20 +2040,18 @@ def assign_admin_to_audits(db, audit_ids):
 
 def clear_existing_data(db):
     """Clear all existing audit data to start fresh."""
-    conn = db._get_conn()
-    # Clear RACM data
-    conn.execute("DELETE FROM tasks")
-    conn.execute("DELETE FROM issues")
-    conn.execute("DELETE FROM risks")
-    conn.execute("DELETE FROM flowcharts")
-    conn.execute("DELETE FROM test_documents")
-    conn.execute("DELETE FROM risk_attachments")
-    conn.execute("DELETE FROM issue_attachments")
-    # Clear audit memberships and audits
-    conn.execute("DELETE FROM audit_memberships")
-    conn.execute("DELETE FROM audits")
-    conn.commit()
-    conn.close()
+    with db._connection() as conn:
+        # Clear RACM data
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM issues")
+        conn.execute("DELETE FROM risks")
+        conn.execute("DELETE FROM flowcharts")
+        conn.execute("DELETE FROM test_documents")
+        conn.execute("DELETE FROM risk_attachments")
+        conn.execute("DELETE FROM issue_attachments")
+        # Clear audit memberships and audits
+        conn.execute("DELETE FROM audit_memberships")
+        conn.execute("DELETE FROM audits")
     print("  Cleared all existing audit data")
 
 
@@ -16,6 +16,7 @@ import sys
 import os
 import tempfile
 import shutil
+import struct
 
 # Mark entire module as regression tests
 pytestmark = [pytest.mark.regression]
@@ -23,7 +24,7 @@ pytestmark = [pytest.mark.regression]
 # Add the app directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from database import RACMDatabase
+from database import RACMDatabase, _pack_embedding
 import app as app_module
 
 
@@ -248,6 +249,49 @@ class TestDatabaseRisks:
         # Should have at least one row
         assert len(data) >= 1
 
+    def test_save_from_spreadsheet(self, test_db, sample_risk):
+        """Existing risks should update in place; new ones are created once."""
+        risk_pk = test_db.get_risk('R001')['id']
+        test_db.save_from_spreadsheet([
+            ['R001', 'Edited risk', 'C-1', 'Owner', '', '', '', '', 'Effective'],
+            ['R010', 'First draft'],
+            ['R010', 'Second draft', 'C-10'],
+            ['', 'No id, skipped'],
+        ], created_by=None)
+
+        edited = test_db.get_risk('R001')
+        assert edited['id'] == risk_pk
+        assert (edited['risk'], edited['status']) == ('Edited risk', 'Effective')
+        new = test_db.get_risk('R010')
+        assert (new['risk'], new['control_id'], new['status']) == ('Second draft', 'C-10', 'Not Complete')
+        assert new['record_status'] == 'draft'
+        assert len(test_db.get_all_risks()) == 2
+
+    def test_get_as_spreadsheet_links(self, test_db, sample_risk):
+        """Rows should carry the risk's flowchart and task, blank when unlinked."""
+        test_db.create_risk('R002', 'Unlinked risk')
+        test_db.save_flowchart('r001-flow', {'drawflow': {}}, risk_id='R001')
+        test_db.create_task('Test R001', risk_id='R001')
+
+        rows = {row[0]: row for row in test_db.get_as_spreadsheet()}
+        assert len(rows['R001']) == 11
+        assert rows['R001'][9:] == ['r001-flow', 'Test R001']
+        assert rows['R002'][8:] == ['Not Complete', '', '']
+
+    def test_get_risks_by_audit_with_links(self, test_db):
+        """An audit's risks should come back with their flowchart and task names."""
+        audit_id = test_db.create_audit('Linked Audit')
+        test_db.create_risk('R020', 'Linked risk', audit_id=audit_id)
+        test_db.create_risk('R021', 'Unlinked risk', audit_id=audit_id)
+        test_db.create_risk('R022', 'Other audit risk')
+        test_db.save_flowchart('r020-flow', {'drawflow': {}}, risk_id='R020')
+        test_db.create_task('Test R020', risk_id='R020')
+
+        risks = test_db.get_risks_by_audit_with_links(audit_id)
+        assert [(r['risk_id'], r['flowchart_name'], r['task_title']) for r in risks] == [
+            ('R020', 'r020-flow', 'Test R020'), ('R021', None, None)]
+        assert risks[0]['risk'] == 'Linked risk'
+
 
 class TestDatabaseIssues:
     """Unit tests for issues database operations."""
@@ -290,6 +334,64 @@ class TestDatabaseIssues:
         issue = test_db.get_issue(sample_issue)
         assert issue['documentation'] == '<p>Test documentation</p>'
 
+    def test_has_issue_documentation_ignores_blank(self, test_db, sample_issue):
+        """Whitespace-only documentation should not count as documented."""
+        assert test_db.has_issue_documentation(sample_issue) is False
+        test_db.save_issue_documentation(sample_issue, ' \n\t ')
+        assert test_db.has_issue_documentation(sample_issue) is False
+        test_db.save_issue_documentation(sample_issue, '<p>Done</p>')
+        assert test_db.has_issue_documentation(sample_issue.lower()) is True
+
+    def test_get_all_issues_summary(self, test_db, sample_risk):
+        """Summaries should flag documentation without carrying its text."""
+        documented = test_db.create_issue(risk_id='R001', title='Documented')
+        blank = test_db.create_issue(risk_id='R001', title='Blank')
+        test_db.save_issue_documentation(documented, '<p>Notes</p>')
+        test_db.save_issue_documentation(blank, ' \n\t')
+
+        summary = {i['issue_id']: i for i in test_db.get_all_issues_summary()}
+        assert summary[documented]['has_documentation'] is True
+        assert summary[blank]['has_documentation'] is False
+        assert 'documentation' not in summary[documented]
+        full = {i['issue_id']: i for i in test_db.get_all_issues()}
+        del full[documented]['documentation']
+        assert {k: v for k, v in summary[documented].items() if k != 'has_documentation'} == full[documented]
+
+    def test_save_issues_from_spreadsheet(self, test_db, sample_risk):
+        """Spreadsheet save should update, number new rows and drop missing ones."""
+        keep = test_db.create_issue(risk_id='R001', title='Keep')
+        test_db.create_issue(risk_id='R001', title='Drop')
+
+        test_db.save_issues_from_spreadsheet([
+            [keep, 'r001', 'Kept and edited', '', 'Low', 'Closed', 'Sam', ''],
+            ['', 'R001', 'New one'],
+            ['ISS-999', 'R001', 'Unknown id becomes new'],
+            ['', '', ''],
+        ])
+
+        issues = {i['issue_id']: i for i in test_db.get_all_issues()}
+        assert sorted(issues) == [keep, 'ISS-003', 'ISS-004']
+        assert issues[keep]['title'] == 'Kept and edited'
+        assert issues[keep]['status'] == 'Closed'
+        assert issues['ISS-003']['title'] == 'New one'
+        assert issues['ISS-004']['severity'] == 'Medium'
+
+    def test_save_issues_from_spreadsheet_skips_unchanged_rows(self, test_db, sample_risk):
+        """Re-saving identical rows should not touch updated_at."""
+        same = test_db.create_issue(risk_id='R001', title='Same')
+        edited = test_db.create_issue(risk_id='R001', title='Before')
+        with test_db._connection() as conn:
+            conn.execute("UPDATE issues SET updated_at = '2000-01-01 00:00:00'")
+
+        test_db.save_issues_from_spreadsheet([
+            [same, 'R001', 'Same', '', 'Medium', 'Open', '', ''],
+            [edited, 'R001', 'After'],
+        ])
+
+        issues = {i['issue_id']: i for i in test_db.get_all_issues()}
+        assert issues[same]['updated_at'] == '2000-01-01 00:00:00'
+        assert issues[edited]['updated_at'] != '2000-01-01 00:00:00'
+        assert issues[edited]['title'] == 'After'
 
 class TestDatabaseTasks:
     """Unit tests for kanban tasks database operations."""
@@ -363,6 +465,24 @@ class TestDatabaseFlowcharts:
         result = test_db.get_flowchart('nonexistent')
         assert result is None
 
+    def test_get_flowchart_with_details(self, test_db):
+        """Nodes should be listed in document order with defaults for missing fields."""
+        data = {'drawflow': {'Home': {'data': {
+            '2': {'name': 'start', 'data': {'name': 'Begin', 'description': 'Kick off'}},
+            '1': {'data': {}},
+        }}}}
+        test_db.save_flowchart('detail-flow', data)
+        test_db.save_flowchart('empty-flow', {'drawflow': {}})
+
+        fc = test_db.get_flowchart_with_details('detail-flow')
+        assert fc['name'] == 'detail-flow'
+        assert fc['nodes'] == [
+            {'id': '2', 'type': 'start', 'label': 'Begin', 'description': 'Kick off'},
+            {'id': '1', 'type': 'unknown', 'label': '', 'description': ''},
+        ]
+        assert test_db.get_flowchart_with_details('empty-flow')['nodes'] == []
+        assert test_db.get_flowchart_with_details('nonexistent') is None
+
     def test_list_flowcharts(self, test_db):
         """Test listing all flowcharts."""
         test_db.save_flowchart('flow1', {'data': 1})
@@ -396,6 +516,43 @@ class TestDatabaseTestDocuments:
         test_db.save_test_document_by_risk_code('R001', 'de_testing', 'content')
         assert test_db.has_test_document('R001', 'de_testing') is True
 
+    def test_save_test_document_by_risk_code_upserts(self, test_db, sample_risk):
+        """Re-saving should keep the document id; unknown risks save nothing."""
+        audit_id = test_db.create_audit('Doc audit')
+        test_db.update_risk('R001', audit_id=audit_id)
+
+        first = test_db.save_test_document_by_risk_code('R001', 'oe_testing', 'v1')
+        second = test_db.save_test_document_by_risk_code('R001', 'oe_testing', 'v2')
+        assert first == second
+
+        doc = test_db.get_test_document_by_risk_code('R001', 'oe_testing')
+        assert doc['content'] == 'v2'
+        assert doc['audit_id'] == audit_id
+        assert test_db.save_test_document_by_risk_code('R404', 'oe_testing', 'x') is None
+        assert test_db.get_test_document_by_risk_code('R404', 'oe_testing') is None
+
+    def test_get_test_documents_for_risk(self, test_db, sample_risk):
+        """Should map each doc_type to its content for one risk."""
+        test_db.save_test_document_by_risk_code('R001', 'de_testing', '<p>DE</p>')
+        test_db.save_test_document_by_risk_code('R001', 'oe_testing', '<p>OE</p>')
+        risk_pk = test_db.get_risk('R001')['id']
+
+        assert test_db.get_test_documents_for_risk(risk_pk) == {
+            'de_testing': '<p>DE</p>', 'oe_testing': '<p>OE</p>'}
+        assert test_db.get_test_documents_for_risk(risk_pk + 1000) == {}
+
+    def test_test_documents_metadata_word_count(self, test_db, sample_risk):
+        """Metadata should count words with HTML tags stripped."""
+        test_db.save_test_document_by_risk_code('R001', 'de_testing', '<p>Walked <b>through</b> the\ncontrol</p>')
+        test_db.save_test_document_by_risk_code('R001', 'oe_testing', ' \n\t')
+
+        meta = {m['doc_type']: m for m in test_db.get_all_test_documents_metadata()}
+        assert meta['de_testing']['word_count'] == 4
+        assert meta['de_testing']['has_content'] is True
+        assert meta['oe_testing']['word_count'] == 0
+        assert meta['oe_testing']['has_content'] is False
+        assert 'content' not in meta['de_testing']
+
 
 class TestDatabaseSQLQueries:
     """Unit tests for SQL query execution (AI tool)."""
@@ -431,6 +588,22 @@ class TestDatabaseSQLQueries:
         with pytest.raises(ValueError, match="Multiple statements"):
             test_db.execute_query("SELECT 1; SELECT 2")
 
+    def test_reject_keyword_names_match(self, test_db):
+        """The error should name the keyword found, including ones behind comments."""
+        with pytest.raises(ValueError, match="forbidden keyword: UNION"):
+            test_db.execute_query("SELECT risk_id FROM risks /* x */ union SELECT email FROM users")
+        with pytest.raises(ValueError, match="forbidden keyword: EXECUTE"):
+            test_db.execute_query("SELECT 1 -- note\nEXECUTE")
+        assert test_db.execute_query("SELECT 1 AS updated_count") == [{'updated_count': 1}]
+
+    def test_find_forbidden_keyword_whole_words_only(self):
+        """Keywords count only as whole words, with or without pyahocorasick."""
+        from database import _find_forbidden_keyword
+        assert _find_forbidden_keyword('SELECT UPDATED_AT, INTO_X FROM T') is None
+        assert _find_forbidden_keyword('SELECT 1 EXECUTE') == 'EXECUTE'
+        assert _find_forbidden_keyword('SELECT A FROM T UNION SELECT B INTO C') == 'UNION'
+        assert _find_forbidden_keyword('DROP') == 'DROP'
+
 
 # ==================== UNIT TESTS: APP HELPERS ====================
 
@@ -1204,6 +1377,39 @@ class TestAISystemPrompt:
         assert 'Your Capabilities' not in prompt
 
 
+    def test_full_context_cached_until_write(self, test_db, client):
+        """Repeated context reads should be independent copies that see new writes."""
+        first = test_db.get_full_context()
+        first['risks'].append({'risk_id': 'BOGUS'})
+        first['risk_summary']['total'] = -1
+        second = test_db.get_full_context()
+        assert second['risks'] == [] and second['risk_summary']['total'] == 0
+
+        test_db.create_risk('R900', 'New risk')
+        assert [r['risk_id'] for r in test_db.get_full_context()['risks']] == ['R900']
+
+    def test_full_context_reads_on_worker_threads(self, test_db, client, monkeypatch):
+        """Context reads should run on the worker pool and land under their keys."""
+        import threading
+        threads = []
+        get_all_risks = test_db.get_all_risks
+        monkeypatch.setattr(test_db, 'get_all_risks',
+                            lambda: threads.append(threading.current_thread().name) or get_all_risks())
+        test_db.create_risk('R901', 'Pooled risk')
+
+        context = test_db.get_full_context()
+        assert threads and threads[0].startswith('racm-context')
+        assert [r['risk_id'] for r in context['risks']] == ['R901']
+        assert context['risk_summary']['total'] == 1
+
+    def test_full_context_sees_open_transaction(self, test_db, client):
+        """Inside an open transaction the context should include its uncommitted rows."""
+        test_db.create_risk('X1', 'Committed risk')
+        with test_db._connection():
+            test_db.create_risk('X2', 'Uncommitted risk')
+            context = test_db.get_full_context()
+        assert [r['risk_id'] for r in context['risks']] == ['X1', 'X2']
+
 # ==================== FELIX AI TESTS ====================
 
 class TestFelixAIPage:
@@ -1605,6 +1811,19 @@ class TestLibraryDatabase:
         )
         assert chunk_id is not None
 
+    def test_add_library_chunks_in_order(self, test_db):
+        """Bulk chunk insert should return one id per chunk in input order."""
+        doc_id = test_db.add_library_document(name='Bulk Doc', filename='bulk.pdf', original_filename='Bulk.pdf')
+
+        chunk_ids = test_db.add_library_chunks(doc_id, [
+            {'chunk_index': i, 'content': f'Chunk {i}', 'section': 'S', 'token_count': 2}
+            for i in range(3)
+        ])
+
+        chunks = test_db.get_library_chunks(doc_id)
+        assert [c['id'] for c in chunks] == chunk_ids
+        assert [c['content'] for c in chunks] == ['Chunk 0', 'Chunk 1', 'Chunk 2']
+
     def test_get_library_chunks(self, test_db):
         """Should retrieve chunks for a document."""
         doc_id = test_db.add_library_document(name='Multi-chunk Doc', filename='multi.pdf', original_filename='Multi.pdf')
@@ -1638,6 +1857,15 @@ class TestLibraryDatabase:
         assert 'by_type' in stats
         assert stats['total_documents'] >= 1
 
+    def test_get_library_stats_cached_until_write(self, test_db):
+        """Cached stats should be copies and refresh after a write."""
+        first = test_db.get_library_stats()
+        first['by_type']['bogus'] = 99
+        assert 'bogus' not in test_db.get_library_stats()['by_type']
+
+        test_db.add_library_document(name='New Doc', filename='n.pdf', original_filename='N.pdf')
+        assert test_db.get_library_stats()['total_documents'] == first['total_documents'] + 1
+
     def test_search_library_keyword(self, test_db):
         """Should search library by keyword."""
         doc_id = test_db.add_library_document(name='Searchable Doc', filename='search.pdf', original_filename='Search.pdf', doc_type='methodology', source='IIA')
@@ -1649,6 +1877,86 @@ class TestLibraryDatabase:
         assert len(results) >= 1
         assert any('audit' in r['content'].lower() for r in results)
 
+    def test_search_library_keyword_matches_any_word(self, test_db):
+        """Each chunk matching any query word should be returned once."""
+        doc_id = test_db.add_library_document(name='Keyword Doc', filename='kw.pdf', original_filename='KW.pdf')
+        test_db.add_library_chunk(doc_id, 0, 'Segregation of duties for payments.')
+        test_db.add_library_chunk(doc_id, 1, 'Payments need segregation and approval.')
+        test_db.add_library_chunk(doc_id, 2, 'Unrelated backup text.', section='Approval matrix')
+        test_db.add_library_chunk(doc_id, 3, 'Nothing relevant here.')
+
+        results = test_db.search_library_keyword('segregation approval')
+        assert sorted(r['chunk_index'] for r in results) == [0, 1, 2]
+        assert results[0]['chunk_index'] == 1  # Matches both words
+
+    def test_search_library_keyword_index_follows_chunks(self, test_db):
+        """The full-text index should stem words and track chunk edits and deletes."""
+        doc_id = test_db.add_library_document(name='FTS Doc', filename='f.pdf', original_filename='F.pdf')
+        test_db.add_library_chunk(doc_id, 0, 'Testing of key controls.')
+
+        assert [r['chunk_index'] for r in test_db.search_library_keyword('control')] == [0]
+        with test_db._connection() as conn:
+            conn.execute("UPDATE library_chunks SET content = 'Vendor onboarding'")
+        assert test_db.search_library_keyword('control') == []
+        assert len(test_db.search_library_keyword('vendor')) == 1
+
+        test_db.delete_library_document(doc_id)
+        assert test_db.search_library_keyword('vendor') == []
+
+    def test_search_library_keyword_without_fts(self, test_db):
+        """Without the FTS5 table the search should fall back to LIKE."""
+        doc_id = test_db.add_library_document(name='Like Doc', filename='l.pdf', original_filename='L.pdf')
+        with test_db._connection() as conn:
+            conn.executescript("""
+                DROP TRIGGER library_chunks_fts_ai;
+                DROP TRIGGER library_chunks_fts_ad;
+                DROP TRIGGER library_chunks_fts_au;
+                DROP TABLE library_chunks_fts;
+            """)
+        test_db.add_library_chunk(doc_id, 0, 'Desegregation of duties.')
+
+        assert len(test_db.search_library_keyword('segregation')) == 1
+
+    def test_hydrate_chunks_keeps_requested_order(self, test_db):
+        """Hydrated chunks should follow the order of the ids passed in."""
+        doc_id = test_db.add_library_document(name='Hydrate Doc', filename='h.pdf', original_filename='H.pdf', source='IIA')
+        ids = test_db.add_library_chunks(doc_id, [
+            {'chunk_index': i, 'content': f'Chunk {i}'} for i in range(3)
+        ])
+
+        chunks = test_db.hydrate_chunks([ids[2], ids[0]])
+        assert [c['content'] for c in chunks] == ['Chunk 2', 'Chunk 0']
+        assert chunks[0]['document_name'] == 'Hydrate Doc'
+        assert test_db.hydrate_chunks([]) == []
+
+    def test_search_library_keyword_cached_until_write(self, test_db, monkeypatch):
+        """Queries differing only in case and spacing share a cache entry until a write."""
+        doc_id = test_db.add_library_document(name='Cache Doc', filename='c.pdf', original_filename='C.pdf')
+        test_db.add_library_chunk(doc_id, 0, 'Access review evidence.')
+
+        calls = []
+        fetch = test_db._fetch_dicts
+        monkeypatch.setattr(test_db, '_fetch_dicts', lambda *a: calls.append(a) or fetch(*a))
+        first = test_db.search_library_keyword('Access  Review')
+        first[0]['content'] = 'edited'
+        again = test_db.search_library_keyword(' access review ')
+        assert len(calls) == 1
+        assert again[0]['content'] == 'Access review evidence.'
+
+        test_db.add_library_chunk(doc_id, 1, 'Second access note.')
+        assert len(test_db.search_library_keyword('access review')) == 2
+
+    def test_update_library_document_fields(self, test_db):
+        """Updating some fields should leave the others untouched."""
+        doc_id = test_db.add_library_document(name='Doc', filename='d.pdf', original_filename='D.pdf',
+                                              source='IIA', description='Original')
+        assert test_db.update_library_document(doc_id, total_chunks=4, description=None)
+
+        doc = test_db.get_library_document(doc_id)
+        assert doc['total_chunks'] == 4
+        assert doc['description'] is None
+        assert doc['source'] == 'IIA'
+
 
 class TestLibraryAPI:
     """Integration tests for library API endpoints."""
@@ -1769,6 +2077,17 @@ class TestLibraryDocumentProcessing:
         except Exception:
             pytest.skip("Embedding model not available")
 
+    def test_pack_embedding_float32_layout(self):
+        """Lists and NumPy arrays should pack to the same float32 blob."""
+        values = [0.5, -1.25, 3.0]
+        expected = struct.pack('3f', *values)
+        assert _pack_embedding(values) == expected
+        try:
+            import numpy as np
+        except ImportError:
+            pytest.skip("NumPy not available")
+        assert _pack_embedding(np.array(values, dtype=np.float64)) == expected
+
 
 class TestSearchAuditLibraryTool:
     """Unit tests for the search_audit_library AI tool."""
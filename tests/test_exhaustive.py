@@ -10,12 +10,17 @@ import json
 import pytest
 import uuid
 import app as app_module
-from database import RACMDatabase
+from database import RACMDatabase, _SQL_AUDITS_ORDER_BY
 
 # Mark entire module as regression tests
 pytestmark = [pytest.mark.regression, pytest.mark.api]
 
 
+def _query_plan(conn, sql, params=()):
+    """Return SQLite's EXPLAIN QUERY PLAN details for `sql` as one string."""
+    return ' '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
 # ==================== FIXTURES ====================
 
 @pytest.fixture
@@ -87,6 +92,7 @@ def auth_client(client, test_db, test_audit):
         """, (test_audit, user['id']))
 
     # Patch get_db in all modules
+    original_get_db = database_module.get_db
     test_get_db = lambda db_path=None: test_db
     app_module.get_db = test_get_db
     database_module.get_db = test_get_db
@@ -100,7 +106,9 @@ def auth_client(client, test_db, test_audit):
         sess['is_admin'] = user['is_admin']
         sess['active_audit_id'] = test_audit
 
-    return client
+    yield client
+
+    app_module.get_db = database_module.get_db = auth_module.get_db = original_get_db
 
 
 @pytest.fixture
@@ -249,6 +257,14 @@ class TestPageLoading:
 class TestAuthentication:
     """Test authentication flows."""
 
+    def test_request_memo_scoped_to_app_db(self, client, test_db):
+        """The request hooks should open and close the memo on the db routes use."""
+        with app_module.app.test_request_context('/'):
+            app_module.app.preprocess_request()
+            assert test_db._request_local.cache == {}
+            app_module.app.do_teardown_request()
+        assert test_db._request_local.cache is None
+
     def test_login_with_valid_credentials(self, client, test_db):
         """Login should succeed with valid credentials."""
         from werkzeug.security import generate_password_hash
@@ -382,6 +398,19 @@ class TestRiskAPI:
         })
         assert response.status_code == 200
 
+    def test_partial_update_risk_keeps_other_fields(self, test_db):
+        """Partial updates should only touch the given fields, including NULLs."""
+        test_db.create_risk('R_PART', risk='Original', control_owner='Owner')
+        test_db.update_risk('R_PART', admin_lock_reason='Locked for review')
+
+        assert test_db.update_risk('R_PART', status='Effective', admin_lock_reason=None)
+
+        risk = test_db.get_risk('R_PART')
+        assert (risk['risk'], risk['control_owner'], risk['status']) == ('Original', 'Owner', 'Effective')
+        assert risk['admin_lock_reason'] is None
+        assert risk['updated_at']
+        assert test_db.update_risk('R_PART', not_a_column='x') is False
+
     def test_delete_risk(self, auth_client, sample_data):
         """Should delete a risk."""
         # Create a risk to delete
@@ -445,6 +474,38 @@ class TestFlowchartAPI:
             json=flowchart_data)
         assert response.status_code == 200
 
+    def test_flowchart_data_round_trips(self, test_db):
+        """Stored Drawflow data should come back unchanged."""
+        flowchart_data = {
+            'drawflow': {
+                'Home': {'data': {'1': {
+                    'id': 1, 'name': 'Prüfung – “start”', 'pos_x': 12.5,
+                    'inputs': {}, 'outputs': {'output_1': {'connections': []}},
+                    'data': {'note': None, 'done': True},
+                }}}
+            }
+        }
+        test_db.save_flowchart('round-trip', flowchart_data)
+
+        assert test_db.get_flowchart('round-trip')['data'] == flowchart_data
+
+    def test_flowchart_data_stored_compact(self, test_db):
+        """Stored Drawflow JSON should carry no whitespace between tokens."""
+        test_db.save_flowchart('compact', {'drawflow': {'Home': {'data': {'1': {'pos_x': 1}}}}})
+
+        with test_db._connection() as conn:
+            stored = conn.execute("SELECT data FROM flowcharts WHERE name = 'compact'").fetchone()[0]
+        assert stored == '{"drawflow":{"Home":{"data":{"1":{"pos_x":1}}}}}'
+
+    def test_save_flowchart_update_returns_existing_id(self, test_db):
+        """Re-saving a flowchart in the same audit should return its original id."""
+        audit_id = test_db.create_audit('Flowchart audit')
+        first = test_db.save_flowchart('upsert', {'v': 1}, audit_id=audit_id)
+        second = test_db.save_flowchart('upsert', {'v': 2}, audit_id=audit_id)
+
+        assert first == second
+        assert test_db.get_flowchart('upsert')['data'] == {'v': 2}
+
 
 # ==================== KANBAN/TASK API TESTS ====================
 
@@ -458,6 +519,21 @@ class TestKanbanAPI:
         data = response.get_json()
         assert 'columns' in data or isinstance(data, dict)
 
+    def test_kanban_format_buckets_cards_by_column(self, test_db):
+        """Cards land in their column with the linked risk's code."""
+        test_db.create_risk('R900', 'Kanban risk')
+        test_db.create_task(title='First', column_id='testing', risk_id='R900')
+        test_db.create_task(title='Second', column_id='testing')
+        test_db.create_task(title='Elsewhere', column_id='review')
+
+        board = test_db.get_kanban_format()['boards']['default']
+        columns = {c['id']: c['items'] for c in board['columns']}
+        assert [c['title'] for c in columns['testing']] == ['First', 'Second']
+        assert columns['testing'][0]['risk_id'] == 'R900'
+        assert columns['testing'][1]['risk_id'] == ''
+        assert [c['title'] for c in columns['review']] == ['Elsewhere']
+        assert columns['planning'] == []
+
     def test_save_kanban_board(self, auth_client, sample_data):
         """Should save kanban board state."""
         response = auth_client.post('/api/kanban/default', json={
@@ -512,6 +588,19 @@ class TestKanbanAPI:
         })
         assert response.status_code in [200, 201]
 
+    def test_create_task_after_risk_replaced_elsewhere(self, test_db):
+        """Tasks should link to the live risk even if it was recreated outside the class."""
+        test_db.create_risk('R_LINK', risk='First')
+        first = test_db.create_task('First task', risk_id='R_LINK')
+        assert test_db.get_task(first)['linked_risk_id'] == 'R_LINK'
+
+        with test_db._connection() as conn:
+            conn.execute("DELETE FROM risks WHERE risk_id = 'R_LINK'")
+            conn.execute("INSERT INTO risks (risk_id, risk) VALUES ('R_LINK', 'Second')")
+
+        second = test_db.create_task('Second task', risk_id='R_LINK')
+        assert test_db.get_task(second)['risk_id'] == test_db.get_risk('R_LINK')['id']
+
 
 # ==================== AUDIT API TESTS ====================
 
@@ -572,16 +661,127 @@ class TestAuditAPI:
         ])
         assert response.status_code == 200
 
+    def test_audits_spreadsheet_rows_match_format(self, test_db):
+        """Streamed spreadsheet rows should match the dict-based formatter."""
+        test_db.create_audit('Second', quarter='Q2', estimated_hours=3.5, owner='Kim')
+        test_db.create_audit('First', quarter='Q1', status=None)
+
+        rows = list(test_db.iter_audits_as_spreadsheet())
+
+        assert rows == test_db.audits_to_spreadsheet_format(test_db.get_all_audits())
+        assert [r[1] for r in rows] == ['First', 'Second']
+        assert rows[1][3] == 'Kim' and rows[1][10] == '3.5' and rows[0][7] == 'planning'
+
+    def test_save_audits_spreadsheet_batches(self, test_db):
+        """Spreadsheet save should create, update and delete in one pass."""
+        keep = test_db.create_audit('Keep Me', quarter='Q1')
+        drop = test_db.create_audit('Drop Me')
+
+        stats = test_db.save_audits_from_spreadsheet([
+            [str(keep), 'Kept Audit', 'Finance', '', '', '', 'Q3', 'fieldwork', '', '', '12', ''],
+            ['', 'Brand New'],
+            ['', ''],
+        ])
+
+        assert stats == {'created': 1, 'updated': 1, 'deleted': 1}
+        assert test_db.get_audit(drop) is None
+        kept = test_db.get_audit(keep)
+        assert (kept['title'], kept['audit_area'], kept['status']) == ('Kept Audit', 'Finance', 'fieldwork')
+        assert kept['quarter'] == 'Q3' and kept['estimated_hours'] == 12.0
+        assert [a['title'] for a in test_db.get_all_audits()].count('Brand New') == 1
+
+    def test_bulk_upsert_audits(self, test_db):
+        """Bulk upsert should update rows with known ids and insert the rest."""
+        existing = test_db.create_audit('Old Title', status='planning')
+
+        written = test_db.bulk_upsert_audits([
+            {'id': existing, 'title': 'New Title', 'status': 'review'},
+            {'title': 'Bulk "Quoted" Audit', 'status': 'planning', 'estimated_hours': 7.5},
+        ])
+
+        assert written == 2
+        audits = {a['title']: a for a in test_db.get_all_audits()}
+        assert audits['New Title']['id'] == existing
+        assert audits['New Title']['status'] == 'review'
+        assert audits['Bulk "Quoted" Audit']['estimated_hours'] == 7.5
+
+    def test_save_large_audits_spreadsheet(self, test_db):
+        """Large spreadsheet saves should keep the same stats via the bulk path."""
+        keep = test_db.create_audit('Keep Me')
+        rows = [[str(keep), 'Kept Audit']] + [['', f'Audit {i}', '', '', '', '', 'Q2'] for i in range(60)]
+
+        stats = test_db.save_audits_from_spreadsheet(rows)
+
+        assert stats == {'created': 60, 'updated': 1, 'deleted': 0}
+        audits = test_db.get_all_audits()
+        assert len(audits) == 61
+        assert test_db.get_audit(keep)['title'] == 'Kept Audit'
+        assert all(a['status'] == 'planning' for a in audits)
+
     def test_get_audits_kanban(self, auth_client, sample_data):
         """Should get audits in kanban format."""
         response = auth_client.get('/api/audits/kanban')
         assert response.status_code == 200
 
+    def test_audits_kanban_groups_by_status(self, test_db):
+        """Audit kanban should bucket audits by status in plan order."""
+        test_db.create_audit('Late Audit', quarter='Q4', status='fieldwork')
+        test_db.create_audit('Early Audit', quarter='Q1', status='fieldwork')
+        test_db.create_audit('No Status Audit', status=None)
+        test_db.create_audit('Odd Audit', status='cancelled')
+
+        board = test_db.get_audits_as_kanban()
+
+        columns = {c['id']: [item['title'] for item in c['items']] for c in board['columns']}
+        assert list(columns) == ['planning', 'in_progress', 'fieldwork', 'review', 'complete']
+        assert columns['fieldwork'] == ['Early Audit', 'Late Audit']
+        assert columns['planning'] == ['No Status Audit']
+        assert 'Odd Audit' not in sum(columns.values(), [])
+
+    def test_audit_plan_order_reads_from_index(self, test_db):
+        """Plan-ordered audit lists should walk the sort index, not sort in a temp b-tree."""
+        test_db.create_audit('Unscheduled')
+        test_db.create_audit('Second', quarter='Q2', planned_start='2025-04-01')
+        test_db.create_audit('First', quarter='Q1', planned_start='2025-01-15')
+
+        with test_db._connection() as conn:
+            plan = _query_plan(conn, "SELECT * FROM audits" + _SQL_AUDITS_ORDER_BY)
+        assert 'idx_audits_plan_order' in plan
+        assert 'TEMP B-TREE' not in plan
+        assert [a['title'] for a in test_db.get_all_audits()] == ['First', 'Second', 'Unscheduled']
+
+    def test_audit_scoped_record_reads_use_status_composite(self, test_db):
+        """audit_id lookups on risks and issues should use the (audit_id, record_status) index."""
+        with test_db._connection() as conn:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            for table in ('risks', 'issues'):
+                assert f'idx_{table}_audit' not in names
+                assert f'idx_{table}_owner_role' not in names
+                plan = _query_plan(conn, f"SELECT record_status, COUNT(*) FROM {table} "
+                                         f"WHERE audit_id = ? GROUP BY record_status", (1,))
+                assert f'COVERING INDEX idx_{table}_audit_status' in plan
+
     def test_get_audits_summary(self, auth_client, sample_data):
         """Should get audits summary."""
         response = auth_client.get('/api/audits/summary')
         assert response.status_code == 200
 
+    def test_audit_summary_counts(self, test_db):
+        """Audit summary should count by status, quarter and area in one pass."""
+        test_db.create_audit('A1', status='fieldwork', quarter='Q1', audit_area='IT')
+        test_db.create_audit('A2', status='fieldwork', quarter='Q1')
+        test_db.create_audit('A3', status=None, audit_area='IT')
+
+        summary = test_db.get_audit_summary()
+
+        assert summary == {
+            'total': 3,
+            'by_status': {'fieldwork': 2, 'planning': 1},
+            'by_quarter': {'Q1': 2},
+            'by_area': {'IT': 2},
+        }
+        assert test_db.get_task_summary() == {'total': 0, 'by_column': {}, 'by_priority': {}}
+
 
 # ==================== ISSUE API TESTS ====================
 
@@ -605,6 +805,17 @@ class TestIssueAPI:
             response = auth_client.get(f'/api/issues/{issue_id}')
             assert response.status_code == 200
 
+    def test_issue_numbering_uses_index(self, test_db):
+        """Next issue number should come from the expression index, not a scan."""
+        test_db.create_risk('R001', 'Numbering risk')
+        test_db.create_issue('R001', 'First')
+        test_db.create_issue('R001', 'Second')
+
+        with test_db._connection() as conn:
+            plan = _query_plan(conn, "SELECT MAX(CAST(SUBSTR(issue_id, 5) AS INTEGER)) FROM issues")
+        assert 'idx_issues_number' in plan
+        assert test_db._generate_issue_id() == 'ISS-003'
+
     def test_create_issue(self, auth_client, sample_data):
         """Should create an issue."""
         response = auth_client.post('/api/issues', json={
@@ -657,6 +868,18 @@ class TestIssueAPI:
             response = auth_client.get(f'/api/issues/{issue_id}/documentation')
             assert response.status_code == 200
 
+    def test_issue_documentation_reports_blank_as_missing(self, auth_client, test_db, sample_data):
+        """has_documentation should follow the text returned alongside it."""
+        issue_id = auth_client.get('/api/issues').get_json()[0]['issue_id']
+
+        test_db.save_issue_documentation(issue_id, '  \n ')
+        data = auth_client.get(f'/api/issues/{issue_id}/documentation').get_json()
+        assert data == {'documentation': '  \n ', 'has_documentation': False}
+
+        test_db.save_issue_documentation(issue_id, '<p>Root cause</p>')
+        data = auth_client.get(f'/api/issues/{issue_id}/documentation').get_json()
+        assert data['has_documentation'] is True
+
     def test_save_issue_documentation(self, auth_client, sample_data):
         """Should save issue documentation."""
         list_resp = auth_client.get('/api/issues')
@@ -725,6 +948,18 @@ class TestLibraryAPI:
         data = response.get_json()
         assert isinstance(data, list)
 
+    def test_library_document_lists_read_in_name_order(self, test_db):
+        """Name-ordered document lists should come straight from an index."""
+        test_db.add_library_document('Beta', 'b.pdf', 'b.pdf', doc_type='standard')
+        test_db.add_library_document('Alpha', 'a.pdf', 'a.pdf', doc_type='standard')
+
+        with test_db._connection() as conn:
+            for where, params in (('', ()), ('WHERE doc_type = ? ', ('standard',))):
+                plan = _query_plan(conn, f"SELECT * FROM library_documents {where}ORDER BY name",
+                                   params)
+                assert 'TEMP B-TREE' not in plan
+        assert [d['name'] for d in test_db.list_library_documents('standard')] == ['Alpha', 'Beta']
+
     def test_upload_library_document(self, auth_client, sample_data, tmp_path):
         """Should upload library document."""
         test_file = (io.BytesIO(b'Sample document content for library'), 'test-doc.txt')
@@ -771,6 +1006,48 @@ class TestAttachmentAPI:
         data = response.get_json()
         assert isinstance(data, list)
 
+    def test_attachment_lists_read_in_index_order(self, test_db):
+        """Per-parent attachment lists should seek an index and need no sort."""
+        test_db.create_risk('R001', 'Attachment risk')
+        test_db.add_risk_attachment('R001', 'a.txt', 'a.txt', 1, 'text/plain')
+
+        with test_db._connection() as conn:
+            for table, parent in (('issue_attachments', 'issue_id'),
+                                  ('risk_attachments', 'risk_id'),
+                                  ('audit_attachments', 'audit_id')):
+                plan = _query_plan(conn, f"SELECT * FROM {table} WHERE {parent} = ? "
+                                         "ORDER BY uploaded_at DESC", ('X',))
+                assert f'{parent}=?' in plan
+                assert 'TEMP B-TREE' not in plan
+        assert len(test_db.get_attachments_for_risk('r001')) == 1
+
+    def test_attachment_lists_omit_extracted_text(self, test_db):
+        """Lists should leave out extracted text; single fetches keep it."""
+        test_db.create_risk('R001', 'Attachment risk')
+        att_id = test_db.add_risk_attachment('R001', 'a.txt', 'a.txt', 1, 'text/plain',
+                                             extracted_text='long text')
+
+        listed = test_db.get_attachments_for_risk('R001')
+        assert [a['id'] for a in listed] == [att_id]
+        assert 'extracted_text' not in listed[0]
+        assert listed[0]['original_filename'] == 'a.txt'
+        assert test_db.get_risk_attachment(att_id)['extracted_text'] == 'long text'
+
+    def test_read_extracted_text_in_chunks(self, test_db):
+        """Extracted text should read back whole or cut at max_chars."""
+        test_db.create_risk('R001', 'Attachment risk')
+        text = 'Prüfung ' * 5000
+        att_id = test_db.add_risk_attachment('R001', 'a.txt', 'a.txt', 1, 'text/plain',
+                                             extracted_text=text)
+        bare_id = test_db.add_risk_attachment('R001', 'b.txt', 'b.txt', 1, 'text/plain',
+                                              extracted_text=None)
+
+        assert test_db.read_extracted_text('risk', att_id, chunk_size=7) == text
+        assert test_db.read_extracted_text('risk', att_id, max_chars=10, chunk_size=7) == text[:10]
+        assert test_db.read_extracted_text('risk', bare_id) is None
+        assert test_db.read_extracted_text('risk', 9999) is None
+        assert 'extracted_text' not in test_db.get_risk_attachment(att_id, with_text=False)
+
     def test_upload_issue_attachment(self, auth_client, sample_data):
         """Should upload attachment to issue."""
         list_resp = auth_client.get('/api/issues')
@@ -1001,6 +1278,34 @@ class TestExportImportAPI:
         response = auth_client.get('/api/export')
         assert response.status_code == 200
 
+    def test_export_json_matches_export_all(self, test_db, auth_client, sample_data):
+        """The JSON export should carry the same rows, flowchart data included."""
+        response = auth_client.get('/api/export')
+        assert response.mimetype == 'application/json'
+
+        exported = response.get_json()
+        expected = test_db.export_all()
+        assert exported['flowcharts'] and exported['risks']
+        for key in ('risks', 'tasks', 'flowcharts'):
+            assert exported[key] == expected[key]
+
+    def test_import_all_skips_unchanged_flowcharts(self, test_db):
+        """Re-importing a flowchart unchanged should not rewrite its row."""
+        backup = {'flowcharts': [{'id': 1, 'name': 'same', 'data': {'n': 1}},
+                                 {'id': 2, 'name': 'changed', 'data': {'n': 2}}]}
+        test_db.import_all(backup)
+        with test_db._connection() as conn:
+            conn.execute("UPDATE flowcharts SET updated_at = '2000-01-01 00:00:00'")
+
+        backup['flowcharts'][1]['data'] = {'n': 3}
+        test_db.import_all(backup)
+
+        with test_db._connection() as conn:
+            stamps = dict(conn.execute("SELECT name, updated_at FROM flowcharts").fetchall())
+        assert stamps['same'] == '2000-01-01 00:00:00'
+        assert stamps['changed'] != '2000-01-01 00:00:00'
+        assert test_db.get_flowchart('changed')['data'] == {'n': 3}
+
     def test_import_data(self, auth_client, sample_data):
         """Should import data."""
         response = auth_client.post('/api/import', json={
@@ -1010,6 +1315,17 @@ class TestExportImportAPI:
         assert response.status_code in [200, 400]
 
 
+    def test_import_all_tasks_and_flowcharts(self, test_db):
+        """Imported tasks and flowcharts should replace existing rows when clearing."""
+        test_db.create_task('Old task')
+        test_db.import_all({
+            'tasks': [{'id': 7, 'title': 'Imported task'}],
+            'flowcharts': [{'name': 'imported-flow', 'data': {'drawflow': {}}}],
+        }, clear_existing=True)
+
+        assert [(t['id'], t['title']) for t in test_db.get_all_tasks()] == [(7, 'Imported task')]
+        assert test_db.get_flowchart('imported-flow')['data'] == {'drawflow': {}}
+
 # ==================== ERROR HANDLING TESTS ====================
 
 class TestErrorHandling:
@@ -122,7 +122,7 @@ def client(test_db, tmp_path):
             sess['active_audit_id'] = test_db._test_audit_id
         yield client
 
-    app_module.get_db = original_get_db
+    app_module.get_db = database_module.get_db = auth_module.get_db = original_get_db
     app_module.db = original_db
 
 
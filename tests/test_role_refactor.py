@@ -8,6 +8,7 @@ Run with: pytest tests/test_role_refactor.py -v
 Run regression tests: pytest -m regression
 Run auth tests: pytest -m auth
 """
+import os
 import pytest
 import uuid
 import app as app_module
@@ -26,7 +27,8 @@ def test_db(tmp_path):
     """Create a temporary test database with fresh schema."""
     db_path = tmp_path / "test.db"
     db = RACMDatabase(str(db_path))
-    return db
+    yield db
+    db.close_all()
 
 
 @pytest.fixture
@@ -43,6 +45,7 @@ def client(test_db, tmp_path):
     # Save original db references
     original_app_db = app_module.db
     original_db_instance = db_module._db_instance
+    original_get_db = db_module.get_db
 
     # Patch get_db in all modules
     test_get_db = lambda db_path=None: test_db
@@ -58,6 +61,7 @@ def client(test_db, tmp_path):
     # Restore original db references
     app_module.db = original_app_db
     db_module._db_instance = original_db_instance
+    app_module.get_db = db_module.get_db = auth_module.get_db = original_get_db
 
 
 def unique_email(prefix='user'):
@@ -180,6 +184,22 @@ class TestCurrentRoleBehavior:
         assert assigned_audit_id in audit_ids
         assert unassigned_audit_id not in audit_ids
 
+    def test_audits_for_user_role_ordering(self, test_db):
+        """Full-visibility roles get plan order; viewers get their audits by title."""
+        viewer_id = create_user(test_db, unique_email('viewer'), 'Viewer User', role='viewer')
+        test_db.create_audit(title='Zeta', quarter='Q1')
+        beta_id = test_db.create_audit(title='Beta', quarter='Q3')
+        alpha_id = test_db.create_audit(title='Alpha', quarter='Q2')
+        test_db.add_viewer_to_audit(beta_id, viewer_id)
+        test_db.add_viewer_to_audit(alpha_id, viewer_id)
+
+        all_audits = test_db.get_all_audits()
+        assert [a['title'] for a in all_audits] == ['Zeta', 'Alpha', 'Beta']
+        assert test_db.get_audits_for_user_role(viewer_id, 'auditor') == all_audits
+        assert test_db.get_audits_for_user_role(viewer_id, 'viewer', is_admin=True) == all_audits
+        viewer_audits = test_db.get_audits_for_user_role(viewer_id, 'viewer')
+        assert [a['title'] for a in viewer_audits] == ['Alpha', 'Beta']
+
     def test_viewer_cannot_edit_records(self, client, test_db):
         """Viewer users should not be able to edit records.
 
@@ -482,6 +502,384 @@ class TestAuditTeamWorkflow:
 
         assert response.status_code == 200
 
+    def test_audit_team_split_by_role(self, test_db):
+        """Auditors and reviewers are partitioned from a single team lookup."""
+        auditor_id = create_user(test_db, unique_email('auditor'), 'Auditor User', role='auditor')
+        reviewer_id = create_user(test_db, unique_email('reviewer'), 'Reviewer User', role='auditor')
+        viewer_id = create_user(test_db, unique_email('viewer'), 'Viewer User', role='viewer')
+        audit_id = create_audit(test_db, 'Test Audit')
+        add_user_to_audit_team(test_db, audit_id, auditor_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_id, reviewer_id, 'reviewer')
+        add_user_to_audit_team(test_db, audit_id, viewer_id, 'viewer')
+
+        split = test_db.get_audit_team_split(audit_id)
+        assert [m['user_id'] for m in split['auditors']] == [auditor_id]
+        assert [m['user_id'] for m in split['reviewers']] == [reviewer_id]
+        assert split['auditors'] == test_db.get_audit_auditors(audit_id)
+        assert split['reviewers'] == test_db.get_audit_reviewers(audit_id)
+
+    def test_membership_checks_memoized_within_request(self, test_db):
+        """Membership checks are cached between begin_request() and end_request()."""
+        user_id = create_user(test_db, unique_email('auditor'), 'Auditor User', role='auditor')
+        audit_id = create_audit(test_db, 'Test Audit')
+
+        test_db.begin_request()
+        try:
+            assert test_db.is_auditor_on_audit(user_id, audit_id) is False
+            # A write that bypasses the team helpers is not seen mid-request
+            add_user_to_audit_team(test_db, audit_id, user_id, 'auditor')
+            assert test_db.is_auditor_on_audit(user_id, audit_id) is False
+            # Team helpers invalidate the cache
+            test_db.add_to_audit_team(audit_id, user_id, 'reviewer')
+            assert test_db.is_auditor_on_audit(user_id, audit_id) is True
+            assert test_db.is_reviewer_on_audit(user_id, audit_id) is True
+        finally:
+            test_db.end_request()
+
+        test_db.remove_from_audit_team(audit_id, user_id)
+        assert test_db.is_team_member_on_audit(user_id, audit_id) is False
+
+    def test_remove_users_from_audit_team(self, test_db):
+        """Bulk removal deletes the given users' memberships only."""
+        audit_id = create_audit(test_db, 'Test Audit')
+        user_ids = [create_user(test_db, unique_email('member'), f'Member {i}') for i in range(3)]
+        for user_id in user_ids:
+            add_user_to_audit_team(test_db, audit_id, user_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_id, user_ids[0], 'reviewer')
+
+        assert test_db.remove_users_from_audit_team(audit_id, user_ids[:2], 'auditor') == 2
+        assert test_db.get_user_team_roles_on_audit(user_ids[0], audit_id) == ['reviewer']
+        assert test_db.is_auditor_on_audit(user_ids[2], audit_id) is True
+
+        assert test_db.remove_users_from_audit_team(audit_id, user_ids) == 2
+        assert test_db.get_audit_team(audit_id) == []
+        assert test_db.remove_users_from_audit_team(audit_id, []) == 0
+
+    def test_add_membership_duplicate_returns_minus_one(self, test_db):
+        """Re-adding an existing membership reports -1 instead of raising."""
+        audit_id = create_audit(test_db, 'Test Audit')
+        user_id = create_user(test_db, unique_email('member'), 'Member User')
+
+        team_id = test_db.add_to_audit_team(audit_id, user_id, 'auditor')
+        assert team_id > 0
+        assert test_db.add_to_audit_team(audit_id, user_id, 'auditor') == -1
+
+        viewer_id = test_db.add_viewer_to_audit(audit_id, user_id)
+        assert viewer_id > 0
+        assert test_db.add_viewer_to_audit(audit_id, user_id) == -1
+
+    def test_audits_for_user_team_member(self, test_db):
+        """A user's auditor and reviewer audits come back partitioned by role."""
+        user_id = create_user(test_db, unique_email('member'), 'Member User')
+        audit_b = create_audit(test_db, 'B Audit')
+        audit_a = create_audit(test_db, 'A Audit')
+        create_audit(test_db, 'Unassigned Audit')
+        add_user_to_audit_team(test_db, audit_b, user_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_a, user_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_b, user_id, 'reviewer')
+        add_user_to_audit_team(test_db, audit_a, user_id, 'viewer')
+
+        audits = test_db.get_audits_for_user_team_member(user_id)
+        assert [a['id'] for a in audits['auditor']] == [audit_a, audit_b]
+        assert [a['id'] for a in audits['reviewer']] == [audit_b]
+        assert 'team_role' not in audits['auditor'][0]
+        assert test_db.get_audits_by_auditor(user_id) == audits['auditor']
+        assert test_db.get_audits_by_reviewer(user_id) == audits['reviewer']
+
+    def test_team_members_and_counts_for_audits(self, test_db):
+        """Batched team lookups match per-audit results and cover empty audits."""
+        auditor_id = create_user(test_db, unique_email('auditor'), 'Auditor User')
+        reviewer_id = create_user(test_db, unique_email('reviewer'), 'Reviewer User')
+        audit_1 = create_audit(test_db, 'Audit 1')
+        audit_2 = create_audit(test_db, 'Audit 2')
+        empty_audit = create_audit(test_db, 'Empty Audit')
+        add_user_to_audit_team(test_db, audit_1, auditor_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_1, reviewer_id, 'reviewer')
+        add_user_to_audit_team(test_db, audit_2, auditor_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_2, reviewer_id, 'auditor')
+
+        audit_ids = [audit_1, audit_2, empty_audit]
+        members = test_db.get_team_members_for_audits(audit_ids)
+        assert members == {audit_id: test_db.get_audit_team(audit_id) for audit_id in audit_ids}
+
+        counts = test_db.get_team_counts_for_audits(audit_ids)
+        assert counts == {
+            audit_1: {'auditor': 1, 'reviewer': 1},
+            audit_2: {'auditor': 2},
+            empty_audit: {},
+        }
+        assert test_db.get_team_counts_for_audits([]) == {}
+
+    def test_bulk_add_memberships(self, test_db):
+        """Bulk adds insert new memberships and skip existing ones."""
+        audit_id = create_audit(test_db, 'Test Audit')
+        auditor_id = create_user(test_db, unique_email('auditor'), 'Auditor User')
+        reviewer_id = create_user(test_db, unique_email('reviewer'), 'Reviewer User')
+        viewer_ids = [create_user(test_db, unique_email('viewer'), f'Viewer {i}', role='viewer')
+                      for i in range(2)]
+        test_db.add_to_audit_team(audit_id, auditor_id, 'auditor')
+        test_db.add_viewer_to_audit(audit_id, viewer_ids[0])
+
+        added = test_db.bulk_add_to_audit_team(audit_id, [
+            (auditor_id, 'auditor', None),
+            (reviewer_id, 'reviewer', auditor_id),
+        ])
+        assert added == 1
+        assert test_db.is_reviewer_on_audit(reviewer_id, audit_id) is True
+
+        assert test_db.bulk_add_viewers_to_audit(audit_id, viewer_ids, granted_by=auditor_id) == 1
+        assert all(test_db.is_viewer_of_audit(v, audit_id) for v in viewer_ids)
+
+        with pytest.raises(ValueError):
+            test_db.bulk_add_to_audit_team(audit_id, [(viewer_ids[0], 'viewer', None)])
+
+    def test_permissions_mask_combines_memberships(self, test_db):
+        """One mask reports team roles and viewer access from either table."""
+        from database import (AUDIT_MASK_AUDITOR, AUDIT_MASK_REVIEWER,
+                              AUDIT_MASK_VIEWER, AUDIT_MASK_TEAM_MEMBER)
+        user_id = create_user(test_db, unique_email('member'), 'Member User', role='auditor')
+        legacy_viewer_id = create_user(test_db, unique_email('viewer'), 'Legacy Viewer', role='viewer')
+        audit_id = create_audit(test_db, 'Test Audit')
+
+        assert test_db.get_user_audit_permissions_mask(user_id, audit_id) == 0
+
+        add_user_to_audit_team(test_db, audit_id, user_id, 'auditor')
+        add_user_to_audit_team(test_db, audit_id, user_id, 'reviewer')
+        assert test_db.get_user_audit_permissions_mask(user_id, audit_id) == (
+            AUDIT_MASK_AUDITOR | AUDIT_MASK_REVIEWER | AUDIT_MASK_TEAM_MEMBER)
+
+        test_db.add_viewer_to_audit(audit_id, legacy_viewer_id)
+        assert test_db.get_user_audit_permissions_mask(legacy_viewer_id, audit_id) == AUDIT_MASK_VIEWER
+        assert test_db.is_viewer_of_audit(legacy_viewer_id, audit_id) is True
+        assert test_db.is_team_member_on_audit(legacy_viewer_id, audit_id) is False
+
+
+# ==================== TEST WORKFLOW QUERIES ====================
+
+class TestWorkflowQueries:
+    """Tests for the combined risk/issue workflow queries."""
+
+    def _create_issue(self, db, audit_id, issue_id, risk_id, record_status):
+        with db._connection() as conn:
+            conn.execute('''
+                INSERT INTO issues (issue_id, risk_id, title, audit_id, record_status)
+                VALUES (?, ?, 'Test issue', ?, ?)
+            ''', (issue_id, risk_id, audit_id, record_status))
+
+    def test_records_split_by_type(self, test_db):
+        """Risks and issues come back under their own keys with their own columns."""
+        audit_id = create_audit(test_db, 'Workflow Audit')
+        create_risk_with_audit(test_db, audit_id, 'WF-R1', record_status='admin_hold')
+        self._create_issue(test_db, audit_id, 'WF-I1', 'WF-R1', 'admin_hold')
+
+        records = test_db.get_records_in_admin_hold()
+        assert [r['risk_id'] for r in records['risks']] == ['WF-R1']
+        assert [i['issue_id'] for i in records['issues']] == ['WF-I1']
+        assert 'issue_id' not in records['risks'][0]
+        assert records['risks'][0]['audit_title'] == 'Workflow Audit'
+        assert records['issues'][0]['audit_title'] == 'Workflow Audit'
+
+    def test_all_records_by_status_tags_record_type(self, test_db):
+        """Records across all audits are tagged with their type, risks first."""
+        audit_id = create_audit(test_db, 'Signed Audit')
+        create_risk_with_audit(test_db, audit_id, 'WF-R2', record_status='signed_off')
+        self._create_issue(test_db, audit_id, 'WF-I2', 'WF-R2', 'signed_off')
+        create_risk_with_audit(test_db, audit_id, 'WF-R3', record_status='draft')
+
+        records = test_db.get_all_records_by_status('signed_off')
+        assert [r['record_type'] for r in records] == ['risk', 'issue']
+
+    def test_stream_all_records_by_status_paginates(self, test_db):
+        """Streaming pages through the same ordering as the full list."""
+        audit_id = create_audit(test_db, 'Paged Audit')
+        for n in range(3):
+            create_risk_with_audit(test_db, audit_id, f'WF-P{n}', record_status='signed_off')
+            self._create_issue(test_db, audit_id, f'WF-PI{n}', f'WF-P{n}', 'signed_off')
+
+        records = test_db.get_all_records_by_status('signed_off')
+        assert [r['record_type'] for r in records] == ['risk'] * 3 + ['issue'] * 3
+
+        page = list(test_db.stream_all_records_by_status('signed_off', limit=2, offset=2))
+        assert page == records[2:4]
+        assert list(test_db.stream_all_records_by_status('signed_off', offset=5)) == records[5:]
+
+    def test_workflow_summary_counts(self, test_db):
+        """Summary counts statuses per record type, treating NULL as draft."""
+        audit_id = create_audit(test_db, 'Summary Audit')
+        create_risk_with_audit(test_db, audit_id, 'WF-R4', record_status='in_review')
+        create_risk_with_audit(test_db, audit_id, 'WF-R5', record_status=None)
+        create_risk_with_audit(test_db, audit_id, 'WF-R8', record_status='draft')
+        self._create_issue(test_db, audit_id, 'WF-I3', 'WF-R4', 'in_review')
+
+        summary = test_db.get_workflow_summary(audit_id)
+        assert summary == {
+            'risks': {'in_review': 1, 'draft': 2},
+            'issues': {'in_review': 1},
+        }
+
+    def test_workflow_summary_cache_invalidated_by_writes(self, test_db):
+        """Cached summaries are dropped by any write and handed out as copies."""
+        audit_id = create_audit(test_db, 'Cached Audit')
+        create_risk_with_audit(test_db, audit_id, 'WF-R6', record_status='draft')
+
+        summary = test_db.get_workflow_summary(audit_id)
+        assert summary == {'risks': {'draft': 1}, 'issues': {}}
+        summary['risks']['draft'] = 99
+        assert test_db.get_workflow_summary(audit_id)['risks'] == {'draft': 1}
+
+        create_risk_with_audit(test_db, audit_id, 'WF-R7', record_status='in_review')
+        assert test_db.get_workflow_summary(audit_id)['risks'] == {'draft': 1, 'in_review': 1}
+
+
+    def test_workflow_summary_sees_writes_in_open_transaction(self, test_db):
+        """A cached read inside a transaction reflects that transaction's writes."""
+        audit_id = create_audit(test_db, 'Txn Audit')
+        assert test_db.get_workflow_summary(audit_id) == {'risks': {}, 'issues': {}}
+
+        with test_db._connection():
+            create_risk_with_audit(test_db, audit_id, 'WF-R9', record_status='draft')
+            assert test_db.get_workflow_summary(audit_id)['risks'] == {'draft': 1}
+        assert test_db.get_workflow_summary(audit_id)['risks'] == {'draft': 1}
+
+# ==================== TEST CONNECTION REUSE ====================
+
+class TestConnectionReuse:
+    """Tests for the per-thread cached connection."""
+
+    def test_connection_reused_until_close_all(self, test_db):
+        """Each thread keeps one connection until close_all() drops it."""
+        with test_db._connection() as first:
+            pass
+        with test_db._connection() as second:
+            assert second is first
+
+        test_db.close_all()
+        with test_db._connection() as reopened:
+            assert reopened is not first
+            assert reopened.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+    def test_thread_connection_closed_when_thread_exits(self, test_db):
+        """Connections opened by short-lived threads do not outlive them."""
+        import gc
+        import threading
+        import sqlite3
+        conns = []
+
+        def worker():
+            test_db.get_all_risks()
+            conns.append(test_db._thread_local.conn)
+
+        for _ in range(20):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        assert len(conns) == 20
+        assert not test_db._open_conns.intersection(conns)
+        with pytest.raises(sqlite3.ProgrammingError):
+            conns[0].execute("SELECT 1")
+
+    def test_get_db_caches_instance_per_path(self, tmp_path, monkeypatch):
+        """get_db(path) opens each path once, even when threads race on it."""
+        from concurrent.futures import ThreadPoolExecutor
+        monkeypatch.setattr(db_module, '_db_instances', {})
+        path_a, path_b = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            instances = list(pool.map(lambda _: db_module.get_db(path_a), range(8)))
+
+        assert all(instance is instances[0] for instance in instances)
+        assert db_module.get_db(path_b) is not instances[0]
+        assert db_module.get_db(path_a) is instances[0]
+
+    def test_failed_sqlite_vec_load_disables_extension_loading(self, test_db, monkeypatch):
+        """A failing sqlite-vec load must not leave load_extension() enabled."""
+        import sqlite3
+        import types
+
+        def load(conn):
+            raise RuntimeError("broken install")
+
+        monkeypatch.setattr(db_module, 'sqlite_vec', types.SimpleNamespace(load=load))
+        test_db.close_all()
+        with test_db._connection() as conn:
+            assert test_db._vec_ready is False
+            with pytest.raises(sqlite3.OperationalError, match="not authorized"):
+                conn.execute("SELECT load_extension('/nonexistent/x.so')")
+
+    def test_vec_ready_tracks_the_thread_connection(self, test_db, monkeypatch):
+        """One-off connections neither load sqlite-vec nor change the flag."""
+        loads = []
+        monkeypatch.setattr(db_module, '_load_sqlite_vec',
+                            lambda conn: loads.append(conn) or True)
+        test_db.close_all()
+        with test_db._connection():
+            assert test_db._vec_ready is True
+
+        list(test_db.stream_all_records_by_status('draft'))
+        assert len(loads) == 1
+        with test_db._connection():
+            assert test_db._vec_ready is True
+
+    def test_connection_pragmas(self, test_db):
+        """New files use 8 KB pages in WAL mode; connections are memory-mapped."""
+        with test_db._connection() as conn:
+            assert conn.execute("PRAGMA page_size").fetchone()[0] == 8192
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 268435456
+
+    def test_nested_connection_joins_outer_transaction(self, test_db):
+        """A nested block neither commits nor survives the outer rollback."""
+        audit_id = create_audit(test_db, 'Nested Audit')
+
+        with pytest.raises(RuntimeError):
+            with test_db._connection() as outer:
+                create_risk_with_audit(test_db, audit_id, 'NEST-R1')
+                assert outer.in_transaction
+                raise RuntimeError('abort')
+
+        assert test_db.get_risk('NEST-R1') is None
+
+    def test_optimize_runs_periodically_and_on_close(self, test_db, monkeypatch):
+        """PRAGMA optimize runs once the interval passes and when closing."""
+        calls = []
+        monkeypatch.setattr(test_db, '_optimize', lambda conn: calls.append(conn))
+
+        test_db.get_all_audits()
+        assert calls == []
+
+        monkeypatch.setattr(db_module, 'OPTIMIZE_INTERVAL_SECONDS', -1)
+        with test_db._connection() as conn:
+            with test_db._connection():
+                pass
+            assert calls == []
+        assert calls == [conn]
+
+        test_db.close_all()
+        assert calls == [conn, conn]
+
+    def test_sqlite_vec_loaded_once_per_connection(self, test_db, monkeypatch):
+        """Library calls reuse the extension loaded when the connection opened."""
+        loaded = []
+
+        def fake_load(conn):
+            loaded.append(conn)
+            return False  # Behave as if sqlite-vec were missing
+
+        monkeypatch.setattr(db_module, '_load_sqlite_vec', fake_load)
+        test_db.close_all()
+        doc_id = test_db.add_library_document('Vec Doc', 'v.pdf', 'V.pdf')
+        test_db.add_library_chunk(doc_id, 0, 'Chunk', embedding=[0.1] * 4)
+
+        assert test_db.search_library([0.1] * 4) == []
+        assert test_db.search_library_ids([0.1] * 4) == []
+        assert test_db._init_vector_table() is False
+        assert test_db.delete_library_document(doc_id)
+
+        with test_db._connection() as conn:
+            assert loaded == [conn]
+
 
 # ==================== TEST ROLE MIGRATION ====================
 
@@ -513,3 +911,106 @@ class TestRoleMigration:
         user_id = create_user(test_db, unique_email('new_user'), 'New User', role='auditor')
         user = test_db.get_user_by_id(user_id)
         assert user['role'] == 'auditor'
+
+    def test_schema_initialised_once_per_file(self, test_db, monkeypatch):
+        """Reopening a migrated file skips init; a recreated file is migrated again."""
+        calls = []
+        original = RACMDatabase._init_db
+        monkeypatch.setattr(RACMDatabase, '_init_db',
+                            lambda db: calls.append(db.db_path) or original(db))
+
+        RACMDatabase(test_db.db_path)
+        assert calls == []
+
+        test_db.close_all()
+        os.remove(test_db.db_path)
+        reopened = RACMDatabase(test_db.db_path)
+        assert calls == [test_db.db_path]
+        assert reopened.get_all_audits() == []
+
+    def test_admin_bootstrap_uses_precomputed_hash(self, tmp_path, monkeypatch):
+        """ADMIN_PASSWORD_HASH is stored as-is instead of hashing a password."""
+        from werkzeug.security import check_password_hash
+        precomputed = generate_password_hash('s3cret', method='pbkdf2:sha256:1000')
+        monkeypatch.setenv('ADMIN_EMAIL', 'boot@example.com')
+        monkeypatch.setenv('ADMIN_PASSWORD_HASH', precomputed)
+
+        db = RACMDatabase(str(tmp_path / 'boot.db'))
+        with db._connection() as conn:
+            stored = conn.execute("SELECT password_hash FROM users WHERE email = 'boot@example.com'").fetchone()[0]
+        assert stored == precomputed
+        assert check_password_hash(stored, 's3cret')
+
+    def test_admin_bootstrap_ignores_malformed_hash(self, tmp_path, monkeypatch):
+        """A value that is not a werkzeug hash falls back to ADMIN_PASSWORD."""
+        from werkzeug.security import check_password_hash
+        monkeypatch.setenv('ADMIN_EMAIL', 'boot@example.com')
+        monkeypatch.setenv('ADMIN_PASSWORD', 'fallback-pw')
+        monkeypatch.setenv('ADMIN_PASSWORD_HASH', 'not-a-hash')
+
+        db = RACMDatabase(str(tmp_path / 'boot.db'))
+        with db._connection() as conn:
+            stored = conn.execute("SELECT password_hash FROM users WHERE email = 'boot@example.com'").fetchone()[0]
+        assert check_password_hash(stored, 'fallback-pw')
+
+    def test_failed_migration_rolls_back_its_ddl(self, tmp_path, monkeypatch):
+        """A migration that fails part-way leaves neither its DDL nor its version row."""
+        import sqlite3
+        import sys
+        import types
+        from migrations.runner import MigrationRunner
+
+        def upgrade(conn):
+            conn.execute("CREATE TABLE half_done (id INTEGER)")
+            raise RuntimeError("boom")
+
+        monkeypatch.setitem(sys.modules, 'migrations.versions.999_boom',
+                            types.SimpleNamespace(upgrade=upgrade))
+        runner = MigrationRunner(str(tmp_path / 'boom.db'))
+        monkeypatch.setattr(runner, '_get_migration_modules', lambda: [(999, '999_boom', None)])
+
+        with pytest.raises(RuntimeError):
+            runner.run_migrations()
+
+        conn = sqlite3.connect(runner.db_path)
+        try:
+            assert conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+            assert conn.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+    def test_each_migration_commits_once(self, tmp_path, monkeypatch):
+        """upgrade() functions leave committing to the runner, one commit per migration."""
+        from migrations.runner import MigrationRunner
+
+        statements = []
+        open_conn = MigrationRunner._get_conn
+
+        def traced_conn(self):
+            conn = open_conn(self)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        monkeypatch.setattr(MigrationRunner, '_get_conn', traced_conn)
+        runner = MigrationRunner(str(tmp_path / 'fresh.db'))
+        runner.run_migrations()
+
+        commits = [sql for sql in statements if sql.strip().upper() == 'COMMIT']
+        begins = [sql for sql in statements if sql.strip().upper() == 'BEGIN IMMEDIATE']
+        migrations = len(runner._get_migration_modules())
+        assert len(begins) == len(commits) == migrations
+
+    def test_migration_scan_cached_until_directory_changes(self, tmp_path):
+        """Migration files are rescanned only after the directory changes."""
+        from migrations.runner import MigrationRunner
+
+        (tmp_path / '001_first.py').write_text('')
+        (tmp_path / '__init__.py').write_text('')
+        runner = MigrationRunner(str(tmp_path / 'unused.db'))
+        runner.migrations_dir = tmp_path
+        assert [name for _, name, _ in runner._get_migration_modules()] == ['001_first']
+
+        (tmp_path / '002_second.py').write_text('')
+        os.utime(tmp_path, (1, 1))  # Guarantee an mtime change on coarse clocks
+        assert [name for _, name, _ in runner._get_migration_modules()] == ['001_first', '002_second']